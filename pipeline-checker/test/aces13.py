@@ -0,0 +1,309 @@
+"""ACES 1.3 RRT + ODT for the pipeline reference math (tonemapOp 2).
+
+NumPy port of shaders/ACES13_RRT_ODT.sdsl, split the way the WebGPU
+pipeline splits it: aces13_rrt() is stage 6 (ACEScg in, AP1 out) and the
+ODTs are stage 7 (AP1 in, linear display gamut out).
+
+The segmented splines (C5 for the RRT, C9 48/1000 nits for the ODTs) are
+compiled once at import into per-segment quadratic coefficients (in
+float32 and float64), with the linear extensions below the first and
+above the last knot as two extra segments. Evaluating a spline is then
+one searchsorted-style bucketing of log10(x) by knot interval, a gather
+of the segment's coefficients and one polynomial, with no per-pixel
+branching.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from matrices import (
+    ACES_AP0_to_AP1,
+    ACES_AP1_to_AP0,
+    ACES_AP1_to_XYZ,
+    ACES_XYZ_to_AP1,
+    AP1_to_Rec709,
+    AP1_to_Rec2020,
+    apply_matrix,
+)
+
+# =====================================================
+# Constants (match ACES13_RRT_ODT.sdsl)
+# =====================================================
+
+RRT_GLOW_GAIN = 0.05
+RRT_GLOW_MID = 0.08
+RRT_RED_SCALE = 0.82
+RRT_RED_PIVOT = 0.03
+RRT_RED_HUE = 0.0
+RRT_RED_WIDTH = 135.0
+
+CINEMA_WHITE = 48.0
+CINEMA_BLACK = 0.02
+
+ACES_DIM_SURROUND_GAMMA = 0.9811
+
+# RRT desaturation (factor = 0.96)
+RRT_SAT_MAT = np.array([
+    [0.9708890, 0.0269633, 0.00214758],
+    [0.0108892, 0.9869630, 0.00214758],
+    [0.0108892, 0.0269633, 0.96214800]
+])
+
+# ODT desaturation (factor = 0.93)
+ODT_SAT_MAT = np.array([
+    [0.949056, 0.0471857, 0.00375827],
+    [0.019056, 0.9771860, 0.00375827],
+    [0.019056, 0.0471857, 0.93375800]
+])
+
+# Quadratic B-spline basis matrix
+ACES_SPLINE_M = np.array([
+    [ 0.5, -1.0, 0.5],
+    [-1.0,  1.0, 0.0],
+    [ 0.5,  0.5, 0.0]
+])
+
+
+# =====================================================
+# Segmented splines
+# =====================================================
+
+# Segment s covers log10(x) in [edges[s-1], edges[s]) and evaluates
+# log2(y) = (a*u + b)*u + c with u = log10(x) - origin: the shader's
+# quadratic in t = u / width, with 1/width and log2(10) folded into a, b
+# and c so that evaluation needs four gathers and an exp2. Segment 0 and
+# the last segment are the linear extensions (origin 0, a 0), so every
+# segment shares one formula. `tables` maps a float dtype to its
+# (edges, origin, a, b, c) arrays.
+Spline = namedtuple("Spline", ["tables", "log_floor"])
+
+LOG2_10 = np.log2(10.0)
+
+
+def compile_spline(coefs_low, coefs_high, log_min_x, log_mid_x, log_max_x,
+                   low_slope, log_min_y, high_slope, log_max_y, log_floor):
+    """Precompute coefficients for an ACES segmented spline (C5 or C9)."""
+    n = len(coefs_low) - 3  # knot intervals per half
+    origin, a, b, c = [0.0], [0.0], [low_slope], [log_min_y - low_slope * log_min_x]
+    edges = [log_min_x]
+    for coefs, lo, hi in ((coefs_low, log_min_x, log_mid_x), (coefs_high, log_mid_x, log_max_x)):
+        width = (hi - lo) / n
+        for j in range(n):
+            poly = ACES_SPLINE_M @ np.array(coefs[j:j + 3])
+            origin.append(lo + j * width)
+            a.append(poly[0] / (width * width))
+            b.append(poly[1] / width)
+            c.append(poly[2])
+            edges.append(lo + (j + 1) * width)
+    edges[-1] = log_max_x
+    origin.append(0.0)
+    a.append(0.0)
+    b.append(high_slope)
+    c.append(log_max_y - high_slope * log_max_x)
+    table = (np.array(edges), np.array(origin),
+             *(np.array(v) * LOG2_10 for v in (a, b, c)))
+    tables = {np.dtype(dtype): tuple(v.astype(dtype) for v in table)
+              for dtype in (np.float32, np.float64)}
+    return Spline(tables, log_floor)
+
+
+def _bucket(edges, values):
+    """np.searchsorted(edges, values, side="right") for a short edge list.
+
+    Counting the edges each value has passed is a handful of SIMD compares,
+    several times faster than a per-element binary search for ~10 knots.
+    The first edge is the exception: the low extension owns it (logx <=
+    logMinX, as in the shader).
+    """
+    seg = np.greater(values, edges[0]).view(np.uint8)
+    for edge in edges[1:]:
+        seg += values >= edge
+    return seg
+
+
+def eval_spline(spline, x):
+    """10^spline(log10(max(x, floor))) for an array of any shape, in x's dtype."""
+    dtype = x.dtype
+    tables = spline.tables.get(dtype)
+    if tables is None:
+        tables = tuple(v.astype(dtype) for v in spline.tables[np.dtype(np.float64)])
+    edges, origin, a, b, c = tables
+    logx = np.maximum(x, dtype.type(10.0 ** spline.log_floor))
+    np.log10(logx, out=logx)
+    # Gathering with native ints is about twice as fast as with the uint8
+    # bucket indices, and per-coefficient takes beat one take on a stacked table
+    seg = _bucket(edges, logx).astype(np.intp)
+    logx -= origin.take(seg)
+    y = a.take(seg)
+    y *= logx
+    y += b.take(seg)
+    y *= logx
+    y += c.take(seg)
+    return np.exp2(y, out=y)
+
+
+SPLINE_C5 = compile_spline(
+    coefs_low=(-4.0000000000, -4.0000000000, -3.1573765773,
+               -0.4852499958, 1.8477324706, 1.8477324706),
+    coefs_high=(-0.7185482425, 2.0810307172, 3.6681241237,
+                4.0000000000, 4.0000000000, 4.0000000000),
+    log_min_x=np.log10(0.18 * 2.0 ** -15.0),
+    log_mid_x=np.log10(0.18),
+    log_max_x=np.log10(0.18 * 2.0 ** 18.0),
+    low_slope=0.0, log_min_y=np.log10(0.0001),
+    high_slope=0.0, log_max_y=np.log10(10000.0),
+    log_floor=-10.0,
+)
+
+
+def aces_spline_c5_fwd(x):
+    """RRT tone curve."""
+    return eval_spline(SPLINE_C5, np.asarray(x, dtype=np.float64))
+
+
+def _c9_spline(coefs_low, coefs_high, min_stops, max_stops, low_slope, min_y, high_slope, max_y):
+    # C9 knots sit at the C5 output of fixed exposures around mid grey
+    log_min_x, log_mid_x, log_max_x = np.log10(aces_spline_c5_fwd(
+        [0.18 * 2.0 ** min_stops, 0.18, 0.18 * 2.0 ** max_stops]))
+    return compile_spline(coefs_low, coefs_high, log_min_x, log_mid_x, log_max_x,
+                          low_slope, np.log10(min_y), high_slope, np.log10(max_y), log_floor=-4.0)
+
+
+SPLINE_C9_48NITS = _c9_spline(
+    coefs_low=(-1.6989700043, -1.6989700043, -1.4779000000, -1.2291000000, -0.8648000000,
+               -0.4480000000, 0.0051800000, 0.4511080334, 0.9113744414, 0.9113744414),
+    coefs_high=(0.5154386965, 0.8470437783, 1.1358000000, 1.3802000000, 1.5197000000,
+                1.5985000000, 1.6467000000, 1.6746091357, 1.6878733390, 1.6878733390),
+    min_stops=-6.5, max_stops=6.5,
+    low_slope=0.0, min_y=0.02, high_slope=0.04, max_y=48.0,
+)
+
+SPLINE_C9_1000NITS = _c9_spline(
+    coefs_low=(-4.9706219331, -3.0293780669, -2.1262000000, -1.5105000000, -1.0578000000,
+               -0.4668000000, 0.1193800000, 0.7088134201, 1.2911865799, 1.2911865799),
+    coefs_high=(0.8089132070, 1.1910867930, 1.5683000000, 1.9483000000, 2.3083000000,
+                2.6384000000, 2.8595000000, 2.9872608805, 3.0127391195, 3.0127391195),
+    min_stops=-12.0, max_stops=10.0,
+    low_slope=3.0, min_y=0.0001, high_slope=0.06, max_y=1000.0,
+)
+
+
+# =====================================================
+# RRT helpers (per pixel, vectorized over the last axis)
+# =====================================================
+
+def rgb_2_saturation(rgb):
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    mi = np.minimum(np.minimum(r, g), b)
+    ma = np.maximum(np.maximum(r, g), b)
+    return (np.maximum(ma, 1e-4) - np.maximum(mi, 1e-4)) / np.maximum(ma, 1e-2)
+
+
+def rgb_2_yc(rgb, yc_radius_weight=1.75):
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    k = np.maximum(b * (b - g) + g * (g - r) + r * (r - b), 0.0)
+    return (b + g + r + yc_radius_weight * np.sqrt(k)) / 3.0
+
+
+def rgb_2_hue(rgb):
+    """Hue in degrees [0, 360); achromatic pixels get 0."""
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    hue = (180.0 / 3.14159265) * np.arctan2(np.sqrt(3.0) * (g - b), 2.0 * r - g - b)
+    hue = np.where((r == g) & (g == b), 0.0, hue)
+    return np.where(hue < 0.0, hue + 360.0, hue)
+
+
+def center_hue(hue, center):
+    h = hue - center
+    return np.where(h < -180.0, h + 360.0, np.where(h > 180.0, h - 360.0, h))
+
+
+# cubic_basis_shaper: rows are knot intervals j = 0..3, columns t^3, t^2, t, 1
+CUBIC_BASIS = np.array([
+    [ 1.0,  0.0,  0.0, 0.0],
+    [-3.0,  3.0,  3.0, 1.0],
+    [ 3.0, -6.0,  0.0, 4.0],
+    [-1.0,  3.0, -3.0, 1.0],
+]) / 6.0
+
+
+def cubic_basis_shaper(x, w):
+    """Cubic B-spline hue weight over (-w/2, w/2), 1.0 at the centre."""
+    knot_coord = (x + w / 2.0) * 4.0 / w
+    inside = (knot_coord > 0.0) & (knot_coord < 4.0)
+    y = np.zeros_like(knot_coord)
+    k = knot_coord[inside]
+    j = np.minimum(k.astype(np.uint8), 3)
+    t = k - j
+    coefs = CUBIC_BASIS.astype(x.dtype)[j]
+    y[inside] = (((coefs[:, 0] * t + coefs[:, 1]) * t + coefs[:, 2]) * t + coefs[:, 3]) * 1.5
+    return y
+
+
+def sigmoid_shaper(x):
+    t = np.maximum(1.0 - np.abs(x / 2.0), 0.0)
+    return (1.0 + np.sign(x) * (1.0 - t * t)) / 2.0
+
+
+def glow_fwd(yc, glow_gain, glow_mid):
+    mid = glow_gain * (glow_mid / np.maximum(yc, 2.0 / 3.0 * glow_mid) - 0.5)
+    return np.where(yc <= 2.0 / 3.0 * glow_mid, glow_gain,
+                    np.where(yc >= 2.0 * glow_mid, 0.0, mid))
+
+
+# =====================================================
+# RRT (stage 6) and ODTs (stage 7)
+# =====================================================
+
+def aces13_rrt(acescg):
+    """ACES 1.3 RRT: (..., 3) ACEScg -> RRT output in AP1."""
+    aces = apply_matrix(acescg, ACES_AP1_to_AP0)
+
+    # Glow module: boost colorfulness in darks
+    saturation = rgb_2_saturation(aces)
+    s = sigmoid_shaper((saturation - 0.4) / 0.2)
+    aces *= (1.0 + glow_fwd(rgb_2_yc(aces), RRT_GLOW_GAIN * s, RRT_GLOW_MID))[..., None]
+
+    # Red modifier: reduce over-saturated reds
+    hue_weight = cubic_basis_shaper(center_hue(rgb_2_hue(aces), RRT_RED_HUE), RRT_RED_WIDTH)
+    aces[..., 0] += hue_weight * saturation * (RRT_RED_PIVOT - aces[..., 0]) * (1.0 - RRT_RED_SCALE)
+
+    # AP0 -> AP1, clamp negatives, desaturate, tone curve
+    np.maximum(aces, 0.0, out=aces)
+    rgb_pre = apply_matrix(aces, ACES_AP0_to_AP1)
+    np.maximum(rgb_pre, 0.0, out=rgb_pre)
+    rgb_pre = apply_matrix(rgb_pre, RRT_SAT_MAT)
+    return eval_spline(SPLINE_C5, rgb_pre)
+
+
+def Y_2_linCV(Y, y_max, y_min):
+    return (Y - y_min) / (y_max - y_min)
+
+
+def dark_to_dim_surround(linear_cv):
+    """Dim surround compensation (dark cinema -> dim monitor), AP1 in and out."""
+    XYZ = apply_matrix(linear_cv, ACES_AP1_to_XYZ)
+    divisor = np.maximum(XYZ[..., 0] + XYZ[..., 1] + XYZ[..., 2], 1e-4)
+    x = XYZ[..., 0] / divisor
+    y = XYZ[..., 1] / divisor
+    Y = np.power(np.maximum(XYZ[..., 1], 0.0), ACES_DIM_SURROUND_GAMMA)
+    m = Y / np.maximum(y, 1e-4)
+    XYZ = np.stack([x * m, Y, (1.0 - x - y) * m], axis=-1)
+    return apply_matrix(XYZ, ACES_XYZ_to_AP1)
+
+
+def aces13_odt_rec709_100nits(rrt_output):
+    """ACES 1.3 ODT, Rec.709 100 nits: AP1 -> linear Rec.709 in [0, 1]."""
+    Y = eval_spline(SPLINE_C9_48NITS, rrt_output)
+    linear_cv = dark_to_dim_surround(Y_2_linCV(Y, CINEMA_WHITE, CINEMA_BLACK))
+    linear_cv = apply_matrix(linear_cv, ODT_SAT_MAT)
+    out = apply_matrix(linear_cv, AP1_to_Rec709)
+    return np.clip(out, 0.0, 1.0, out=out)
+
+
+def aces13_odt_rec2020_1000nits(rrt_output):
+    """ACES 1.3 ODT, Rec.2020 1000 nits: AP1 -> linear Rec.2020 (1.0 = 1000 nits)."""
+    Y = eval_spline(SPLINE_C9_1000NITS, rrt_output)
+    linear_cv = apply_matrix(Y_2_linCV(Y, 1000.0, 0.0001), ODT_SAT_MAT)
+    out = apply_matrix(linear_cv, AP1_to_Rec2020)
+    return np.maximum(out, 0.0, out=out)
@@ -0,0 +1,667 @@
+"""ACES 2.0 output transform for the pipeline reference math (tonemapOp 3).
+
+NumPy port of shaders/ACES20_RRT_ODT.sdsl. Two paths, as in the shader:
+
+- aces20_rrt() / aces20_odt_rec709() / aces20_odt_rec2020(): the simplified
+  per-channel Daniele Evo tonescale plus a gamut matrix. This is what the
+  WebGPU pipeline runs as stage 6 (ACEScg in, AP1 normalized to peak out)
+  and stage 7 (AP1 in, display linear out).
+- aces2_drt(): the full Hellwig 2022 CAM "JMh" DRT (tonescale on A, chroma
+  compression, gamut compression against the per-hue cusp/reach tables),
+  ACEScg in, display-linear limiting gamut out. With the baked tables this
+  is ACES2_DRT_Rec709_SDR (Rec.709, 100 nits).
+
+The baked parameters and 360-entry hue tables are parsed from
+shaders/ACES20_Tables.sdsl on first use and cached, so the shader source
+stays the single copy of the data. generate_tables() is a vectorized port
+of tools/Aces2TableGen for any limiting primaries and peak luminance (it
+reproduces the baked Rec.709 / 100 nit case); drt_params() caches its
+results in memory and as .npz files keyed by those parameters. Hue-table lookups are vectorized: a
+table gets a wrap-around entry appended so every hue interpolates between
+index i and i + 1 without a modulo, and the three cusp tables are sampled
+with one gather.
+"""
+import functools
+import hashlib
+import os
+import re
+
+import numpy as np
+
+from matrices import AP1_to_Rec709, AP1_to_Rec2020, apply_matrix
+
+TABLES_SDSL = os.path.join(os.path.dirname(__file__), "..", "..", "shaders", "ACES20_Tables.sdsl")
+
+HUE_TABLE_SIZE = 360
+HUE_TABLES = ("reachM", "cuspJ", "cuspM", "gammaTopInv")
+
+# =====================================================
+# Daniele Evo tonescale (per-channel fallback)
+# =====================================================
+
+DANIELE_N_R = 100.0
+DANIELE_G = 1.15
+DANIELE_C = 0.18
+DANIELE_C_D = 10.013
+DANIELE_W_G = 0.14
+DANIELE_T_1 = 0.04
+DANIELE_R_HIT_MIN = 128.0
+DANIELE_R_HIT_MAX = 896.0
+
+
+def aces20_tonescale_init(peak_luminance):
+    """Tonescale parameters (s_2, u_2, m_2, t_1) for a display peak in nits."""
+    n = peak_luminance
+    n_r = DANIELE_N_R
+    g = DANIELE_G
+    t_1 = DANIELE_T_1
+
+    r_hit = DANIELE_R_HIT_MIN + (DANIELE_R_HIT_MAX - DANIELE_R_HIT_MIN) \
+        * (np.log2(n / n_r) / np.log2(10000.0 / 100.0))
+
+    m_0 = n / n_r
+    m_1 = 0.5 * (m_0 + np.sqrt(m_0 * (m_0 + 4.0 * t_1)))
+    u = ((r_hit / m_1) / ((r_hit / m_1) + 1.0)) ** g
+    w_i = np.log2(n / 100.0)
+    c_t = DANIELE_C_D / n_r * (1.0 + w_i * DANIELE_W_G)
+    g_ip = 0.5 * (c_t + np.sqrt(c_t * (c_t + 4.0 * t_1)))
+    ratio = (g_ip / (m_1 / u)) ** (1.0 / g)
+    g_ipp2 = -m_1 * ratio / (ratio - 1.0)
+    w_2 = DANIELE_C / g_ipp2
+    s_2 = w_2 * m_1
+    u_2 = ((r_hit / m_1) / ((r_hit / m_1) + w_2)) ** g
+    m_2 = m_1 / u_2
+    return float(s_2), float(u_2), float(m_2), t_1
+
+
+def aces20_rrt(acescg, peak_luminance=100.0):
+    """Per-channel Daniele tonescale: ACEScg -> AP1 normalized so 1.0 = peak."""
+    s_2, _, m_2, t_1 = aces20_tonescale_init(peak_luminance)
+    f = np.maximum(acescg, 0.0)
+    f /= acescg + s_2
+    np.power(f, DANIELE_G, out=f)
+    f *= m_2
+    h = f * f
+    h /= f + t_1
+    np.maximum(h, 0.0, out=h)
+    h *= DANIELE_N_R / peak_luminance
+    return h
+
+
+def aces20_odt_rec709(ap1):
+    out = apply_matrix(ap1, AP1_to_Rec709)
+    return np.clip(out, 0.0, 1.0, out=out)
+
+
+def aces20_odt_rec2020(ap1):
+    out = apply_matrix(ap1, AP1_to_Rec2020)
+    return np.maximum(out, 0.0, out=out)
+
+
+# =====================================================
+# Baked CAM DRT parameters (ACES20_Tables.sdsl)
+# =====================================================
+
+_FLOAT = r"(-?[\d.]+(?:[eE][-+]?\d+)?)f?"
+
+
+def parse_tables_sdsl(path=TABLES_SDSL):
+    """Read the ACES2_* constants of a generated tables shader into a dict.
+
+    Keys drop the ACES2_ prefix; matrices become 3x3 arrays (row-major, as
+    written in the float3x3 literal) and hue tables 360-entry arrays.
+    """
+    with open(path, "r") as f:
+        text = f.read()
+    params = {}
+    for name, body in re.findall(r"static const float3x3 ACES2_(\w+) = float3x3\(([^)]*)\);", text):
+        params[name] = np.array([float(v) for v in re.findall(_FLOAT, body)]).reshape(3, 3)
+    for name, value in re.findall(r"static const float ACES2_(\w+) = " + _FLOAT + ";", text):
+        params[name] = float(value)
+    for name, size, body in re.findall(r"static const float ACES2_(\w+)\[(\d+)\] = \{([^}]*)\};", text):
+        table = np.array([float(v) for v in re.findall(_FLOAT, body)])
+        if table.shape[0] != int(size):
+            raise ValueError(f"{path}: ACES2_{name} has {table.shape[0]} entries, expected {size}")
+        params[name] = table
+    missing = [name for name in HUE_TABLES if name not in params]
+    if missing:
+        raise ValueError(f"{path}: missing hue tables {', '.join(missing)}")
+    return params
+
+
+@functools.lru_cache(maxsize=None)
+def baked_params():
+    """The Rec.709 / 100 nit parameters baked into ACES20_Tables.sdsl (cached)."""
+    return parse_tables_sdsl()
+
+
+def _wrapped(table):
+    """Append entry 0 so hue index 359 interpolates towards 0 without a modulo."""
+    return np.append(table, table[:1], axis=0)
+
+
+def sample_hue_table(table, h):
+    """Linear interpolation of a (360,) or (360, K) table at hue h in degrees."""
+    hh = h - np.floor(h / 360.0) * 360.0
+    i0 = np.floor(hh)
+    t = hh - i0
+    i0 = np.minimum(i0.astype(np.intp), HUE_TABLE_SIZE - 1)
+    table = _wrapped(np.asarray(table, dtype=h.dtype))
+    lo = table[i0]
+    hi = table[i0 + 1]
+    if table.ndim == 2:
+        t = t[..., None]
+    return lo + (hi - lo) * t
+
+
+# =====================================================
+# Full Hellwig 2022 CAM DRT
+# =====================================================
+
+def _signed(magnitude, v):
+    """copysign with +0 for v == 0 (v < 0 ? -r : r)."""
+    return np.where(v < 0.0, -magnitude, magnitude)
+
+
+def paccrc_fwd(v):
+    """Post-adaptation cone response compression."""
+    t = np.power(np.abs(v), 0.42)
+    return _signed(t / (27.13 + t), v)
+
+
+def paccrc_inv(v):
+    a = np.minimum(np.abs(v), 0.99)
+    return _signed(np.power(27.13 * a / (1.0 - a), 1.0 / 0.42), v)
+
+
+def tonescale_A_to_J(A, p):
+    """Daniele tonescale applied through achromatic Y; input is A = Aab.x."""
+    Y_in = paccrc_inv(p["in_A_w_J"] * A) / p["in_F_L_n"]
+    # Negative A gives f = NaN on the GPU, which max(0, NaN) turns into 0
+    f = p["ts_m_2"] * np.power(np.maximum(Y_in, 0.0) / (Y_in + p["ts_s_2"]), p["ts_g"])
+    Y_ts = np.maximum(0.0, f * f / (f + p["ts_t_1"])) * p["ts_n_r"]
+    Ra = paccrc_fwd(Y_ts * p["in_F_L_n"])
+    J = 100.0 * np.power(Ra * p["in_inv_A_w_J"], p["in_cz"])
+    return _signed(J, A)
+
+
+def chroma_compress_norm(cos1, sin1, scale):
+    c2 = 2.0 * cos1 * cos1 - 1.0
+    s2 = 2.0 * cos1 * sin1
+    c3 = 4.0 * cos1 * cos1 * cos1 - 3.0 * cos1
+    s3 = 3.0 * sin1 - 4.0 * sin1 * sin1 * sin1
+    M = (11.34072 * cos1 + 16.46899 * c2 + 7.88380 * c3
+         + 14.66441 * sin1 - 6.37224 * s2 + 9.19364 * s3 + 77.12896)
+    return M * scale
+
+
+def toe_fwd(x, limit, k1i, k2i):
+    k2 = np.maximum(k2i, 0.001)
+    k1 = np.sqrt(k1i * k1i + k2 * k2)
+    k3 = (limit + k1) / (limit + k2)
+    mb = k3 * x - k1
+    toe = 0.5 * (mb + np.sqrt(mb * mb + 4.0 * k2 * k3 * x))
+    return np.where(x > limit, x, toe)
+
+
+def chroma_compress_fwd(J, M, J_ts, Mnorm, reach_max_M, p):
+    J_max = p["limit_J_max"]
+    gamma_inv = p["model_gamma_inv"]
+    zero = M == 0.0
+    J = np.where(zero, 1.0, J)
+    nJ = J_ts / J_max
+    snJ = np.maximum(0.0, 1.0 - nJ)
+    limit = np.power(nJ, gamma_inv) * reach_max_M / Mnorm
+    Mcp = M * np.power(J_ts / J, gamma_inv) / Mnorm
+    Mcp = limit - toe_fwd(limit - Mcp, limit - 0.001, snJ * p["cc_sat"],
+                          np.sqrt(nJ * nJ + p["cc_sat_thr"]))
+    Mcp = toe_fwd(Mcp, limit, nJ * p["cc_compr"], snJ)
+    return np.where(zero, 0.0, Mcp * Mnorm)
+
+
+def _focus_gain(J, thr, p):
+    J_max = p["limit_J_max"]
+    ga = np.log10((J_max - thr) / np.maximum(1e-4, J_max - J))
+    gain = J_max * p["g_focus_dist"]
+    return np.where(J > thr, gain * (ga * ga + 1.0), gain)
+
+
+def _solve_J_intersect(J, M, focus_J, sg, J_max):
+    Ms = M / sg
+    a = Ms / focus_J
+    below = J < focus_J
+    b = np.where(below, 1.0 - Ms, -(1.0 + Ms + J_max * a))
+    c = np.where(below, -J, J_max * Ms + J)
+    root = np.sqrt(b * b - 4.0 * a * c)
+    return -2.0 * c / np.where(below, b + root, b - root)
+
+
+def _compression_slope(iJ, focus_J, sg, J_max):
+    direction = np.where(iJ < focus_J, iJ, J_max - iJ)
+    return direction * (iJ - focus_J) / (focus_J * sg)
+
+
+def _estimate_boundary_M(J_axis, slope, inv_g, J_max, M_max, J_ref):
+    shifted = J_ref * np.power(J_axis / J_ref, inv_g)
+    return shifted * M_max / (J_max - slope * M_max)
+
+
+def _smin_scaled(a, b, ref_M):
+    s = 0.12 * ref_M
+    hh = np.maximum(s - np.abs(a - b), 0.0) / s
+    return np.minimum(a, b) - hh * hh * hh * s * (1.0 / 6.0)
+
+
+def _remap_M_fwd(M, gB, rB):
+    prop = np.maximum(gB / rB, 0.75)
+    thr = prop * gB
+    mo = M - thr
+    go = gB - thr
+    ro = rB - thr
+    scl = ro / ((ro / go) - 1.0)
+    nd = mo / scl
+    compressed = thr + scl * nd / (1.0 + nd)
+    return np.where((M <= thr) | (prop >= 1.0), M, compressed)
+
+
+def gamut_compress_fwd(J, M, h, reach_max_M, p):
+    """(J', M') after gamut compression; evaluated only where it changes anything."""
+    J_max = p["limit_J_max"]
+    J_out = np.where(J <= 0.0, 0.0, J)
+    M_out = np.zeros_like(M)
+    active = (J > 0.0) & (M > 0.0) & (J <= J_max)
+    if not active.any():
+        return J_out, M_out
+
+    J, M, h, reach_max_M = J[active], M[active], h[active], reach_max_M[active]
+    cusp = sample_hue_table(np.stack([p["cuspJ"], p["cuspM"], p["gammaTopInv"]], axis=-1), h)
+    cusp_J, cusp_M, g_top_inv = cusp[:, 0], cusp[:, 1], cusp[:, 2]
+
+    focus_J = cusp_J + (p["g_mid_J"] - cusp_J) * np.minimum(1.0, 1.3 - cusp_J / J_max)
+    thr = cusp_J + (J_max - cusp_J) * 0.3
+    sg = _focus_gain(J, thr, p)
+    iJ_src = _solve_J_intersect(J, M, focus_J, sg, J_max)
+    slope = _compression_slope(iJ_src, focus_J, sg, J_max)
+    iJ_cusp = _solve_J_intersect(cusp_J, cusp_M, focus_J, sg, J_max)
+
+    M_lo = _estimate_boundary_M(iJ_src, slope, p["g_lower_hull_gamma_inv"], cusp_J, cusp_M, iJ_cusp)
+    M_hi = _estimate_boundary_M(J_max - iJ_src, -slope, g_top_inv,
+                                J_max - cusp_J, cusp_M, J_max - iJ_cusp)
+    gB = _smin_scaled(M_lo, M_hi, cusp_M)
+    rB = _estimate_boundary_M(iJ_src, slope, p["model_gamma_inv"], J_max, reach_max_M, J_max)
+
+    inside = gB > 0.0
+    Mr = np.where(inside, _remap_M_fwd(M, np.where(inside, gB, 1.0), rB), 0.0)
+    J_out[active] = np.where(inside, iJ_src + Mr * slope, J)
+    M_out[active] = Mr
+    return J_out, M_out
+
+
+def aces2_drt(acescg, params=None):
+    """Full ACES 2.0 DRT: (N, 3) ACEScg -> display-linear limiting gamut in [0, 1].
+
+    params defaults to the baked Rec.709 / 100 nit tables, which makes this
+    ACES2_DRT_Rec709_SDR; pass drt_params() for other gamuts and peaks.
+    Output is normalized so 1.0 = peak.
+    """
+    p = baked_params() if params is None else params
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # RGB(AP1) -> Aab (input params)
+        Aab = apply_matrix(paccrc_fwd(apply_matrix(acescg, p["RGB_to_CAM16_c"])), p["cone_to_Aab_in"])
+        A, a, b = Aab[..., 0], Aab[..., 1], Aab[..., 2]
+
+        # Aab -> JMh
+        valid = A > 0.0
+        J = np.where(valid, 100.0 * np.power(np.maximum(A, 0.0), p["in_cz"]), 0.0)
+        M = np.where(valid, np.sqrt(a * a + b * b), 0.0)
+        h = np.where(valid, np.degrees(np.arctan2(b, a)), 0.0)
+        h -= np.floor(h / 360.0) * 360.0
+        hr = np.radians(h)
+        cos1 = np.cos(hr)
+        sin1 = np.sin(hr)
+
+        reach_max_M = sample_hue_table(p["reachM"], h)
+        Mnorm = chroma_compress_norm(cos1, sin1, p["cc_scale"])
+        J_ts = tonescale_A_to_J(A, p)
+        Mcc = chroma_compress_fwd(J, M, J_ts, Mnorm, reach_max_M, p)
+        J_gc, M_gc = gamut_compress_fwd(J_ts, Mcc, h, reach_max_M, p)
+
+        # JMh -> Aab -> RGB (output params), reusing the input hue
+        Aab_out = np.stack([np.power(J_gc * 0.01, p["out_inv_cz"]), M_gc * cos1, M_gc * sin1], axis=-1)
+        rgb = apply_matrix(paccrc_inv(apply_matrix(Aab_out, p["Aab_to_cone_out"])), p["CAM16_c_to_RGB_out"])
+    rgb *= p["ts_n_r"] / p.get("peak_luminance", 100.0)
+    return np.clip(rgb, 0.0, 1.0, out=rgb)
+
+
+# =====================================================
+# Table generation (port of tools/Aces2TableGen)
+# =====================================================
+
+# Chromaticities (Rx, Ry, Gx, Gy, Bx, By, Wx, Wy)
+AP1_PRIMARIES = (0.713, 0.293, 0.165, 0.830, 0.128, 0.044, 0.32168, 0.33767)
+REC709_PRIMARIES = (0.64, 0.33, 0.30, 0.60, 0.15, 0.06, 0.3127, 0.3290)
+REC2020_PRIMARIES = (0.708, 0.292, 0.170, 0.797, 0.131, 0.046, 0.3127, 0.3290)
+P3D65_PRIMARIES = (0.680, 0.320, 0.265, 0.690, 0.150, 0.060, 0.3127, 0.3290)
+CAM16_PRIMARIES = (0.8336, 0.1735, 2.3854, -1.4659, 0.087, -0.125, 0.333, 0.333)
+
+# Bump when the generator changes so stale cache files are not reused
+TABLE_GENERATOR_VERSION = 1
+TABLE_CACHE_DIR = os.environ.get(
+    "ACES2_TABLE_CACHE", os.path.join(os.path.dirname(__file__), ".cache", "aces2_tables"))
+
+CAM_L_A = 100.0
+CAM_Y_B = 20.0
+CAM_SURROUND = (0.9, 0.59, 0.9)  # F, c, N_c
+
+REACH_SEARCH_STEP = 50.0
+REACH_SEARCH_MAX = 1300.0
+REACH_ACCURACY = 1e-2
+CUSP_HUE_ACCURACY = 1e-5
+CUSP_BISECTIONS = 60
+GAMMA_MINIMUM = 0.0
+GAMMA_MAXIMUM = 5.0
+GAMMA_SEARCH_STEP = 0.4
+GAMMA_ACCURACY = 1e-5
+GAMMA_TEST_POSITIONS = np.array([0.01, 0.1, 0.5, 0.8, 0.99])
+
+
+def rgb_to_xyz_matrix(primaries):
+    """RGB -> XYZ for the primaries' own white (no chromatic adaptation)."""
+    xy = np.array(primaries, dtype=np.float64).reshape(4, 2)
+    XYZ = np.stack([xy[:, 0] / xy[:, 1], np.ones(4), (1.0 - xy[:, 0] - xy[:, 1]) / xy[:, 1]])
+    S = np.linalg.solve(XYZ[:, :3], XYZ[:, 3])
+    return XYZ[:, :3] * S
+
+
+def _model_gamma():
+    return CAM_SURROUND[1] * (1.48 + np.sqrt(CAM_Y_B / 100.0))
+
+
+def init_jmh_params(primaries):
+    """CAM matrices and constants for RGB in the given primaries (init_JMhParams)."""
+    cam16_to_xyz = rgb_to_xyz_matrix(CAM16_PRIMARIES)
+    rgb_to_xyz = rgb_to_xyz_matrix(primaries)
+    XYZ_w = rgb_to_xyz @ np.full(3, 100.0)
+    RGB_w = np.linalg.solve(cam16_to_xyz, XYZ_w)
+
+    K = 1.0 / (5.0 * CAM_L_A + 1.0)
+    K4 = K ** 4
+    F_L = 0.2 * K4 * (5.0 * CAM_L_A) + 0.1 * (1.0 - K4) ** 2 * (5.0 * CAM_L_A) ** (1.0 / 3.0)
+    F_L_n = F_L / 100.0
+    cz = _model_gamma()
+
+    D_RGB = F_L_n * XYZ_w[1] / RGB_w
+    RGB_AW = paccrc_fwd(D_RGB * RGB_w)
+    cone = 400.0 * np.array([
+        [2.0, 1.0, 1.0 / 20.0],
+        [1.0, -12.0 / 11.0, 1.0 / 11.0],
+        [1.0 / 9.0, 1.0 / 9.0, -2.0 / 9.0],
+    ])
+    A_w = cone[0] @ RGB_AW
+    A_w_J = float(paccrc_fwd(F_L))
+
+    RGB_to_CAM16_c = D_RGB[:, None] * np.linalg.solve(cam16_to_xyz, rgb_to_xyz) * 100.0
+    cone_to_Aab = np.vstack([cone[:1] / A_w, cone[1:] * (43.0 * CAM_SURROUND[2])])
+    return {
+        "RGB_to_CAM16_c": RGB_to_CAM16_c,
+        "CAM16_c_to_RGB": np.linalg.inv(RGB_to_CAM16_c),
+        "cone_to_Aab": cone_to_Aab,
+        "Aab_to_cone": np.linalg.inv(cone_to_Aab),
+        "F_L_n": F_L_n,
+        "cz": cz,
+        "inv_cz": 1.0 / cz,
+        "A_w_J": A_w_J,
+        "inv_A_w_J": 1.0 / A_w_J,
+    }
+
+
+def rgb_to_jmh(rgb, jp):
+    """(..., 3) RGB -> (J, M, h) arrays with h in [0, 360)."""
+    Aab = apply_matrix(paccrc_fwd(apply_matrix(rgb, jp["RGB_to_CAM16_c"])), jp["cone_to_Aab"])
+    A, a, b = Aab[..., 0], Aab[..., 1], Aab[..., 2]
+    valid = A > 0.0
+    J = np.where(valid, 100.0 * np.power(np.maximum(A, 0.0), jp["cz"]), 0.0)
+    M = np.where(valid, np.sqrt(a * a + b * b), 0.0)
+    h = np.where(valid, np.degrees(np.arctan2(b, a)), 0.0)
+    h -= np.floor(h / 360.0) * 360.0
+    return J, M, h
+
+
+def jmh_to_rgb(J, M, h, jp):
+    """Broadcast (J, M, h) -> (..., 3) RGB."""
+    J, M, h = np.broadcast_arrays(J, M, h)
+    hr = np.radians(h)
+    Aab = np.stack([np.power(J * 0.01, jp["inv_cz"]), M * np.cos(hr), M * np.sin(hr)], axis=-1)
+    return apply_matrix(paccrc_inv(apply_matrix(Aab, jp["Aab_to_cone"])), jp["CAM16_c_to_RGB"])
+
+
+def _Y_to_J(Y, jp):
+    Ra = paccrc_fwd(abs(Y) * jp["F_L_n"])
+    J = 100.0 * (Ra * jp["inv_A_w_J"]) ** jp["cz"]
+    return float(-J if Y < 0.0 else J)
+
+
+def _tonescale_params(peak_luminance):
+    """Daniele parameters in the CAM's absolute units (init_ToneScaleParams)."""
+    n = peak_luminance
+    n_r = DANIELE_N_R
+    g = DANIELE_G
+    t_1 = DANIELE_T_1
+    r_hit = DANIELE_R_HIT_MIN + (DANIELE_R_HIT_MAX - DANIELE_R_HIT_MIN) \
+        * (np.log(n / n_r) / np.log(10000.0 / 100.0))
+    m_0 = n / n_r
+    m_1 = 0.5 * (m_0 + np.sqrt(m_0 * (m_0 + 4.0 * t_1)))
+    u = ((r_hit / m_1) / ((r_hit / m_1) + 1.0)) ** g
+    m = m_1 / u
+    w_i = np.log(n / 100.0) / np.log(2.0)
+    c_t = DANIELE_C_D / n_r * (1.0 + w_i * DANIELE_W_G)
+    g_ip = 0.5 * (c_t + np.sqrt(c_t * (c_t + 4.0 * t_1)))
+    ratio = (g_ip / m) ** (1.0 / g)
+    g_ipp2 = -(m_1 * ratio) / (ratio - 1.0)
+    w_2 = DANIELE_C / g_ipp2
+    s_2 = w_2 * m_1 * 100.0
+    u_2 = ((r_hit / m_1) / ((r_hit / m_1) + w_2)) ** g
+    return {"ts_m_2": m_1 / u_2, "ts_s_2": s_2, "ts_g": g, "ts_t_1": t_1, "ts_n_r": n_r,
+            "c_t": c_t, "log_peak": np.log10(n / n_r)}
+
+
+def make_reach_table(reach_jp, limit_J_max):
+    """Per-hue M where J = limit_J_max leaves the reach (AP1) gamut."""
+    hues = np.arange(HUE_TABLE_SIZE, dtype=np.float64)
+    # Coarse scan of M = 50, 100, ... below REACH_SEARCH_MAX, all hues at once
+    steps = np.arange(REACH_SEARCH_STEP, REACH_SEARCH_MAX, REACH_SEARCH_STEP)
+    outside = (jmh_to_rgb(limit_J_max, steps, hues[:, None], reach_jp) < 0.0).any(axis=-1)
+    found = outside.any(axis=1)
+    high = np.where(found, steps[outside.argmax(axis=1)], REACH_SEARCH_MAX)
+    low = np.where(found, high - REACH_SEARCH_STEP, steps[-1])
+
+    while True:
+        active = high - low > REACH_ACCURACY
+        if not active.any():
+            return high
+        mid = 0.5 * (high + low)
+        out = (jmh_to_rgb(limit_J_max, mid, hues, reach_jp) < 0.0).any(axis=-1)
+        high = np.where(active & out, mid, high)
+        low = np.where(active & ~out, mid, low)
+
+
+def make_cusp_table(limit_jp, peak_luminance):
+    """Per-hue (J, M) cusp of the limiting gamut, bisecting along the RGB cube edges."""
+    scale = peak_luminance / 100.0
+    corners = np.array([
+        [1.0, 0.0, 0.0], [1.0, 1.0, 0.0], [0.0, 1.0, 0.0],
+        [0.0, 1.0, 1.0], [0.0, 0.0, 1.0], [1.0, 0.0, 1.0],
+    ]) * scale
+    corner_h = rgb_to_jmh(corners, limit_jp)[2]
+
+    # Bracketing edge (lo, lo + 1) for every integer hue, hues unwrapped past lo
+    target = np.arange(HUE_TABLE_SIZE, dtype=np.float64)
+    h0 = corner_h
+    h1 = np.roll(corner_h, -1)
+    h1 = np.where(h1 < h0, h1 + 360.0, h1)
+    th = np.where(target[:, None] < h0, target[:, None] + 360.0, target[:, None])
+    bracket = (th >= h0) & (th <= h1)
+    lo = np.where(bracket.any(axis=1), bracket.argmax(axis=1), 0)
+    rgb_lo = corners[lo]
+    rgb_hi = corners[(lo + 1) % len(corners)]
+
+    t_lo = np.zeros(HUE_TABLE_SIZE)
+    t_hi = np.ones(HUE_TABLE_SIZE)
+    cusp_J = np.empty(HUE_TABLE_SIZE)
+    cusp_M = np.empty(HUE_TABLE_SIZE)
+    active = np.ones(HUE_TABLE_SIZE, dtype=bool)
+    for _ in range(CUSP_BISECTIONS):
+        tm = 0.5 * (t_lo + t_hi)
+        J, M, h = rgb_to_jmh(rgb_lo + (rgb_hi - rgb_lo) * tm[:, None], limit_jp)
+        cusp_J = np.where(active, J, cusp_J)
+        cusp_M = np.where(active, M, cusp_M)
+        dh = h - target
+        dh = np.where(dh > 180.0, dh - 360.0, dh)
+        dh = np.where(dh < -180.0, dh + 360.0, dh)
+        active &= np.abs(dh) >= CUSP_HUE_ACCURACY
+        if not active.any():
+            break
+        t_lo = np.where(active & (dh < 0.0), tm, t_lo)
+        t_hi = np.where(active & (dh >= 0.0), tm, t_hi)
+    return cusp_J, cusp_M * (1.0 + 0.27 * 0.12)
+
+
+def make_upper_hull_gamma(limit_jp, peak_luminance, cusp_J, cusp_M, p):
+    """Per-hue 1 / gamma: the smallest upper-hull gamma that puts every test point outside."""
+    scale = peak_luminance / 100.0
+    J_max = p["limit_J_max"]
+    hues = np.arange(HUE_TABLE_SIZE, dtype=np.float64)[:, None]
+    cusp_J = cusp_J[:, None]
+    cusp_M = cusp_M[:, None]
+    focus_J = cusp_J + (p["g_mid_J"] - cusp_J) * np.minimum(1.0, 1.3 - cusp_J / J_max)
+    thr = cusp_J + (J_max - cusp_J) * 0.3
+
+    test_J = cusp_J + (J_max - cusp_J) * GAMMA_TEST_POSITIONS
+    sg = _focus_gain(test_J, thr, p)
+    iJ_src = _solve_J_intersect(test_J, cusp_M, focus_J, sg, J_max)
+    slope = _compression_slope(iJ_src, focus_J, sg, J_max)
+    iJ_cusp = _solve_J_intersect(cusp_J, cusp_M, focus_J, sg, J_max)
+    M_lo = _estimate_boundary_M(iJ_src, slope, p["g_lower_hull_gamma_inv"], cusp_J, cusp_M, iJ_cusp)
+
+    def fits(gamma):
+        M_hi = _estimate_boundary_M(J_max - iJ_src, -slope, 1.0 / gamma[:, None],
+                                    J_max - cusp_J, cusp_M, J_max - iJ_cusp)
+        approx_M = _smin_scaled(M_lo, M_hi, cusp_M)
+        rgb = jmh_to_rgb(iJ_src + slope * approx_M, approx_M, hues, limit_jp)
+        return (rgb > scale).any(axis=-1).all(axis=-1)
+
+    # Step upwards until a gamma fits, then bisect; candidates are accumulated
+    # the way the C# loop adds them so the brackets match bit for bit
+    low = np.full(HUE_TABLE_SIZE, GAMMA_MINIMUM)
+    high = np.full(HUE_TABLE_SIZE, np.nan)
+    candidate = GAMMA_MINIMUM + GAMMA_SEARCH_STEP
+    previous = GAMMA_MINIMUM
+    while candidate <= GAMMA_MAXIMUM:
+        fit = np.isnan(high) & fits(np.full(HUE_TABLE_SIZE, candidate))
+        low[fit] = previous
+        high[fit] = candidate
+        previous = candidate
+        candidate += GAMMA_SEARCH_STEP
+    found = ~np.isnan(high)
+    high[~found] = GAMMA_MAXIMUM
+    low[~found] = GAMMA_MAXIMUM
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        while True:
+            active = high - low > GAMMA_ACCURACY
+            if not active.any():
+                return 1.0 / high
+            mid = 0.5 * (low + high)
+            fit = fits(mid)
+            high = np.where(active & fit, mid, high)
+            low = np.where(active & ~fit, mid, low)
+
+
+def generate_tables(limiting_primaries=REC709_PRIMARIES, peak_luminance=100.0):
+    """DRT parameters and hue tables for ACEScg in, any limiting gamut and peak.
+
+    Same keys as parse_tables_sdsl(), so the result drives aces2_drt(); for
+    Rec.709 / 100 nits it reproduces ACES20_Tables.sdsl.
+    """
+    in_jp = init_jmh_params(AP1_PRIMARIES)
+    out_jp = init_jmh_params(limiting_primaries)
+    ts = _tonescale_params(peak_luminance)
+    log_peak = ts.pop("log_peak")
+    c_t = ts.pop("c_t")
+
+    p = {
+        "RGB_to_CAM16_c": in_jp["RGB_to_CAM16_c"],
+        "CAM16_c_to_RGB": in_jp["CAM16_c_to_RGB"],
+        "cone_to_Aab_in": in_jp["cone_to_Aab"],
+        "Aab_to_cone_in": in_jp["Aab_to_cone"],
+        "RGB_to_CAM16_c_out": out_jp["RGB_to_CAM16_c"],
+        "CAM16_c_to_RGB_out": out_jp["CAM16_c_to_RGB"],
+        "cone_to_Aab_out": out_jp["cone_to_Aab"],
+        "Aab_to_cone_out": out_jp["Aab_to_cone"],
+        "in_cz": in_jp["cz"],
+        "in_inv_cz": in_jp["inv_cz"],
+        "in_F_L_n": in_jp["F_L_n"],
+        "in_A_w_J": in_jp["A_w_J"],
+        "in_inv_A_w_J": in_jp["inv_A_w_J"],
+        "out_inv_cz": out_jp["inv_cz"],
+        "limit_J_max": _Y_to_J(peak_luminance, in_jp),
+        "model_gamma_inv": 1.0 / _model_gamma(),
+        **ts,
+        "cc_sat": max(0.2, 1.3 - 1.3 * 0.69 * log_peak),
+        "cc_sat_thr": 0.5 / peak_luminance,
+        "cc_compr": 2.4 + 2.4 * 3.3 * log_peak,
+        "cc_scale": (0.03379 * peak_luminance) ** 0.30596 - 0.45135,
+        "g_mid_J": _Y_to_J(c_t * 100.0, in_jp),
+        "g_focus_dist": 1.35 + 1.35 * 1.75 * log_peak,
+        "g_lower_hull_gamma_inv": 1.0 / (1.14 + 0.07 * log_peak),
+        "peak_luminance": float(peak_luminance),
+    }
+    p = {k: float(v) if np.ndim(v) == 0 else v for k, v in p.items()}
+    p["reachM"] = make_reach_table(init_jmh_params(AP1_PRIMARIES), p["limit_J_max"])
+    p["cuspJ"], p["cuspM"] = make_cusp_table(out_jp, peak_luminance)
+    p["gammaTopInv"] = make_upper_hull_gamma(out_jp, peak_luminance, p["cuspJ"], p["cuspM"], p)
+    return p
+
+
+def table_cache_key(limiting_primaries, peak_luminance):
+    """Stable file-name key for a (limiting primaries, peak) pair."""
+    text = repr((TABLE_GENERATOR_VERSION, tuple(round(float(v), 6) for v in limiting_primaries),
+                 round(float(peak_luminance), 6)))
+    return f"aces2_{float(peak_luminance):g}nits_{hashlib.sha1(text.encode()).hexdigest()[:16]}"
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_tables(limiting_primaries, peak_luminance, cache_dir):
+    path = os.path.join(cache_dir, table_cache_key(limiting_primaries, peak_luminance) + ".npz")
+    if os.path.isfile(path):
+        with np.load(path) as data:
+            return {k: float(v) if v.ndim == 0 else v for k, v in data.items()}
+
+    params = generate_tables(limiting_primaries, peak_luminance)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(tmp, **params)
+    os.replace(tmp, path)
+    return params
+
+
+def drt_params(limiting_primaries=REC709_PRIMARIES, peak_luminance=100.0, cache_dir=None):
+    """generate_tables() cached in memory and as .npz files under cache_dir."""
+    primaries = tuple(float(v) for v in limiting_primaries)
+    return _cached_tables(primaries, float(peak_luminance), cache_dir or TABLE_CACHE_DIR)
+
+
+def aces20_output_transform_rec709(acescg, peak_luminance=100.0):
+    """ACES20_OutputTransform_Rec709_Nits through the full DRT.
+
+    100 nits uses the baked tables like the shader; other peaks use
+    generated tables where the shader falls back to aces20_rrt().
+    """
+    if abs(peak_luminance - 100.0) < 0.5:
+        return aces2_drt(acescg)
+    return aces2_drt(acescg, drt_params(REC709_PRIMARIES, peak_luminance))
+
+
+def aces20_output_transform_rec2020(acescg, peak_luminance=1000.0):
+    """ACES20_OutputTransform_Rec2020_Nits through the full DRT with generated tables."""
+    return aces2_drt(acescg, drt_params(REC2020_PRIMARIES, peak_luminance))
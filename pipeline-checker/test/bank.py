@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""Pipeline Checker — SettingsBank files compiled to reference plans.
+
+Reads a SettingsBank JSON file (SettingsBankData.cs: camelCase properties,
+enums as C# names) once and lowers every key's ProjectSettings to flat
+pipeline settings and a frozen build_plan() result, with fused matrices,
+the selected operator and precomputed constants.
+
+Compiled plans are cached under a content hash of their flat settings, so
+reloading an edited bank with the same PlanCache only recompiles the keys
+whose settings changed (and keys that share a look share one plan). Plans
+hold closures, so the cache lives in memory; ACES 2.0 tables, the costliest
+constants, are already cached on disk by aces20.drt_params().
+
+Usage:
+    python test/bank.py settings-bank.json
+    python test/bank.py settings-bank.json --snapshots --show-plan --key Default
+"""
+import argparse
+import hashlib
+import json
+from collections import OrderedDict, namedtuple
+
+from pipeline import build_plan, format_plan, resolve_settings
+from verify import HDR_COLOR_SPACES, TONEMAP_OPERATORS
+
+SUPPORTED_BANK_VERSIONS = (1,)
+
+# C# enum name -> value (JsonStringEnumConverter writes names, but numbers also parse)
+COLOR_SPACE_VALUES = {name: value for value, name in HDR_COLOR_SPACES.items()}
+TONEMAP_VALUES = {name: value for value, name in TONEMAP_OPERATORS.items()}
+GRADING_SPACE_VALUES = {"Log": 0, "Linear": 1}
+
+# ColorCorrectionSettings property -> (pipeline key, C# default, kind)
+COLOR_CORRECTION_FIELDS = {
+    "inputSpace": ("inputSpace", "Linear_Rec709", COLOR_SPACE_VALUES),
+    "gradingSpace": ("gradingSpace", "Log", GRADING_SPACE_VALUES),
+    "exposure": ("exposure", 0.0, float),
+    "contrast": ("contrast", 1.0, float),
+    "saturation": ("saturation", 1.0, float),
+    "temperature": ("temperature", 0.0, float),
+    "tint": ("tint", 0.0, float),
+    "highlights": ("highlights", 0.0, float),
+    "shadows": ("shadows", 0.0, float),
+    "vibrance": ("vibrance", 0.0, float),
+    "lift": ("lift", (0.0, 0.0, 0.0), list),
+    "gamma": ("gamma", (1.0, 1.0, 1.0), list),
+    "gain": ("gain", (1.0, 1.0, 1.0), list),
+    "offset": ("offset", (0.0, 0.0, 0.0), list),
+    "shadowColor": ("shadowColor", (0.0, 0.0, 0.0), list),
+    "midtoneColor": ("midtoneColor", (0.0, 0.0, 0.0), list),
+    "highlightColor": ("highlightColor", (0.0, 0.0, 0.0), list),
+    "highlightSoftClip": ("highlightSoftClip", 0.0, float),
+    "shadowSoftClip": ("shadowSoftClip", 0.0, float),
+    "highlightKnee": ("highlightKnee", 1.0, float),
+    "shadowKnee": ("shadowKnee", 0.1, float),
+    "vignetteStrength": ("vignetteStrength", 0.0, float),
+    "vignetteRadius": ("vignetteRadius", 0.7, float),
+    "vignetteSoftness": ("vignetteSoftness", 0.3, float),
+}
+
+# TonemapSettings property -> (pipeline key, C# default, kind)
+TONEMAP_FIELDS = {
+    "outputSpace": ("outputSpace", "Linear_Rec709", COLOR_SPACE_VALUES),
+    "tonemap": ("tonemapOp", "None", TONEMAP_VALUES),
+    "exposure": ("tonemapExposure", 0.0, float),
+    "whitePoint": ("whitePoint", 4.0, float),
+    "paperWhite": ("paperWhite", 200.0, float),
+    "peakBrightness": ("peakBrightness", 1000.0, float),
+    "blackLevel": ("blackLevel", 0.0, float),
+    "whiteLevel": ("whiteLevel", 1.0, float),
+}
+
+# One compiled bank key: digest is the content hash the plan is cached under
+CompiledKey = namedtuple("CompiledKey", ["key", "friendly_name", "digest", "settings", "plan"])
+
+
+# =====================================================
+# ProjectSettings -> pipeline settings
+# =====================================================
+
+def _convert(value, kind, name):
+    if isinstance(kind, dict):
+        if isinstance(value, str):
+            if value not in kind:
+                raise ValueError(f"{name}: unknown value '{value}'")
+            return kind[value]
+        return int(value)
+    if kind is list:
+        if isinstance(value, dict):
+            return [float(value.get(c, 0.0)) for c in "xyz"]
+        return [float(v) for v in value]
+    return float(value)
+
+
+def _section(section, fields, path):
+    settings = {}
+    for prop, (key, default, kind) in fields.items():
+        settings[key] = _convert(section.get(prop, default), kind, f"{path}.{prop}")
+    return settings
+
+
+def project_settings_to_pipeline(project, path="settings"):
+    """Flat pipeline settings for one ProjectSettings JSON object.
+
+    Missing properties take the C# defaults, as they do when the bank is
+    deserialized by the runtime.
+    """
+    settings = _section(project.get("colorCorrection") or {}, COLOR_CORRECTION_FIELDS,
+                        f"{path}.colorCorrection")
+    settings.update(_section(project.get("tonemap") or {}, TONEMAP_FIELDS, f"{path}.tonemap"))
+    return resolve_settings(settings)
+
+
+def settings_digest(settings):
+    """Content hash of flat pipeline settings (key order does not matter)."""
+    blob = json.dumps(settings, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+# =====================================================
+# Bank loading and compilation
+# =====================================================
+
+def load_bank(path):
+    """Parse a SettingsBank JSON file; returns its entries dict."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    version = data.get("version", 1)
+    if version not in SUPPORTED_BANK_VERSIONS:
+        raise ValueError(f"{path}: unsupported SettingsBank version {version}")
+    return data.get("entries") or {}
+
+
+def bank_settings(entries, snapshots=False):
+    """Yield (key, friendly name, flat settings); snapshots appear as 'key@snapshot'."""
+    for key, entry in entries.items():
+        yield key, entry.get("friendlyName"), project_settings_to_pipeline(
+            entry.get("settings") or {}, key)
+        if snapshots:
+            for name, project in (entry.get("snapshots") or {}).items():
+                label = f"{key}@{name}"
+                yield label, None, project_settings_to_pipeline(project, label)
+
+
+def freeze_plan(plan):
+    """Tuple of PlanSteps with read-only matrices, safe to share between keys."""
+    for step in plan:
+        if step.matrix is not None:
+            step.matrix.setflags(write=False)
+    return tuple(plan)
+
+
+class PlanCache:
+    """Frozen plans keyed by settings digest, with compile/reuse counters.
+
+    `stages` optionally restricts every plan to a subset of stage numbers.
+    """
+
+    def __init__(self, fuse=True, stages=None):
+        self.fuse = fuse
+        self.stages = stages
+        self._plans = {}
+        self.compiled = 0
+        self.reused = 0
+
+    def __len__(self):
+        return len(self._plans)
+
+    def get(self, settings, digest=None):
+        if digest is None:
+            digest = settings_digest(settings)
+        plan = self._plans.get(digest)
+        if plan is None:
+            plan = freeze_plan(build_plan(settings, fuse=self.fuse, stages=self.stages))
+            self._plans[digest] = plan
+            self.compiled += 1
+        else:
+            self.reused += 1
+        return plan
+
+    def retain(self, digests):
+        """Drop plans whose digest is not in `digests` (keys removed from the bank)."""
+        for digest in set(self._plans) - set(digests):
+            del self._plans[digest]
+
+
+def compile_bank(path, cache=None, snapshots=False):
+    """Compile every key of a bank file; returns an OrderedDict key -> CompiledKey.
+
+    Pass the same `cache` when reloading so unchanged keys reuse their plans.
+    """
+    if cache is None:
+        cache = PlanCache()
+    compiled = OrderedDict()
+    for key, friendly_name, settings in bank_settings(load_bank(path), snapshots):
+        digest = settings_digest(settings)
+        compiled[key] = CompiledKey(key, friendly_name, digest, settings, cache.get(settings, digest))
+    cache.retain(c.digest for c in compiled.values())
+    return compiled
+
+
+# =====================================================
+# Main
+# =====================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="VL.OCIO Pipeline Checker — SettingsBank plans")
+    parser.add_argument("bank", help="SettingsBank JSON file")
+    parser.add_argument("--snapshots", action="store_true", help="Also compile named snapshots")
+    parser.add_argument("--key", help="Only list this key")
+    parser.add_argument("--show-plan", action="store_true", help="Print each listed key's plan")
+    parser.add_argument("--no-fuse", action="store_true", help="Compile stage by stage without fusion")
+    args = parser.parse_args()
+
+    cache = PlanCache(fuse=not args.no_fuse)
+    compiled = compile_bank(args.bank, cache, args.snapshots)
+    print(f"{args.bank}: {len(compiled)} keys, {len(cache)} distinct plans")
+    for key, entry in compiled.items():
+        if args.key is not None and key != args.key:
+            continue
+        name = f" ({entry.friendly_name})" if entry.friendly_name else ""
+        print(f"  {key}{name}: {len(entry.plan)} steps  {entry.digest[:12]}")
+        if args.show_plan:
+            print(format_plan(entry.plan))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""Pipeline Checker — performance baseline for the reference math.
+
+Times every batched stage function in verify.py, every TonemapOperator
+value through stage 6, the full ACES 2.0 CAM DRT and the fused
+run_pipeline() plan, at 1M, 8M and 33M pixels (roughly 1K, 4K and 8K
+frames) in float32 and float64. Each case is swept repeatedly for at least
+a minimum time and reports pixels/sec of its best sweep plus the spread of
+the sweeps (median vs best), so results saved as JSON can be compared
+against an earlier run to spot slowdowns that stand out from the noise.
+
+With --tiled it also renders whole 4K frames of the full look with the
+ACES 1.3 tonemap through parallel.TiledRenderer, against a 1 s per-frame
+target.
+
+Frames are swept in fixed-size blocks with preallocated outputs (the way
+run_pipeline() drives the stages), so even 33M float64 pixels fit in a
+few GB.
+
+Usage:
+    python test/benchmark.py
+    python test/benchmark.py --sizes 1M --dtypes float32 --json bench.json
+    python test/benchmark.py --json new.json --compare bench.json
+    python test/benchmark.py --sizes 1M --filter rrt --tiled --workers 8
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from aces20 import REC2020_PRIMARIES, aces2_drt, generate_tables
+from parallel import TiledRenderer
+from pipeline import ScratchBuffers, build_plan, resolve_settings, run_plan
+from verify import (
+    TONEMAP_OPERATORS,
+    stage4_input_convert,
+    stage5_color_grade,
+    stage6_rrt,
+    stage7_odt,
+    stage8_output_encode,
+    stage9_display_remap,
+)
+
+SIZES = {"1M": 1 << 20, "8M": 8 << 20, "33M": 33 << 20}
+DTYPES = ("float32", "float64")
+DEFAULT_BLOCK_PIXELS = 1 << 20
+
+# A case slower than the baseline by more than this fraction on top of the
+# measured spread of both runs is flagged as a possible regression
+REGRESSION_THRESHOLD = 0.10
+
+# Each case is swept at least DEFAULT_MIN_SWEEPS times and for DEFAULT_MIN_TIME seconds
+DEFAULT_MIN_SWEEPS = 3
+DEFAULT_MIN_TIME = 0.5
+
+# Full reference look used for the end-to-end cases
+PIPELINE_SETTINGS = {
+    "inputSpace": 2, "exposure": 0.5, "tonemapOp": 1, "tonemapExposure": 0.0,
+    "outputSpace": 5, "blackLevel": 0.02, "whiteLevel": 0.98,
+}
+
+# --tiled: one 4K frame of the full look with the ACES 1.3 RRT + ODT (the
+# slowest tonemap) through parallel.TiledRenderer, against a per-frame target
+TILED_FRAME = (2160, 3840)
+TILED_SETTINGS = dict(PIPELINE_SETTINGS, tonemapOp=2)
+TILED_TARGET_SECONDS = 1.0
+
+
+def benchmark_cases():
+    """(name, fn(rgb, out) -> out) for every case."""
+    def stage(fn, settings):
+        settings = resolve_settings(settings)
+        return lambda rgb, out: fn(rgb, settings, out=out)
+
+    cases = [
+        ("stage4_input_convert[ACEScg]", stage(stage4_input_convert, {"inputSpace": 2})),
+        ("stage4_input_convert[sRGB]", stage(stage4_input_convert, {"inputSpace": 5})),
+        ("stage5_color_grade[Log]", stage(stage5_color_grade, {"exposure": 1.0})),
+        ("stage5_color_grade[Linear]", stage(stage5_color_grade, {"gradingSpace": 1, "exposure": 1.0})),
+    ]
+    for op, name in TONEMAP_OPERATORS.items():
+        cases.append((f"stage6_rrt[{op} {name}]",
+                      stage(stage6_rrt, {"tonemapOp": op, "whitePoint": 4.0})))
+
+    def drt(make_params):
+        # Tables are generated on first use (in memory, not in the drt_params()
+        # disk cache), so listing or filtering cases costs nothing
+        params = []
+
+        def run(rgb, out):
+            if not params:
+                params.append(make_params())
+            np.copyto(out, aces2_drt(rgb, params[0]))
+            return out
+        return run
+    cases.append(("aces2_drt[Rec709 100 nits]", drt(lambda: None)))
+    cases.append(("aces2_drt[Rec2020 1000 nits]",
+                  drt(lambda: generate_tables(REC2020_PRIMARIES, 1000.0))))
+    cases += [
+        ("stage7_odt", stage(stage7_odt, {})),
+        ("stage8_output_encode[sRGB]", stage(stage8_output_encode, {"outputSpace": 5})),
+        ("stage9_display_remap", stage(stage9_display_remap, {"blackLevel": 0.05, "whiteLevel": 0.95})),
+    ]
+    for fuse in (True, False):
+        plan = build_plan(PIPELINE_SETTINGS, fuse=fuse)
+        scratch = {}
+
+        def run(rgb, out, plan=plan, scratch=scratch):
+            key = (rgb.shape[0], rgb.dtype)
+            if key not in scratch:
+                scratch.clear()
+                scratch[key] = ScratchBuffers(*key)
+            return run_plan(rgb, plan, scratch[key], out=out)
+        cases.append((f"pipeline[{'fused' if fuse else 'unfused'}]", run))
+    return cases
+
+
+def make_frame(pixels, dtype, seed=0, block=DEFAULT_BLOCK_PIXELS):
+    """(pixels, 3) log-distributed HDR values (-8..+6 stops), built blockwise."""
+    rng = np.random.default_rng(seed)
+    frame = np.empty((pixels, 3), dtype=dtype)
+    for start in range(0, pixels, block):
+        stop = min(start + block, pixels)
+        frame[start:stop] = np.exp2(rng.uniform(-8.0, 6.0, size=(stop - start, 3)))
+    return frame
+
+
+def time_case(fn, frame, block, min_sweeps=DEFAULT_MIN_SWEEPS, min_time=DEFAULT_MIN_TIME):
+    """Wall times of sweeps of `frame` in `block`-pixel blocks.
+
+    Sweeps until there are at least min_sweeps of them and min_time seconds
+    have been spent, so millisecond cases get enough samples to judge noise.
+    """
+    out = np.empty((min(block, frame.shape[0]), 3), dtype=frame.dtype)
+    times = []
+    while len(times) < min_sweeps or sum(times) < min_time:
+        start_time = time.perf_counter()
+        for start in range(0, frame.shape[0], block):
+            stop = min(start + block, frame.shape[0])
+            fn(frame[start:stop], out[:stop - start])
+        times.append(time.perf_counter() - start_time)
+    return times
+
+
+def run_benchmarks(sizes, dtypes, block=DEFAULT_BLOCK_PIXELS, min_sweeps=DEFAULT_MIN_SWEEPS,
+                   name_filter=None, min_time=DEFAULT_MIN_TIME):
+    """Time all cases; returns a list of result dicts."""
+    cases = benchmark_cases()
+    if name_filter:
+        cases = [c for c in cases if name_filter in c[0]]
+    results = []
+    for size_label in sizes:
+        pixels = SIZES[size_label]
+        for dtype in dtypes:
+            frame = make_frame(pixels, np.dtype(dtype), block=block)
+            for name, fn in cases:
+                times = time_case(fn, frame, block, min_sweeps, min_time)
+                results.append(case_result(name, size_label, pixels, dtype, times))
+            del frame
+    return results
+
+
+def case_result(name, size_label, pixels, dtype, times):
+    """Result dict for one case's sweep times (printed as it is made)."""
+    seconds = min(times)
+    median = float(np.median(times))
+    result = {
+        "case": name,
+        "size": size_label,
+        "pixels": pixels,
+        "dtype": dtype,
+        "seconds": seconds,
+        "medianSeconds": median,
+        "sweeps": len(times),
+        # Relative spread of the sweeps: (median - best) / best
+        "spread": median / seconds - 1.0,
+        "pixelsPerSec": pixels / seconds,
+    }
+    print(f"  {name:44s} {size_label:>4s} {dtype:8s} "
+          f"{result['pixelsPerSec'] / 1e6:9.1f} Mpix/s  ({seconds * 1000:8.1f} ms "
+          f"+{result['spread']:5.1%}, {len(times)} sweeps)")
+    return result
+
+
+def run_tiled_benchmark(workers=None, min_sweeps=DEFAULT_MIN_SWEEPS, min_time=DEFAULT_MIN_TIME):
+    """Time whole 4K frames through TiledRenderer (input_view() in, file memmap out)."""
+    height, width = TILED_FRAME
+    frame = make_frame(height * width, np.dtype(np.float32)).reshape(height, width, 3)
+    with tempfile.TemporaryDirectory() as tmp, TiledRenderer(TILED_SETTINGS, workers) as renderer:
+        np.copyto(renderer.input_view(frame.shape, frame.dtype), frame)
+        del frame
+        out = np.lib.format.open_memmap(os.path.join(tmp, "out.npy"), mode="w+",
+                                        dtype=np.float32, shape=(height, width, 3))
+        renderer.render(out=out)  # start the pool
+        times = []
+        while len(times) < min_sweeps or sum(times) < min_time:
+            start_time = time.perf_counter()
+            renderer.render(out=out)
+            times.append(time.perf_counter() - start_time)
+        del out
+        name = f"tiled[ACES 1.3 look, {renderer.workers} workers]"
+    result = case_result(name, "4K", height * width, "float32", times)
+    verdict = "meets" if result["seconds"] < TILED_TARGET_SECONDS else "misses"
+    print(f"  {'':44s} {verdict} the {TILED_TARGET_SECONDS:g} s per 4K frame target "
+          f"({os.cpu_count()} CPUs)")
+    return result
+
+
+def environment():
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+    }
+
+
+def compare_results(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Print per-case speed ratios vs. a baseline run; returns regression count.
+
+    A case counts as a regression only when it is slower by more than
+    `threshold` plus the spread of the two runs (baselines without a
+    recorded spread count as noise-free).
+    """
+    def key(r):
+        return (r["case"], r["size"], r["dtype"])
+
+    base = {key(r): r for r in baseline["results"]}
+    regressions = 0
+    print()
+    print(f"Compared with baseline from {baseline['environment'].get('date', '?')}:")
+    for r in results:
+        old = base.get(key(r))
+        if old is None:
+            continue
+        ratio = r["pixelsPerSec"] / old["pixelsPerSec"]
+        noise = r.get("spread", 0.0) + old.get("spread", 0.0)
+        flag = ""
+        if ratio < 1.0 / (1.0 + threshold + noise):
+            flag = "  REGRESSION?"
+            regressions += 1
+        print(f"  {r['case']:44s} {r['size']:>4s} {r['dtype']:8s} x{ratio:5.2f} "
+              f"(noise {noise:5.1%}){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VL.OCIO Pipeline Checker — benchmarks")
+    parser.add_argument("--sizes", default=",".join(SIZES),
+                        help=f"Comma-separated frame sizes from {', '.join(SIZES)}")
+    parser.add_argument("--dtypes", default=",".join(DTYPES), help="Comma-separated dtypes")
+    parser.add_argument("--block-pixels", type=int, default=DEFAULT_BLOCK_PIXELS,
+                        help="Pixels per block when sweeping a frame")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_MIN_SWEEPS,
+                        help="Minimum sweeps per case (best is kept)")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME,
+                        help="Minimum seconds spent sweeping each case")
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--tiled", action="store_true",
+                        help=f"Also time 4K frames of the ACES 1.3 look through parallel.py "
+                             f"(target: under {TILED_TARGET_SECONDS:g} s)")
+    parser.add_argument("--workers", type=int, help="Worker processes for --tiled (default: CPU count)")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    args = parser.parse_args()
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    dtypes = [d.strip() for d in args.dtypes.split(",") if d.strip()]
+    unknown = [s for s in sizes if s not in SIZES] + [d for d in dtypes if d not in DTYPES]
+    if unknown:
+        parser.error(f"unknown size/dtype: {', '.join(unknown)}")
+
+    print("=" * 60)
+    print("VL.OCIO Pipeline Checker — Reference Math Benchmarks")
+    print("=" * 60)
+    results = run_benchmarks(sizes, dtypes, args.block_pixels, args.repeat, args.filter,
+                             args.min_time)
+    if args.tiled:
+        results.append(run_tiled_benchmark(args.workers, args.repeat, args.min_time))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline)
+        if regressions:
+            # Advisory until the timings are stable enough to gate on
+            print(f"\n{regressions} possible regressions (not failing the run)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Color space conversion engine for the pipeline reference math.
+
+NumPy port of ToLinearRec709 / FromLinearRec709 / ConvertColorSpace in
+shaders/ColorSpaceConversion.sdsl for all nine HDRColorSpace values.
+
+Every space is a transfer function plus a linear gamut matrix through the
+Linear Rec.709 hub, and the fixed scales (PQ 10000 nits, HLG x12, scRGB
+80 nits) are folded into those matrices. The composed matrix for every
+(from, to) pair is built once at import time, so a conversion is one decode,
+one matmul and one clamp+encode, and pairs whose matrix is exactly the
+identity skip the matmul.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from matrices import AP1_to_Rec709, Rec709_to_AP1, Rec2020_to_Rec709, Rec709_to_Rec2020, apply_matrix
+from transfer import (
+    PQ_MAX_NITS,
+    acescc_to_linear,
+    acescct_to_linear,
+    hlg_to_linear,
+    linear_to_acescc,
+    linear_to_acescct,
+    linear_to_hlg,
+    linear_to_pq,
+    linear_to_srgb,
+    pq_to_linear,
+    srgb_to_linear,
+)
+
+# =====================================================
+# HDRColorSpace (src/HDR/ColorSpaceEnums.cs)
+# =====================================================
+
+LINEAR_REC709 = 0
+LINEAR_REC2020 = 1
+ACESCG = 2
+ACESCC = 3
+ACESCCT = 4
+SRGB = 5
+PQ_REC2020 = 6
+HLG_REC2020 = 7
+SCRGB = 8
+
+COLOR_SPACES = tuple(range(9))
+
+# Paper white assumed by FromLinearRec709 for PQ
+PQ_PAPER_WHITE = 200.0
+HLG_SCALE = 12.0
+SCRGB_NITS = 80.0
+
+_I = np.eye(3)
+
+# (decode transfer or None, space -> Linear Rec.709 matrix)
+DECODE = {
+    LINEAR_REC709: (None, _I),
+    LINEAR_REC2020: (None, Rec2020_to_Rec709),
+    ACESCG: (None, AP1_to_Rec709),
+    ACESCC: (acescc_to_linear, AP1_to_Rec709),
+    ACESCCT: (acescct_to_linear, AP1_to_Rec709),
+    SRGB: (srgb_to_linear, _I),
+    PQ_REC2020: (pq_to_linear, Rec2020_to_Rec709 * PQ_MAX_NITS),
+    HLG_REC2020: (hlg_to_linear, Rec2020_to_Rec709 * HLG_SCALE),
+    SCRGB: (None, _I * SCRGB_NITS),
+}
+
+# (Linear Rec.709 -> space matrix, clamp to [0, 1] before encoding, encode transfer or None)
+ENCODE = {
+    LINEAR_REC709: (_I, False, None),
+    LINEAR_REC2020: (Rec709_to_Rec2020, False, None),
+    ACESCG: (Rec709_to_AP1, False, None),
+    ACESCC: (Rec709_to_AP1, False, linear_to_acescc),
+    ACESCCT: (Rec709_to_AP1, False, linear_to_acescct),
+    SRGB: (_I, True, linear_to_srgb),
+    PQ_REC2020: (Rec709_to_Rec2020 * (PQ_PAPER_WHITE / PQ_MAX_NITS), False, linear_to_pq),
+    HLG_REC2020: (Rec709_to_Rec2020 / HLG_SCALE, True, linear_to_hlg),
+    SCRGB: (_I / SCRGB_NITS, False, None),
+}
+
+
+# =====================================================
+# Conversions
+# =====================================================
+
+# decode(x, out) -> out, then x @ matrix.T (None = identity), then optional
+# clamp to [0, 1], then encode(x, out) -> out
+Conversion = namedtuple("Conversion", ["decode", "matrix", "clip", "encode"])
+
+IDENTITY_CONVERSION = Conversion(None, None, False, None)
+
+
+def make_conversion(decode, matrix, clip, encode):
+    """Conversion with an exact-identity matrix dropped."""
+    if matrix is not None and np.array_equal(matrix, _I):
+        matrix = None
+    return Conversion(decode, matrix, clip, encode)
+
+
+def _build_conversions():
+    conversions = {}
+    for src in COLOR_SPACES:
+        decode, to_hub = DECODE[src]
+        for dst in COLOR_SPACES:
+            if src == dst:
+                conversions[src, dst] = IDENTITY_CONVERSION
+                continue
+            from_hub, clip, encode = ENCODE[dst]
+            conversions[src, dst] = make_conversion(decode, from_hub @ to_hub, clip, encode)
+    return conversions
+
+
+# Every (from, to) pair, composed once at import
+CONVERSIONS = _build_conversions()
+
+
+def apply_conversion(rgb, conversion, out=None):
+    """Run a Conversion on (..., 3) rgb; `out` must not alias `rgb`."""
+    decode, matrix, clip, encode = conversion
+    x = rgb
+    if decode is not None:
+        x = decode(x, out=out)
+    if matrix is not None:
+        x = apply_matrix(x, matrix, out=out if x is rgb else None)
+    if clip:
+        x = np.clip(x, 0.0, 1.0, out=out if x is rgb else x)
+    if encode is not None:
+        x = encode(x, out=out if x is rgb else x)
+    if x is rgb:
+        if out is None:
+            return rgb.copy()
+        np.copyto(out, rgb)
+        return out
+    if out is not None and x is not out:
+        np.copyto(out, x)
+        return out
+    return x
+
+
+def convert_color_space(rgb, from_space, to_space, out=None):
+    """ConvertColorSpace: any HDRColorSpace to any other (same space = copy)."""
+    return apply_conversion(rgb, CONVERSIONS[from_space, to_space], out=out)
+
+
+def to_linear_rec709(rgb, space, out=None):
+    """ToLinearRec709."""
+    return convert_color_space(rgb, space, LINEAR_REC709, out=out)
+
+
+def from_linear_rec709(rgb, space, out=None):
+    """FromLinearRec709."""
+    return convert_color_space(rgb, LINEAR_REC709, space, out=out)
@@ -1,9 +1,55 @@
 """Compute golden reference values for pipeline verification.
 Run: python test/compute_reference.py > test/fixtures/reference-values.json
+
+Also writes the compiled test/fixtures/reference-values.npz that verify.py
+memory-maps instead of parsing the JSON, and test/fixtures/reference-sweeps.npz:
+the same scenarios over a dense sweep (log-spaced grey ramps, per-hue
+saturation sweeps, ramps across transfer-function breakpoints and random
+HDR samples). Sweep inputs are float32 so they round-trip exactly; expected
+values are stored as float32 too, which keeps 10^7 points around 1 GB
+instead of hundreds of MB of JSON per million. The sweep file is generated,
+not checked in.
+
+    python test/compute_reference.py --sweep-points 1000000 > test/fixtures/reference-values.json
 """
+import argparse
+import os
+import sys
+
 import numpy as np
 import json
 
+from fixture_io import (
+    ReferenceFixture,
+    Scenario,
+    json_sha1,
+    reference_from_json,
+    save_reference_fixture,
+)
+from transfer import (
+    ACEScct_A,
+    ACEScct_B,
+    ACEScct_CUT_LINEAR,
+    ACEScct_CUT_LOG,
+    HALF_MAX,
+    HLG_a,
+    HLG_b,
+    HLG_c,
+    PQ_MAX_NITS,
+    PQ_c1,
+    PQ_c2,
+    PQ_c3,
+    PQ_m1,
+    PQ_m2,
+    SRGB_LINEAR_CUT,
+    linear_to_srgb,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+REFERENCE_FIXTURE = os.path.join(FIXTURES_DIR, "reference-values.npz")
+SWEEP_FIXTURE = os.path.join(FIXTURES_DIR, "reference-sweeps.npz")
+DEFAULT_SWEEP_POINTS = 100000
+
 # =====================================================
 # Matrices (row-major / numpy convention)
 # =====================================================
@@ -46,33 +92,285 @@ ACESOutputMat = np.array([
 
 
 # =====================================================
-# Transfer functions
+# Transfer functions (branchless, as in ColorSpaceConversion.sdsl)
 # =====================================================
 
-def linear_to_srgb_ch(l):
-    if l <= 0.0031308:
-        return l * 12.92
-    return 1.055 * (l ** (1.0 / 2.4)) - 0.055
+def acescc_decode(cc):
+    return np.clip(np.exp2(cc * 17.52 - 9.72), 0.0, HALF_MAX)
+
+
+def acescct_decode(cct):
+    lin = np.where(cct >= ACEScct_CUT_LOG, np.exp2(cct * 17.52 - 9.72),
+                   (cct - ACEScct_B) / ACEScct_A)
+    return np.clip(lin, 0.0, HALF_MAX)
+
+
+def pq_decode(n):
+    nm2 = np.power(np.maximum(n, 0.0), 1.0 / PQ_m2)
+    return np.power(np.maximum(nm2 - PQ_c1, 0.0) / (PQ_c2 - PQ_c3 * nm2), 1.0 / PQ_m1)
+
+
+def hlg_decode(v):
+    return np.where(v >= 0.5, (np.exp((v - HLG_c) / HLG_a) + HLG_b) / 12.0, v * v / 3.0)
+
 
-def linear_to_srgb(rgb):
-    return np.array([linear_to_srgb_ch(c) for c in rgb])
+def acescc_encode(lin):
+    return (np.log2(np.maximum(lin, 1e-10)) + 9.72) / 17.52
+
+
+def acescct_encode(lin):
+    lin = np.maximum(lin, 1e-10)
+    return np.where(lin >= ACEScct_CUT_LINEAR, acescc_encode(lin), ACEScct_A * lin + ACEScct_B)
+
+
+def pq_encode(lin):
+    ym1 = np.power(np.maximum(lin, 0.0), PQ_m1)
+    return np.power((PQ_c1 + PQ_c2 * ym1) / (1.0 + PQ_c3 * ym1), PQ_m2)
+
+
+def hlg_encode(lin):
+    lin = np.maximum(lin, 0.0)
+    log_seg = HLG_a * np.log(np.maximum(12.0 * lin - HLG_b, 1e-10)) + HLG_c
+    return np.where(lin >= 1.0 / 12.0, log_seg, np.sqrt(3.0 * lin))
+
+
+def encoded_range(fn):
+    """fn for signals in [0, 1]; rows with a channel outside are not checked (NaN)."""
+    def run(rgb):
+        out = fn(rgb)
+        out[((rgb < 0.0) | (rgb > 1.0)).any(axis=-1)] = np.nan
+        return out
+    return run
 
 
 # =====================================================
-# Tonemap operators
+# Tonemap operators (batched: color is (..., 3))
 # =====================================================
 
 def aces_fit_tonemap_bt709(color):
-    v = ACESInputMat @ color
+    v = color @ ACESInputMat.T
     a = v * (v + 0.0245786) - 0.000090537
     b = v * (0.983729 * v + 0.4329510) + 0.238081
     v = a / b
-    return np.clip(ACESOutputMat @ v, 0.0, 1.0)
+    return np.clip(v @ ACESOutputMat.T, 0.0, 1.0)
 
 def reinhard_tonemap(color):
     return color / (color + 1.0)
 
 
+# The other TonemapOperators.sdsl curves, written out from the shader (not
+# from tonemap.py) so the two ports check each other
+
+AGX_INSET_MAT = np.array([
+    [0.842479062253094,  0.0784335999999992, 0.0792237451477643],
+    [0.0423282422610123, 0.878468636469772,  0.0791661274605434],
+    [0.0423756549057051, 0.0784336,          0.879142973793104]
+])
+
+AGX_OUTSET_MAT = np.array([
+    [ 1.19687900512017,   -0.0528968517574562, -0.0529716355144438],
+    [-0.0980208811401368,  1.15190312990417,   -0.0980434501171241],
+    [-0.0990297440797205, -0.0989611768448433,  1.15107367264116]
+])
+
+
+def agx_tonemap(color):
+    min_ev, max_ev = -12.47393, 4.026069
+    v = np.clip(np.log2(np.maximum(color @ AGX_INSET_MAT.T, 1e-10)), min_ev, max_ev)
+    v = (v - min_ev) / (max_ev - min_ev)
+    threshold = 20.0 / 33.0
+    down = v <= threshold
+    a = np.where(down, 59.507875, 69.86278913545539)
+    b = np.where(down, 3.0, 13.0 / 4.0)
+    c = np.where(down, -1.0 / 3.0, -4.0 / 13.0)
+    v = 0.5 + (2.0 * v - 2.0 * threshold) * np.power(1.0 + a * np.abs(v - threshold) ** b, c)
+    return np.power(np.maximum(v @ AGX_OUTSET_MAT.T, 0.0), 2.2)
+
+
+def gran_turismo_tonemap(color):
+    P, a, m, l, c, b = 1.0, 1.0, 0.22, 0.4, 1.33, 0.0
+    l0 = ((P - m) * l) / a
+    S0 = m + l0
+    S1 = m + a * l0
+    C2 = (a * P) / (P - S1)
+    CP = -C2 / P
+    t = np.clip(color / m, 0.0, 1.0)
+    w0 = 1.0 - t * t * (3.0 - 2.0 * t)
+    w2 = (color >= m + l0).astype(np.float64)
+    w1 = 1.0 - w0 - w2
+    T = m * np.power(color / m, c) + b
+    S = P - (P - S1) * np.exp(CP * (color - S0))
+    L = m + a * (color - m)
+    return T * w0 + L * w1 + S * w2
+
+
+def uncharted2_tonemap(color):
+    A, B, C, D, E, F, W = 0.15, 0.50, 0.10, 0.20, 0.02, 0.30, 11.2
+    curr = ((color * (A * color + C * B) + D * E) / (color * (A * color + B) + D * F)) - E / F
+    white_scale = 1.0 / (((W * (A * W + C * B) + D * E) / (W * (A * W + B) + D * F)) - E / F)
+    return curr * white_scale
+
+
+def khronos_pbr_neutral_tonemap(color):
+    start_compression = 0.8 - 0.04
+    desaturation = 0.15
+    color = np.maximum(color, 0.0)
+    x = color.min(axis=-1, keepdims=True)
+    color = color - np.where(x < 0.08, x - 6.25 * x * x, 0.04)
+    peak = color.max(axis=-1, keepdims=True)
+    d = 1.0 - start_compression
+    new_peak = 1.0 - d * d / (peak + d - start_compression)
+    compressed = color * (new_peak / peak)
+    g = 1.0 - 1.0 / (desaturation * (peak - new_peak) + 1.0)
+    compressed = compressed + (new_peak - compressed) * g
+    return np.where(peak < start_compression, color, compressed)
+
+
+def lottes_tonemap(color):
+    hdr_max, d = 8.0, 0.977
+    luma = (color @ np.array([0.2126, 0.7152, 0.0722]))[..., None]
+    mapped = np.power((luma * (1.0 + luma / (hdr_max * hdr_max))) / (1.0 + luma), d)
+    return color * (mapped / np.maximum(luma, 1e-5))
+
+
+def reinhard_extended_tonemap(color, white_point):
+    return color * (1.0 + color / (white_point * white_point)) / (1.0 + color)
+
+
+def hejl_burgess_tonemap(color):
+    color = np.maximum(0.0, color - 0.004)
+    display = (color * (6.2 * color + 0.5)) / (color * (6.2 * color + 1.7) + 0.06)
+    return np.power(display, 2.2)
+
+
+def default_grade(color):
+    """Neutral grade: the Rec.709 -> AP1 -> Rec.709 round trip (whose 7-digit
+    matrices are not exact inverses), with the ACEScct round trip clamping
+    AP1 to [0, half max] so saturated Rec.709 colors lose negative AP1."""
+    ap1 = np.clip(color @ Rec709_to_AP1.T, 0.0, HALF_MAX)
+    return ap1 @ AP1_to_Rec709.T
+
+
+# =====================================================
+# Grading (ApplyGradingLog / ApplyGradingLinear in color-grade.wgsl)
+# =====================================================
+
+ACESCCT_MIDGRAY = 0.4135884
+ACESCC_MIN = -0.3584474886
+ACESCC_RANGE = 1.8264439258
+AP1_LUMA = np.array([0.2722287, 0.6740818, 0.0536895])
+
+
+def smoothstep(e0, e1, x):
+    t = np.clip((x - e0) / (e1 - e0), 0.0, 1.0)
+    return t * t * (3.0 - 2.0 * t)
+
+
+def zone_weights(luma):
+    """(N,) normalized luma -> (N, 3) shadow / midtone / highlight weights."""
+    shadow = 1.0 - smoothstep(0.0, 0.5, luma)
+    highlight = smoothstep(0.35, 0.65, luma)
+    return np.stack([shadow, 1.0 - shadow - highlight, highlight], axis=-1)
+
+
+def soft_clip(v, h_knee, h_str, s_knee, s_str):
+    if h_str >= 0.001:
+        h_excess = np.maximum(v - h_knee, 0.0)
+        v = np.where(v >= h_knee, h_knee + h_excess / (1.0 + h_excess * h_str), v)
+    if s_str >= 0.001:
+        s_deficit = np.maximum(s_knee - v, 0.0)
+        v = np.where(v <= s_knee, s_knee - s_deficit / (1.0 + s_deficit * s_str), v)
+    return v
+
+
+def wheels(color, weights, s):
+    """Add the shadow / midtone / highlight color wheels (x0.1)."""
+    for zone, key in enumerate(("shadowColor", "midtoneColor", "highlightColor")):
+        color = color + np.multiply.outer(weights[:, zone], s[key]) * 0.1
+    return color
+
+
+def vibrance(lin, amount):
+    luma = lin @ AP1_LUMA
+    sat = np.clip((lin.max(axis=-1) - luma) / np.maximum(luma, 0.001), 0.0, 1.0)
+    return luma, 1.0 + amount * (1.0 - sat)
+
+
+def mix(a, b, t):
+    return a + (b - a) * t
+
+
+def grade_log(ap1, s):
+    """ACEScct grading of linear AP1 (N, 3); `s` holds every grade setting."""
+    cc = acescct_encode(ap1) + s["exposure"] / 17.52
+    cc = cc + np.array([s["temperature"] * 0.03, s["tint"] * 0.02, -s["temperature"] * 0.03])
+    cc = (cc - ACESCCT_MIDGRAY) * s["contrast"] + ACESCCT_MIDGRAY
+    cc = (cc + np.array(s["lift"]) * 0.1) * s["gain"]
+    norm = np.clip((cc - ACESCC_MIN) / ACESCC_RANGE, 0.0, 1.0)
+    norm = np.power(np.maximum(norm, 0.0001), 1.0 / np.maximum(s["gamma"], 0.01))
+    cc = norm * ACESCC_RANGE + ACESCC_MIN
+
+    w = zone_weights(np.clip((cc.mean(axis=-1) - ACESCC_MIN) / ACESCC_RANGE, 0.0, 1.0))
+    cc = wheels(cc, w, s)
+    cc = cc + ((s["shadows"] * w[:, 0] + s["highlights"] * w[:, 2]) * 0.15)[:, None]
+    cc = cc + np.array(s["offset"]) * 0.1
+
+    luma_cc = acescct_encode(acescct_decode(cc) @ AP1_LUMA)[:, None]
+    cc = mix(luma_cc, cc, s["saturation"])
+    if abs(s["vibrance"]) > 0.001:
+        luma, t = vibrance(acescct_decode(cc), s["vibrance"])
+        cc = mix(acescct_encode(luma)[:, None], cc, t[:, None])
+
+    cc = soft_clip(cc, s["highlightKnee"], s["highlightSoftClip"],
+                   s["shadowKnee"], s["shadowSoftClip"])
+    return acescct_decode(cc)
+
+
+def grade_linear(ap1, s):
+    """ACEScg grading of linear AP1 (N, 3); `s` holds every grade setting."""
+    lin = ap1 * 2.0 ** s["exposure"]
+    lin = lin * np.array([1.0 + s["temperature"] * 0.1, 1.0 + s["tint"] * 0.05,
+                          1.0 - s["temperature"] * 0.1])
+    lin = lin * s["gain"] + np.array(s["offset"]) * 0.1
+    lin = np.power(np.maximum(lin, 0.0), 1.0 / np.maximum(s["gamma"], 0.01))
+    lin = 0.18 * np.power(np.maximum(lin / 0.18, 0.0001), s["contrast"])
+
+    luma = (lin @ AP1_LUMA)[:, None]
+    w = zone_weights(np.clip(luma[:, 0] / 2.0, 0.0, 1.0))
+    lin = wheels(lin, w, s)
+    lin = lin * (1.0 + s["shadows"] * w[:, :1] * 0.5)
+    lin = lin * (1.0 + s["highlights"] * w[:, 2:] * 0.5)
+    lin = lin + np.array(s["lift"]) * 0.1
+
+    lin = mix(luma, lin, s["saturation"])
+    if abs(s["vibrance"]) > 0.001:
+        luma_v, t = vibrance(lin, s["vibrance"])
+        lin = mix(luma_v[:, None], lin, t[:, None])
+
+    return soft_clip(lin, s["highlightKnee"] * 2.0, s["highlightSoftClip"],
+                     s["shadowKnee"] * 0.1, s["shadowSoftClip"])
+
+
+def graded(grade, settings):
+    """Expected fn of a stage 5 scenario: Rec.709 -> AP1, grade, AP1 -> Rec.709."""
+    return lambda rgb: grade(rgb @ Rec709_to_AP1.T, settings) @ AP1_to_Rec709.T
+
+
+LOG_GRADE = {
+    "gradingSpace": 0, "exposure": 0.5, "contrast": 1.2, "saturation": 1.15,
+    "temperature": 0.1, "tint": -0.1, "highlights": -0.4, "shadows": 0.3, "vibrance": 0.25,
+    "lift": [0.02, 0.0, -0.01], "gamma": [1.05, 1.0, 0.95], "gain": [1.02, 1.0, 0.98],
+    "offset": [0.01, -0.005, 0.0], "shadowColor": [0.05, 0.0, -0.05],
+    "midtoneColor": [0.0, 0.03, 0.01], "highlightColor": [-0.03, 0.0, 0.05],
+    "highlightSoftClip": 0.5, "shadowSoftClip": 1.0, "highlightKnee": 0.6, "shadowKnee": 0.25,
+}
+
+LINEAR_GRADE = dict(LOG_GRADE, **{
+    "gradingSpace": 1, "exposure": -0.5, "contrast": 1.1, "vibrance": -0.2,
+    "highlightSoftClip": 0.4, "shadowSoftClip": 1.0, "highlightKnee": 0.75, "shadowKnee": 0.5,
+})
+
+
 # =====================================================
 # Display remap
 # =====================================================
@@ -101,101 +399,290 @@ def fmt(arr):
 
 
 # =====================================================
-# Compute expected results
+# Scenarios: name -> (settings, description, tolerance, batched expected fn)
 # =====================================================
 
-# Stage 4: ACEScg -> Linear Rec.709
-stage4 = {}
-for name, pt in test_points.items():
-    stage4[name] = fmt(AP1_to_Rec709 @ pt)
+SCENARIOS = {
+    "stage4_inputConvert_ACEScg": (
+        {"inputSpace": 2},
+        "ACEScg (AP1) -> Linear Rec.709 via AP1_to_Rec709 matrix",
+        0.0001,
+        lambda rgb: rgb @ AP1_to_Rec709.T,
+    ),
+    "stage4_inputConvert_ACEScc": (
+        {"inputSpace": 3},
+        "ACEScc -> linear AP1 (clamped to half max) -> Linear Rec.709",
+        0.0001,
+        lambda rgb: acescc_decode(rgb) @ AP1_to_Rec709.T,
+    ),
+    "stage4_inputConvert_ACEScct": (
+        {"inputSpace": 4},
+        "ACEScct (linear toe below 0.1553) -> linear AP1 -> Linear Rec.709",
+        0.0001,
+        lambda rgb: acescct_decode(rgb) @ AP1_to_Rec709.T,
+    ),
+    "stage4_inputConvert_PQ": (
+        {"inputSpace": 6},
+        "PQ Rec.2020 (ST 2084, 1.0 = 10000 nits) -> Linear Rec.709 in nits; signals in [0, 1]",
+        0.01,
+        encoded_range(lambda rgb: (pq_decode(rgb) * PQ_MAX_NITS) @ Rec2020_to_Rec709.T),
+    ),
+    "stage4_inputConvert_HLG": (
+        {"inputSpace": 7},
+        "HLG Rec.2020 (BT.2100 OETF^-1, x12) -> Linear Rec.709; signals in [0, 1]",
+        0.0001,
+        encoded_range(lambda rgb: (hlg_decode(rgb) * 12.0) @ Rec2020_to_Rec709.T),
+    ),
+    "stage4_inputConvert_scRGB": (
+        {"inputSpace": 8},
+        "scRGB (1.0 = 80 nits) -> Linear Rec.709 in nits",
+        0.0001,
+        lambda rgb: rgb * 80.0,
+    ),
+    "stage5_colorGrade_defaults": (
+        {"gradingSpace": 0, "exposure": 0.0, "contrast": 1.0, "saturation": 1.0},
+        "Default grading = near passthrough (Rec.709 -> AP1 -> Rec.709 round trip, AP1 clamped)",
+        0.001,
+        default_grade,
+    ),
+    "stage5_colorGrade_log": (
+        LOG_GRADE,
+        "ACEScct grading: exposure, white balance, contrast, lift/gamma/gain, wheels, "
+        "highlights/shadows, offset, saturation, vibrance, soft clip",
+        0.001,
+        graded(grade_log, LOG_GRADE),
+    ),
+    "stage5_colorGrade_linear": (
+        LINEAR_GRADE,
+        "ACEScg grading: exposure, white balance, gain/offset, gamma, contrast, wheels, "
+        "highlights/shadows, lift, saturation, vibrance, soft clip (knees x2 / x0.1)",
+        0.001,
+        graded(grade_linear, LINEAR_GRADE),
+    ),
+    "stage6_rrt_acesFit": (
+        {"tonemapOp": 1, "tonemapExposure": 0.0, "whitePoint": 4.0},
+        "ACES Fit tonemap (Stephen Hill), BT.709 path",
+        0.01,
+        aces_fit_tonemap_bt709,
+    ),
+    "stage6_rrt_reinhard": (
+        {"tonemapOp": 9, "tonemapExposure": 0.0},
+        "Reinhard tonemap: color / (color + 1)",
+        0.001,
+        reinhard_tonemap,
+    ),
+    "stage6_rrt_agx": (
+        {"tonemapOp": 4, "tonemapExposure": 0.0},
+        "AgX: inset, log2 over 16.5 stops, analytical sigmoid, outset, pow 2.2",
+        0.001,
+        agx_tonemap,
+    ),
+    "stage6_rrt_granTurismo": (
+        {"tonemapOp": 5, "tonemapExposure": 0.0},
+        "Gran Turismo (Uchimura): toe / linear / shoulder blend, per channel",
+        0.001,
+        gran_turismo_tonemap,
+    ),
+    "stage6_rrt_uncharted2": (
+        {"tonemapOp": 6, "tonemapExposure": 0.0},
+        "Uncharted 2 (Hable) filmic curve, white point 11.2",
+        0.001,
+        uncharted2_tonemap,
+    ),
+    "stage6_rrt_khronosPbrNeutral": (
+        {"tonemapOp": 7, "tonemapExposure": 0.0},
+        "Khronos PBR Neutral: toe offset, peak compression above 0.76, desaturation",
+        0.001,
+        khronos_pbr_neutral_tonemap,
+    ),
+    "stage6_rrt_lottes": (
+        {"tonemapOp": 8, "tonemapExposure": 0.0},
+        "Lottes: Reinhard-style curve on Rec.709 luma (hdrMax 8), pow 0.977",
+        0.001,
+        lottes_tonemap,
+    ),
+    "stage6_rrt_reinhardExtended": (
+        {"tonemapOp": 10, "tonemapExposure": 0.0, "whitePoint": 4.0},
+        "Reinhard Extended: color * (1 + color / white^2) / (1 + color), white 4",
+        0.001,
+        lambda rgb: reinhard_extended_tonemap(rgb, 4.0),
+    ),
+    "stage6_rrt_hejlBurgess": (
+        {"tonemapOp": 11, "tonemapExposure": 0.0},
+        "Hejl-Burgess-Dawson, decoded with pow 2.2",
+        0.001,
+        hejl_burgess_tonemap,
+    ),
+    "stage8_outputEncode_srgb": (
+        {"outputSpace": 5, "tonemapOp": 0},
+        "Linear Rec.709 -> sRGB (IEC 61966-2-1)",
+        0.001,
+        lambda rgb: linear_to_srgb(np.clip(rgb, 0.0, 1.0)),
+    ),
+    "stage8_outputEncode_ACEScc": (
+        {"outputSpace": 3, "tonemapOp": 0},
+        "Linear Rec.709 -> AP1 -> ACEScc",
+        0.0001,
+        lambda rgb: acescc_encode(rgb @ Rec709_to_AP1.T),
+    ),
+    "stage8_outputEncode_ACEScct": (
+        {"outputSpace": 4, "tonemapOp": 0},
+        "Linear Rec.709 -> AP1 -> ACEScct",
+        0.0001,
+        lambda rgb: acescct_encode(rgb @ Rec709_to_AP1.T),
+    ),
+    "stage8_outputEncode_PQ": (
+        {"outputSpace": 6, "tonemapOp": 0, "paperWhite": 200.0},
+        "Linear Rec.709 -> Rec.2020 x paperWhite / 10000 nits -> PQ",
+        0.0001,
+        lambda rgb: pq_encode((rgb @ Rec709_to_Rec2020.T) * (200.0 / PQ_MAX_NITS)),
+    ),
+    "stage8_outputEncode_HLG": (
+        {"outputSpace": 7, "tonemapOp": 0, "paperWhite": 100.0, "peakBrightness": 1000.0},
+        "Linear Rec.709 -> Rec.2020 x paperWhite / peak, clamped to [0, 1] -> HLG",
+        0.0001,
+        lambda rgb: hlg_encode(np.clip((rgb @ Rec709_to_Rec2020.T) * 0.1, 0.0, 1.0)),
+    ),
+    "stage8_outputEncode_scRGB": (
+        {"outputSpace": 8, "tonemapOp": 0, "paperWhite": 200.0},
+        "Linear Rec.709 x paperWhite / 80 nits (scRGB, unclamped)",
+        0.0001,
+        lambda rgb: rgb * (200.0 / 80.0),
+    ),
+    "stage9_displayRemap": (
+        {"blackLevel": 0.05, "whiteLevel": 0.95},
+        "Linear remap: black + color * (white - black)",
+        0.0001,
+        lambda rgb: display_remap(rgb, 0.05, 0.95),
+    ),
+    "stage9_displayRemap_default": (
+        {"blackLevel": 0.0, "whiteLevel": 1.0},
+        "Default remap = identity passthrough",
+        0.0001,
+        lambda rgb: display_remap(rgb, 0.0, 1.0),
+    ),
+}
 
-# Stage 5: Default grading = passthrough
-stage5 = {}
-for name, pt in test_points.items():
-    stage5[name] = fmt(pt)
 
-# Stage 6: ACES Fit (op=1, BT.709 path)
-stage6_aces = {}
-for name, pt in test_points.items():
-    stage6_aces[name] = fmt(aces_fit_tonemap_bt709(pt))
+# =====================================================
+# Dense sweeps
+# =====================================================
 
-# Stage 6: Reinhard (op=9)
-stage6_reinhard = {}
-for name, pt in test_points.items():
-    stage6_reinhard[name] = fmt(reinhard_tonemap(pt))
+def grey_ramp(n=4096, lo_stops=-20.0, hi_stops=14.0):
+    """Log-spaced neutral ramp from 2^lo to 2^hi, plus exact zero."""
+    v = np.concatenate([[0.0], np.exp2(np.linspace(lo_stops, hi_stops, n))])
+    return np.repeat(v[:, None], 3, axis=1)
+
+
+def hue_sweeps(hues=72, saturations=33, levels=(0.01, 0.18, 1.0, 8.0, 100.0)):
+    """Every hue x saturation x level, hue on the HSV wheel (max channel = level)."""
+    h, sat, level = np.meshgrid(np.arange(hues) / hues, np.linspace(0.0, 1.0, saturations),
+                                np.asarray(levels), indexing="ij")
+    wheel = np.clip(np.abs(((h[..., None] * 6.0 + np.array([0.0, 4.0, 2.0])) % 6.0) - 3.0) - 1.0,
+                    0.0, 1.0)
+    rgb = level[..., None] * (1.0 - sat[..., None] + sat[..., None] * wheel)
+    return rgb.reshape(-1, 3)
+
+
+# Linear values where a transfer function switches segment or saturates
+BREAKPOINTS = {
+    "srgb_cut": SRGB_LINEAR_CUT,
+    "acescct_cut": ACEScct_CUT_LINEAR,
+    "unit_clip": 1.0,
+    "pq_saturation_200nit": PQ_MAX_NITS / 200.0,
+    "pq_saturation_100nit": PQ_MAX_NITS / 100.0,
+}
+
+
+def breakpoint_ramps(n=1025, width=0.02):
+    """Dense neutral ramps across +-width (relative) of every BREAKPOINTS value."""
+    t = np.linspace(1.0 - width, 1.0 + width, n)
+    v = np.concatenate([cut * t for cut in BREAKPOINTS.values()])
+    return np.repeat(v[:, None], 3, axis=1)
+
+
+def random_hdr(n, seed=0, lo_stops=-12.0, hi_stops=12.0):
+    """Log-uniform random HDR pixels with independent channels."""
+    rng = np.random.default_rng(seed)
+    return np.exp2(rng.uniform(lo_stops, hi_stops, size=(n, 3)))
 
-# Stage 8: Linear Rec.709 -> sRGB (outputSpace=5, standard path)
-stage8 = {}
-for name, pt in test_points.items():
-    clamped = np.clip(pt, 0.0, 1.0)
-    stage8[name] = fmt(linear_to_srgb(clamped))
 
-# Stage 9: Display remap (black=0.05, white=0.95)
-stage9 = {}
-for name, pt in test_points.items():
-    stage9[name] = fmt(display_remap(pt, 0.05, 0.95))
+def sweep_points(random_points=DEFAULT_SWEEP_POINTS, seed=0):
+    """(groups, (N, 3) float32 points) for every sweep; groups is [(name, count)]."""
+    parts = [
+        ("grey_ramp", grey_ramp()),
+        ("hue_sweep", hue_sweeps()),
+        ("breakpoints", breakpoint_ramps()),
+        ("random_hdr", random_hdr(random_points, seed)),
+    ]
+    groups = [(name, len(rgb)) for name, rgb in parts]
+    return groups, np.concatenate([rgb for _, rgb in parts]).astype(np.float32)
 
-# Stage 9: Default remap = identity
-stage9_default = {}
-for name, pt in test_points.items():
-    stage9_default[name] = fmt(display_remap(pt, 0.0, 1.0))
+
+def compute_sweeps(random_points=DEFAULT_SWEEP_POINTS, seed=0, source_sha1=None):
+    """ReferenceFixture of every scenario over the sweep, one batched call per stage."""
+    groups, points = sweep_points(random_points, seed)
+    rgb = points.astype(np.float64)
+    with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+        scenarios = [
+            Scenario(name, settings, description, tolerance, fn(rgb).astype(np.float32))
+            for name, (settings, description, tolerance, fn) in SCENARIOS.items()
+        ]
+    return ReferenceFixture(None, points, scenarios, source_sha1, groups)
 
 
 # =====================================================
 # Build JSON
 # =====================================================
 
-data = {
-    "testPoints": {
-        "midgray":    {"R": 0.18, "G": 0.18, "B": 0.18, "A": 1.0},
-        "white":      {"R": 1.0, "G": 1.0, "B": 1.0, "A": 1.0},
-        "bright_hdr": {"R": 5.0, "G": 3.0, "B": 1.0, "A": 1.0},
-        "near_black": {"R": 0.01, "G": 0.005, "B": 0.008, "A": 1.0},
-    },
-    "stageExpected": {
-        "stage4_inputConvert_ACEScg": {
-            "settings": {"inputSpace": 2},
-            "description": "ACEScg (AP1) -> Linear Rec.709 via AP1_to_Rec709 matrix",
-            "tolerance": 0.0001,
-            "results": stage4,
-        },
-        "stage5_colorGrade_defaults": {
-            "settings": {"gradingSpace": 0, "exposure": 0.0, "contrast": 1.0, "saturation": 1.0},
-            "description": "Default grading settings = passthrough",
-            "tolerance": 0.001,
-            "results": stage5,
-        },
-        "stage6_rrt_acesFit": {
-            "settings": {"tonemapOp": 1, "tonemapExposure": 0.0, "whitePoint": 4.0},
-            "description": "ACES Fit tonemap (Stephen Hill), BT.709 path",
-            "tolerance": 0.01,
-            "results": stage6_aces,
-        },
-        "stage6_rrt_reinhard": {
-            "settings": {"tonemapOp": 9, "tonemapExposure": 0.0},
-            "description": "Reinhard tonemap: color / (color + 1)",
-            "tolerance": 0.001,
-            "results": stage6_reinhard,
-        },
-        "stage8_outputEncode_srgb": {
-            "settings": {"outputSpace": 5, "tonemapOp": 0},
-            "description": "Linear Rec.709 -> sRGB (IEC 61966-2-1)",
-            "tolerance": 0.001,
-            "results": stage8,
-        },
-        "stage9_displayRemap": {
-            "settings": {"blackLevel": 0.05, "whiteLevel": 0.95},
-            "description": "Linear remap: black + color * (white - black)",
-            "tolerance": 0.0001,
-            "results": stage9,
-        },
-        "stage9_displayRemap_default": {
-            "settings": {"blackLevel": 0.0, "whiteLevel": 1.0},
-            "description": "Default remap = identity passthrough",
-            "tolerance": 0.0001,
-            "results": stage9_default,
+def build_reference():
+    names = list(test_points)
+    rgb = np.stack([test_points[n] for n in names])
+    stage_expected = {}
+    for name, (settings, description, tolerance, fn) in SCENARIOS.items():
+        with np.errstate(over="ignore", divide="ignore", invalid="ignore"):
+            expected = fn(rgb)
+        stage_expected[name] = {
+            "settings": settings,
+            "description": description,
+            "tolerance": tolerance,
+            # Points outside a scenario's input range (NaN) are left out
+            "results": {n: fmt(expected[i]) for i, n in enumerate(names)
+                        if not np.isnan(expected[i]).any()},
+        }
+    return {
+        "testPoints": {
+            "midgray":    {"R": 0.18, "G": 0.18, "B": 0.18, "A": 1.0},
+            "white":      {"R": 1.0, "G": 1.0, "B": 1.0, "A": 1.0},
+            "bright_hdr": {"R": 5.0, "G": 3.0, "B": 1.0, "A": 1.0},
+            "near_black": {"R": 0.01, "G": 0.005, "B": 0.008, "A": 1.0},
         },
+        "stageExpected": stage_expected,
     }
-}
 
-print(json.dumps(data, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description="VL.OCIO Pipeline Checker — reference values")
+    parser.add_argument("--sweep-points", type=int, default=DEFAULT_SWEEP_POINTS,
+                        help="Random HDR samples in the sweep fixture (0 = no sweep fixture)")
+    parser.add_argument("--seed", type=int, default=0, help="Random HDR sample seed")
+    args = parser.parse_args()
+
+    text = json.dumps(build_reference(), indent=2) + "\n"
+    sys.stdout.write(text)
+    data = json.loads(text)
+    source_sha1 = json_sha1(data)
+
+    # Compiled copy, tagged with the canonical sha1 of the JSON so verify.py can
+    # tell when it is stale (whatever line endings or encoding the file ends up in)
+    save_reference_fixture(REFERENCE_FIXTURE, reference_from_json(data, source_sha1))
+    print(f"Wrote {REFERENCE_FIXTURE}", file=sys.stderr)
+
+    if args.sweep_points > 0:
+        sweeps = compute_sweeps(args.sweep_points, args.seed, source_sha1)
+        save_reference_fixture(SWEEP_FIXTURE, sweeps)
+        print(f"Wrote {SWEEP_FIXTURE} ({len(sweeps.points)} points)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
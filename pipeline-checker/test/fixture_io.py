@@ -0,0 +1,171 @@
+"""Compiled reference fixtures for verify.py.
+
+fixtures/reference-values.json stays the human-readable source; the
+compiled fixture is an uncompressed .npz written alongside it by
+compute_reference.py, holding the test points and every scenario's
+expected values as arrays plus a small JSON header.
+
+Because the archive is stored uncompressed, each member is a plain .npy
+blob at a fixed offset in the file, so load_fixture() memory-maps the
+arrays instead of reading them (np.load() on the same file still works).
+The header records the sha1 of the JSON it was compiled from (in canonical
+form, see json_sha1()), so a stale fixture is detected and ignored.
+"""
+import hashlib
+import json
+import os
+import struct
+import zipfile
+from collections import namedtuple
+
+import numpy as np
+
+FIXTURE_VERSION = 1
+META_MEMBER = "meta"
+
+# ZIP local file header: signature, ..., name length, extra length
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_LOCAL_HEADER_MAGIC = 0x04034B50
+
+# One verification scenario; expected is (points, 3) with NaN rows for points
+# the scenario does not check
+Scenario = namedtuple("Scenario", ["name", "settings", "description", "tolerance", "expected"])
+
+# point_names[i] labels points[i]; dense sweeps leave it None and label points
+# by groups, a list of (name, count) runs. source_sha1 is the sha1 of the JSON
+# source.
+ReferenceFixture = namedtuple("ReferenceFixture", ["point_names", "points", "scenarios",
+                                                   "source_sha1", "groups"],
+                              defaults=(None,))
+
+
+def point_label(fixture, index):
+    """Name of fixture point `index` ('midgray', 'hue_sweep[12]', ...)."""
+    if fixture.point_names is not None:
+        return fixture.point_names[index]
+    for name, count in fixture.groups:
+        if index < count:
+            return f"{name}[{index}]"
+        index -= count
+    raise IndexError(index)
+
+
+def load_json(path):
+    """Parse a JSON file in UTF-8 (with or without BOM), UTF-16 or UTF-32."""
+    with open(path, "rb") as f:
+        return json.loads(f.read())
+
+
+def json_sha1(data):
+    """sha1 of parsed JSON in canonical form (sorted keys, no whitespace).
+
+    Line endings, indentation and file encoding do not change it, so a CRLF
+    checkout or a UTF-16 redirect of the same values hashes the same.
+    """
+    blob = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+# =====================================================
+# Generic container
+# =====================================================
+
+def save_fixture(path, arrays, meta):
+    """Write arrays plus a JSON-able meta dict as an uncompressed .npz (atomically)."""
+    blob = np.frombuffer(json.dumps(meta, sort_keys=True).encode("utf-8"), dtype=np.uint8)
+    tmp = f"{path}.tmp.npz"
+    np.savez(tmp, **{META_MEMBER: blob}, **{k: np.ascontiguousarray(v) for k, v in arrays.items()})
+    os.replace(tmp, path)
+
+
+def _member_offset(f, info):
+    """File offset of a stored (uncompressed) zip member's data."""
+    f.seek(info.header_offset)
+    fields = _LOCAL_HEADER.unpack(f.read(_LOCAL_HEADER.size))
+    if fields[0] != _LOCAL_HEADER_MAGIC:
+        raise ValueError(f"bad zip local header for {info.filename}")
+    return info.header_offset + _LOCAL_HEADER.size + fields[9] + fields[10]
+
+
+def load_fixture(path, mmap=True):
+    """Return (arrays, meta) from a save_fixture() file.
+
+    With mmap=True the arrays are read-only np.memmap views into the file.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as z, open(path, "rb") as f:
+        for info in z.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if not mmap or info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(z.open(info))
+                continue
+            f.seek(_member_offset(f, info))
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            order = "F" if fortran else "C"
+            if int(np.prod(shape)) == 0:
+                arrays[name] = np.empty(shape, dtype=dtype, order=order)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(),
+                                         shape=shape, order=order)
+    meta = json.loads(bytes(arrays.pop(META_MEMBER)).decode("utf-8"))
+    if meta.get("version") != FIXTURE_VERSION:
+        raise ValueError(f"{path}: unsupported fixture version {meta.get('version')}")
+    return arrays, meta
+
+
+# =====================================================
+# reference-values.json <-> ReferenceFixture
+# =====================================================
+
+def _rgb(values):
+    return [values["R"], values["G"], values["B"]]
+
+
+def reference_from_json(data, source_sha1=None):
+    """ReferenceFixture from the parsed reference-values.json."""
+    point_names = list(data["testPoints"])
+    index = {name: i for i, name in enumerate(point_names)}
+    points = np.array([_rgb(data["testPoints"][n]) for n in point_names], dtype=np.float64)
+    points = points.reshape(-1, 3)
+    scenarios = []
+    for name, scenario in data["stageExpected"].items():
+        expected = np.full(points.shape, np.nan)
+        for point, rgb in scenario["results"].items():
+            expected[index[point]] = _rgb(rgb)
+        scenarios.append(Scenario(name, scenario["settings"], scenario["description"],
+                                  scenario["tolerance"], expected))
+    return ReferenceFixture(point_names, points, scenarios, source_sha1)
+
+
+def save_reference_fixture(path, fixture):
+    """Write a ReferenceFixture with save_fixture()."""
+    arrays = {"points": fixture.points}
+    if fixture.scenarios:
+        arrays["expected"] = np.stack([s.expected for s in fixture.scenarios])
+    meta = {
+        "version": FIXTURE_VERSION,
+        "sourceSha1": fixture.source_sha1,
+        "pointNames": fixture.point_names,
+        "pointGroups": fixture.groups,
+        "scenarios": [{"name": s.name, "settings": s.settings, "description": s.description,
+                       "tolerance": s.tolerance} for s in fixture.scenarios],
+    }
+    save_fixture(path, arrays, meta)
+
+
+def load_reference_fixture(path, mmap=True):
+    """ReferenceFixture from a save_reference_fixture() file."""
+    arrays, meta = load_fixture(path, mmap)
+    scenarios = [
+        Scenario(s["name"], s["settings"], s["description"], s["tolerance"], arrays["expected"][i])
+        for i, s in enumerate(meta["scenarios"])
+    ]
+    groups = meta.get("pointGroups")
+    if groups is not None:
+        groups = [tuple(g) for g in groups]
+    return ReferenceFixture(meta["pointNames"], arrays["points"], scenarios, meta["sourceSha1"],
+                            groups)
@@ -0,0 +1,493 @@
+"""Color grading for the pipeline reference math (stage 5).
+
+NumPy port of ApplyGradingLog / ApplyGradingLinear in shaders/HDRGrade.sdsl
+and the vignette of ColorGradeStage_TextureFX.sdsl, driven by the full
+ColorCorrectionGpuParams struct.
+
+Stage 4 has already converted the input to Linear Rec.709, so DecodeInput
+reduces to Rec709_to_AP1 here. Grading functions take and return (..., 3)
+Linear AP1 and keep the input float dtype. The shader's `if (vibrance)` and
+step()-masked soft clip become scalar checks and element masks.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from matrices import AP1_to_Rec709, Rec709_to_AP1, apply_matrix
+from transfer import acescct_to_linear, linear_to_acescct
+
+# =====================================================
+# Constants (ColorSpaceConversion.sdsl)
+# =====================================================
+
+ACESCCT_MIDGRAY = 0.4135884
+ACESCC_MIN = -0.3584474886
+ACESCC_RANGE = 1.8264439258
+AP1_LUMA = np.array([0.2722287, 0.6740818, 0.0536895])
+LINEAR_MIDGRAY = 0.18
+
+GRADING_LOG = 0
+GRADING_LINEAR = 1
+
+# =====================================================
+# ColorCorrectionGpuParams
+# =====================================================
+
+GradeParams = namedtuple("GradeParams", [
+    "grading_space", "exposure", "contrast", "saturation", "temperature", "tint",
+    "highlights", "shadows", "vibrance", "lift", "gamma", "gain", "offset",
+    "shadow_color", "midtone_color", "highlight_color",
+    "highlight_soft_clip", "shadow_soft_clip", "highlight_knee", "shadow_knee",
+    "vignette_strength", "vignette_radius", "vignette_softness",
+])
+
+# Pipeline settings key -> (GradeParams field, neutral value). Defaults match
+# PipelineUniforms.ts; the vignette (SDSL only) matches ColorCorrectionSettings.cs.
+GRADE_SETTINGS = {
+    "gradingSpace": ("grading_space", GRADING_LOG),
+    "exposure": ("exposure", 0.0),
+    "contrast": ("contrast", 1.0),
+    "saturation": ("saturation", 1.0),
+    "temperature": ("temperature", 0.0),
+    "tint": ("tint", 0.0),
+    "highlights": ("highlights", 0.0),
+    "shadows": ("shadows", 0.0),
+    "vibrance": ("vibrance", 0.0),
+    "lift": ("lift", (0.0, 0.0, 0.0)),
+    "gamma": ("gamma", (1.0, 1.0, 1.0)),
+    "gain": ("gain", (1.0, 1.0, 1.0)),
+    "offset": ("offset", (0.0, 0.0, 0.0)),
+    "shadowColor": ("shadow_color", (0.0, 0.0, 0.0)),
+    "midtoneColor": ("midtone_color", (0.0, 0.0, 0.0)),
+    "highlightColor": ("highlight_color", (0.0, 0.0, 0.0)),
+    "highlightSoftClip": ("highlight_soft_clip", 0.0),
+    "shadowSoftClip": ("shadow_soft_clip", 0.0),
+    "highlightKnee": ("highlight_knee", 0.5),
+    "shadowKnee": ("shadow_knee", 0.5),
+    "vignetteStrength": ("vignette_strength", 0.0),
+    "vignetteRadius": ("vignette_radius", 0.7),
+    "vignetteSoftness": ("vignette_softness", 0.3),
+}
+
+
+def grade_params(settings):
+    """GradeParams from pipeline settings; missing keys are neutral."""
+    values = {}
+    for key, (field, default) in GRADE_SETTINGS.items():
+        value = settings.get(key, default)
+        values[field] = np.asarray(value, dtype=np.float64) if isinstance(default, tuple) else value
+    return GradeParams(**values)
+
+
+# =====================================================
+# Shared utilities
+# =====================================================
+
+def _smoothstep(e0, e1, x):
+    t = np.clip((x - e0) / (e1 - e0), 0.0, 1.0)
+    return t * t * (3.0 - 2.0 * t)
+
+
+def zone_weights(luma):
+    """GetZoneWeights: (..., 3) shadow / mid / highlight weights for normalized luma."""
+    shadow = 1.0 - _smoothstep(0.0, 0.5, luma)
+    highlight = _smoothstep(0.35, 0.65, luma)
+    return np.stack([shadow, 1.0 - shadow - highlight, highlight], axis=-1)
+
+
+def soft_clip(val, h_knee, h_str, s_knee, s_str):
+    """ApplySoftClip; each side is skipped when its strength is below 0.001."""
+    if h_str >= 0.001:
+        high = val >= h_knee
+        excess = val[high] - h_knee
+        val[high] = h_knee + excess / (1.0 + excess * h_str)
+    if s_str >= 0.001:
+        low = val <= s_knee
+        deficit = s_knee - val[low]
+        val[low] = s_knee - deficit / (1.0 + deficit * s_str)
+    return val
+
+
+def _vec(v, dtype):
+    return np.asarray(v, dtype=dtype)
+
+
+def _luma(rgb):
+    return np.matmul(rgb, AP1_LUMA.astype(rgb.dtype, copy=False))
+
+
+def _wheels(weights, p, dtype, tonal_scale=0.0):
+    """Zone-weighted color wheel offsets, plus additive shadows/highlights, as one matmul."""
+    zones = np.stack([p.shadow_color, p.midtone_color, p.highlight_color]) * 0.1
+    zones[0] += p.shadows * tonal_scale
+    zones[2] += p.highlights * tonal_scale
+    return np.matmul(weights, zones.astype(dtype))
+
+
+def _vibrance(lin, vibrance):
+    """(luma, 1 + vibAmt) for the vibrance lerp of linear AP1 values."""
+    luma = _luma(lin)
+    sat_est = np.clip((lin.max(axis=-1) - luma) / np.maximum(luma, 0.001), 0.0, 1.0)
+    return luma, 1.0 + vibrance * (1.0 - sat_est)
+
+
+def _lerp_from_luma(luma, color, t):
+    """lerp(luma.xxx, color, t) with per-pixel luma and scalar or per-pixel t."""
+    luma = luma[..., None]
+    t = np.asarray(t, dtype=color.dtype)
+    if t.ndim:
+        t = t[..., None]
+    color -= luma
+    color *= t
+    color += luma
+    return color
+
+
+# =====================================================
+# Log grading (ACEScct, colorist workflow)
+# =====================================================
+
+def apply_grading_log(linear_ap1, p):
+    """ApplyGradingLog: Linear AP1 -> Linear AP1 graded in ACEScct."""
+    dtype = linear_ap1.dtype
+    cc = linear_to_acescct(linear_ap1)
+
+    # Exposure (stops) and white balance are one additive offset in log
+    cc += _vec([p.exposure / 17.52 + p.temperature * 0.03,
+                p.exposure / 17.52 + p.tint * 0.02,
+                p.exposure / 17.52 - p.temperature * 0.03], dtype)
+
+    # Contrast around mid-gray, then lift and gain
+    cc -= ACESCCT_MIDGRAY
+    cc *= p.contrast
+    cc += ACESCCT_MIDGRAY
+    cc += _vec(p.lift * 0.1, dtype)
+    cc *= _vec(p.gain, dtype)
+
+    # Gamma on the normalized ACEScc range
+    cc -= ACESCC_MIN
+    cc /= ACESCC_RANGE
+    np.clip(cc, 0.0001, 1.0, out=cc)
+    np.power(cc, _vec(1.0 / np.maximum(p.gamma, 0.01), dtype), out=cc)
+    cc *= ACESCC_RANGE
+    cc += ACESCC_MIN
+
+    # Color wheels, highlights/shadows and offset
+    norm_luma = np.clip((cc.mean(axis=-1) - ACESCC_MIN) / ACESCC_RANGE, 0.0, 1.0)
+    cc += _wheels(zone_weights(norm_luma), p, dtype, 0.15)
+    cc += _vec(p.offset * 0.1, dtype)
+
+    # Saturation around the log-encoded linear luma
+    luma_cc = linear_to_acescct(_luma(acescct_to_linear(cc)))
+    cc = _lerp_from_luma(luma_cc, cc, p.saturation)
+
+    if abs(p.vibrance) > 0.001:
+        luma, t = _vibrance(acescct_to_linear(cc), p.vibrance)
+        cc = _lerp_from_luma(linear_to_acescct(luma), cc, t)
+
+    cc = soft_clip(cc, p.highlight_knee, p.highlight_soft_clip, p.shadow_knee, p.shadow_soft_clip)
+    return acescct_to_linear(cc, out=cc)
+
+
+# =====================================================
+# Linear grading (ACEScg, VFX workflow)
+# =====================================================
+
+def linear_grade_affine(p):
+    """3x3 scale and offset of the Linear path's exposure, white balance, gain and offset."""
+    wb = np.array([1.0 + p.temperature * 0.1, 1.0 + p.tint * 0.05, 1.0 - p.temperature * 0.1])
+    return np.diag(2.0 ** p.exposure * wb * p.gain), p.offset * 0.1
+
+
+def apply_grading_linear_curves(lin, p):
+    """ApplyGradingLinear after the affine head (gamma onwards); works in place."""
+    dtype = lin.dtype
+    np.maximum(lin, 0.0, out=lin)
+    np.power(lin, _vec(1.0 / np.maximum(p.gamma, 0.01), dtype), out=lin)
+
+    # Contrast: power curve around 18% gray
+    lin /= LINEAR_MIDGRAY
+    np.maximum(lin, 0.0001, out=lin)
+    np.power(lin, p.contrast, out=lin)
+    lin *= LINEAR_MIDGRAY
+
+    # Color wheels on linear luminance (normalized for HDR)
+    luma = _luma(lin)
+    weights = zone_weights(np.clip(luma / 2.0, 0.0, 1.0))
+    lin += _wheels(weights, p, dtype)
+    if p.shadows != 0.0:
+        lin *= (1.0 + p.shadows * 0.5 * weights[..., :1])
+    if p.highlights != 0.0:
+        lin *= (1.0 + p.highlights * 0.5 * weights[..., 2:])
+    lin += _vec(p.lift * 0.1, dtype)
+
+    # Saturation uses the luma from before the wheels, as in the shader
+    lin = _lerp_from_luma(luma, lin, p.saturation)
+
+    if abs(p.vibrance) > 0.001:
+        luma, t = _vibrance(lin, p.vibrance)
+        lin = _lerp_from_luma(luma, lin, t)
+
+    return soft_clip(lin, p.highlight_knee * 2.0, p.highlight_soft_clip,
+                     p.shadow_knee * 0.1, p.shadow_soft_clip)
+
+
+def apply_grading_linear(linear_ap1, p):
+    """ApplyGradingLinear: Linear AP1 -> Linear AP1 graded in ACEScg."""
+    m, offset = linear_grade_affine(p)
+    lin = apply_matrix(linear_ap1, m)
+    lin += _vec(offset, lin.dtype)
+    return apply_grading_linear_curves(lin, p)
+
+
+def apply_grading(linear_ap1, p):
+    """Grade in the GradingSpace selected by p."""
+    if p.grading_space == GRADING_LOG:
+        return apply_grading_log(linear_ap1, p)
+    return apply_grading_linear(linear_ap1, p)
+
+
+# =====================================================
+# Grade plans (identity operations dropped up front)
+# =====================================================
+
+# fn(x, ctx) -> x works in place on a Linear AP1 / ACEScct batch; ctx carries
+# values that later ops reuse (luma, zone weights) within one batch.
+GradeOp = namedtuple("GradeOp", ["name", "fn"])
+
+# ops run in order; skipped names the operations left out because their
+# parameters are at identity.
+GradePlan = namedtuple("GradePlan", ["grading_space", "ops", "skipped"])
+
+
+def _is(value, neutral):
+    return bool(np.all(np.asarray(value) == neutral))
+
+
+def _add_op(v):
+    return lambda x, ctx: np.add(x, _vec(v, x.dtype), out=x)
+
+
+def _mul_op(v):
+    return lambda x, ctx: np.multiply(x, _vec(v, x.dtype), out=x)
+
+
+def _saturation_op(saturation):
+    return lambda x, ctx: _lerp_from_luma(ctx["luma"], x, saturation)
+
+
+def _soft_clip_ops(ops, skipped, p, h_knee, s_knee):
+    if p.highlight_soft_clip >= 0.001:
+        ops.append(GradeOp("highlight_soft_clip",
+                           lambda x, ctx: soft_clip(x, h_knee, p.highlight_soft_clip, 0.0, 0.0)))
+    else:
+        skipped.append("highlight_soft_clip")
+    if p.shadow_soft_clip >= 0.001:
+        ops.append(GradeOp("shadow_soft_clip",
+                           lambda x, ctx: soft_clip(x, 0.0, 0.0, s_knee, p.shadow_soft_clip)))
+    else:
+        skipped.append("shadow_soft_clip")
+
+
+def _log_plan(p):
+    ops = [GradeOp("to_acescct", lambda x, ctx: linear_to_acescct(x, out=x))]
+    skipped = []
+
+    def op(name, active, fn):
+        if active:
+            ops.append(GradeOp(name, fn))
+        else:
+            skipped.append(name)
+
+    ev = p.exposure / 17.52
+    wb = [ev + p.temperature * 0.03, ev + p.tint * 0.02, ev - p.temperature * 0.03]
+    op("exposure_wb", not _is(wb, 0.0), _add_op(wb))
+
+    def contrast(x, ctx):
+        x -= ACESCCT_MIDGRAY
+        x *= p.contrast
+        x += ACESCCT_MIDGRAY
+        return x
+    op("contrast", p.contrast != 1.0, contrast)
+    op("lift", not _is(p.lift, 0.0), _add_op(p.lift * 0.1))
+    op("gain", not _is(p.gain, 1.0), _mul_op(p.gain))
+
+    # The gamma normalization clamps to the ACEScc range even at gamma 1
+    inv_gamma = 1.0 / np.maximum(p.gamma, 0.01)
+    if _is(inv_gamma, 1.0):
+        skipped.append("gamma")
+        lo, hi = ACESCC_MIN + 0.0001 * ACESCC_RANGE, ACESCC_MIN + ACESCC_RANGE
+        ops.append(GradeOp("acescc_range_clip", lambda x, ctx: np.clip(x, lo, hi, out=x)))
+    else:
+        def gamma(x, ctx):
+            x -= ACESCC_MIN
+            x /= ACESCC_RANGE
+            np.clip(x, 0.0001, 1.0, out=x)
+            np.power(x, _vec(inv_gamma, x.dtype), out=x)
+            x *= ACESCC_RANGE
+            x += ACESCC_MIN
+            return x
+        ops.append(GradeOp("gamma", gamma))
+
+    def wheels(x, ctx):
+        norm_luma = np.clip((x.mean(axis=-1) - ACESCC_MIN) / ACESCC_RANGE, 0.0, 1.0)
+        x += _wheels(zone_weights(norm_luma), p, x.dtype, 0.15)
+        return x
+    op("color_wheels", not (_is(p.shadow_color, 0.0) and _is(p.midtone_color, 0.0)
+                            and _is(p.highlight_color, 0.0) and p.shadows == 0.0
+                            and p.highlights == 0.0), wheels)
+    op("offset", not _is(p.offset, 0.0), _add_op(p.offset * 0.1))
+
+    if p.saturation != 1.0:
+        def saturation(x, ctx):
+            luma_cc = linear_to_acescct(_luma(acescct_to_linear(x)))
+            return _lerp_from_luma(luma_cc, x, p.saturation)
+        ops.append(GradeOp("saturation", saturation))
+    else:
+        skipped.append("saturation")
+
+    def vibrance(x, ctx):
+        luma, t = _vibrance(acescct_to_linear(x), p.vibrance)
+        return _lerp_from_luma(linear_to_acescct(luma), x, t)
+    op("vibrance", abs(p.vibrance) > 0.001, vibrance)
+
+    _soft_clip_ops(ops, skipped, p, p.highlight_knee, p.shadow_knee)
+    ops.append(GradeOp("from_acescct", lambda x, ctx: acescct_to_linear(x, out=x)))
+    return GradePlan(GRADING_LOG, tuple(ops), tuple(skipped))
+
+
+def _linear_plan(p, affine_head):
+    ops = []
+    skipped = []
+
+    def op(name, active, fn):
+        if active:
+            ops.append(GradeOp(name, fn))
+        else:
+            skipped.append(name)
+
+    if affine_head:
+        m, offset = linear_grade_affine(p)
+        scale = np.diag(m)
+        op("exposure_wb_gain", not _is(scale, 1.0), _mul_op(scale))
+        op("offset", not _is(offset, 0.0), _add_op(offset))
+
+    # Without gamma the contrast floor below also covers the clamp at zero
+    inv_gamma = 1.0 / np.maximum(p.gamma, 0.01)
+
+    def gamma(x, ctx):
+        np.maximum(x, 0.0, out=x)
+        return np.power(x, _vec(inv_gamma, x.dtype), out=x)
+    op("gamma", not _is(inv_gamma, 1.0), gamma)
+
+    if p.contrast != 1.0:
+        def contrast(x, ctx):
+            x /= LINEAR_MIDGRAY
+            np.maximum(x, 0.0001, out=x)
+            np.power(x, p.contrast, out=x)
+            x *= LINEAR_MIDGRAY
+            return x
+        ops.append(GradeOp("contrast", contrast))
+    else:
+        skipped.append("contrast")
+        ops.append(GradeOp("contrast_floor",
+                           lambda x, ctx: np.maximum(x, 0.0001 * LINEAR_MIDGRAY, out=x)))
+
+    has_wheels = not (_is(p.shadow_color, 0.0) and _is(p.midtone_color, 0.0)
+                      and _is(p.highlight_color, 0.0))
+    has_zones = has_wheels or p.shadows != 0.0 or p.highlights != 0.0
+    if has_zones or p.saturation != 1.0:
+        def luma(x, ctx):
+            ctx["luma"] = _luma(x)
+            if has_zones:
+                ctx["weights"] = zone_weights(np.clip(ctx["luma"] / 2.0, 0.0, 1.0))
+            return x
+        ops.append(GradeOp("luma", luma))
+
+    op("color_wheels", has_wheels, lambda x, ctx: np.add(x, _wheels(ctx["weights"], p, x.dtype), out=x))
+
+    def zone_gain(amount, zone):
+        return lambda x, ctx: np.multiply(x, 1.0 + amount * 0.5 * ctx["weights"][..., zone:zone + 1], out=x)
+    op("shadows", p.shadows != 0.0, zone_gain(p.shadows, 0))
+    op("highlights", p.highlights != 0.0, zone_gain(p.highlights, 2))
+    op("lift", not _is(p.lift, 0.0), _add_op(p.lift * 0.1))
+    op("saturation", p.saturation != 1.0, _saturation_op(p.saturation))
+
+    def vibrance(x, ctx):
+        luma, t = _vibrance(x, p.vibrance)
+        return _lerp_from_luma(luma, x, t)
+    op("vibrance", abs(p.vibrance) > 0.001, vibrance)
+
+    _soft_clip_ops(ops, skipped, p, p.highlight_knee * 2.0, p.shadow_knee * 0.1)
+    return GradePlan(GRADING_LINEAR, tuple(ops), tuple(skipped))
+
+
+def build_grade_plan(p, affine_head=True):
+    """GradePlan for p with every identity operation left out.
+
+    With affine_head=False the Linear path's exposure/white balance/gain and
+    offset (linear_grade_affine) are left to the caller, which can fold them
+    into neighbouring matrices.
+    """
+    if p.grading_space == GRADING_LOG:
+        return _log_plan(p)
+    return _linear_plan(p, affine_head)
+
+
+def run_grade_plan(x, plan):
+    """Run a GradePlan in place on a (..., 3) Linear AP1 batch."""
+    ctx = {}
+    for op in plan.ops:
+        x = op.fn(x, ctx)
+    return x
+
+
+def format_grade_plan(plan):
+    """One-line summary of a GradePlan's ops and skipped ops."""
+    space = "Log" if plan.grading_space == GRADING_LOG else "Linear"
+    return (f"{space}: {' > '.join(op.name for op in plan.ops)}"
+            f" (skipped: {', '.join(plan.skipped) or 'none'})")
+
+
+# =====================================================
+# Vignette (screen space, applied in Linear AP1)
+# =====================================================
+
+def vignette_enabled(p):
+    return p.vignette_strength > 0.001
+
+
+def texcoords(start, count, width, height, dtype=np.float64):
+    """(count, 2) pixel-center TexCoords for flat pixel indices start..start+count."""
+    index = np.arange(start, start + count)
+    uv = np.empty((count, 2), dtype=dtype)
+    uv[:, 0] = (index % width + 0.5) / width
+    uv[:, 1] = (index // width + 0.5) / height
+    return uv
+
+
+def vignette_scale(uv, p):
+    """(N,) multiplier lerp(1, smoothstep(radius, radius - softness, |uv - 0.5|), strength)."""
+    dist = np.hypot(uv[:, 0] - 0.5, uv[:, 1] - 0.5)
+    mask = _smoothstep(p.vignette_radius, p.vignette_radius - p.vignette_softness, dist)
+    return 1.0 + (mask - 1.0) * p.vignette_strength
+
+
+# =====================================================
+# Stage 5
+# =====================================================
+
+def color_grade(rgb, p, uv=None, plan=None):
+    """Linear Rec.709 -> grade (+ vignette) -> Linear Rec.709.
+
+    uv is the (N, 2) TexCoord of each pixel and is required when the
+    vignette is enabled. plan is build_grade_plan(p), built here if omitted.
+    """
+    if plan is None:
+        plan = build_grade_plan(p)
+    ap1 = run_grade_plan(apply_matrix(rgb, Rec709_to_AP1), plan)
+    if vignette_enabled(p):
+        if uv is None:
+            raise ValueError("vignette needs pixel coordinates (uv)")
+        ap1 *= vignette_scale(uv, p).astype(ap1.dtype, copy=False)[:, None]
+    return apply_matrix(ap1, AP1_to_Rec709)
@@ -0,0 +1,118 @@
+"""Zero-copy image loaders for the reference pipeline.
+
+Frames are np.memmap'ed and returned as views, so multi-GB plates stream
+through run_pipeline() band by band without being read into RAM first.
+
+Supported inputs:
+- raw float32 / float16 RGBA (or RGB) dumps with a known size
+- DDS files with a DX10 header in an uncompressed float DXGI format
+  (the float subset of what src/pipeline/DDSParser.ts decodes)
+- .npy arrays
+
+Integer, packed (R11G11B10, RGB10A2) and BC formats need decoding and are
+rejected rather than silently copied.
+"""
+import os
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+DDS_MAGIC = 0x20534444  # "DDS "
+DDPF_FOURCC = 0x4
+FOURCC_DX10 = 0x30315844  # "DX10"
+DDS_DATA_OFFSET_DX10 = 4 + 124 + 20
+
+# DXGI formats that map directly onto a NumPy dtype: format -> (dtype, channels, label)
+DXGI_FLOAT_FORMATS = {
+    2: ("<f4", 4, "RGBA32F"),
+    6: ("<f4", 3, "RGB32F"),
+    10: ("<f2", 4, "RGBA16F"),
+    16: ("<f4", 2, "RG32F"),
+    34: ("<f2", 2, "RG16F"),
+    41: ("<f4", 1, "R32F"),
+    54: ("<f2", 1, "R16F"),
+}
+
+# pixels is an HxWxC memmap view; label names the source format
+LoadedImage = namedtuple("LoadedImage", ["pixels", "label"])
+
+
+def load_raw(path, width, height, channels=4, dtype=np.float32, offset=0):
+    """Map a headerless float dump as an HxWxC view (no copy)."""
+    dtype = np.dtype(dtype)
+    expected = offset + width * height * channels * dtype.itemsize
+    if os.path.getsize(path) < expected:
+        raise ValueError(f"{path}: file too small for {width}x{height}x{channels} {dtype}")
+    pixels = np.memmap(path, dtype=dtype, mode="r", offset=offset,
+                       shape=(height, width, channels))
+    return LoadedImage(pixels, f"raw {dtype.name} x{channels}")
+
+
+def read_dds_header(path):
+    """Return (width, height, dxgi_format) for a DX10 DDS file."""
+    with open(path, "rb") as f:
+        head = f.read(DDS_DATA_OFFSET_DX10)
+    if len(head) < 128:
+        raise ValueError(f"{path}: file too small to be a valid DDS file")
+    magic, header_size = struct.unpack_from("<II", head, 0)
+    if magic != DDS_MAGIC:
+        raise ValueError(f"{path}: not a DDS file (invalid magic number)")
+    if header_size != 124:
+        raise ValueError(f"{path}: invalid DDS header size {header_size} (expected 124)")
+    height, width = struct.unpack_from("<II", head, 12)
+    pf_flags, fourcc = struct.unpack_from("<II", head, 80)
+    if not (pf_flags & DDPF_FOURCC and fourcc == FOURCC_DX10):
+        raise ValueError(f"{path}: only DDS files with a DX10 header can be memory-mapped")
+    if len(head) < DDS_DATA_OFFSET_DX10:
+        raise ValueError(f"{path}: DDS file too small for DX10 header")
+    (dxgi_format,) = struct.unpack_from("<I", head, 128)
+    return width, height, dxgi_format
+
+
+def load_dds(path):
+    """Map the top mip of an uncompressed float DX10 DDS as an HxWxC view."""
+    width, height, dxgi_format = read_dds_header(path)
+    if dxgi_format not in DXGI_FLOAT_FORMATS:
+        raise ValueError(f"{path}: DXGI format {dxgi_format} is not a float format "
+                         f"that can be mapped without decoding")
+    dtype, channels, label = DXGI_FLOAT_FORMATS[dxgi_format]
+    image = load_raw(path, width, height, channels, dtype, offset=DDS_DATA_OFFSET_DX10)
+    return LoadedImage(image.pixels, label)
+
+
+def load_npy(path):
+    """Map a .npy array (HxWxC) without reading it."""
+    return LoadedImage(np.load(path, mmap_mode="r"), "npy")
+
+
+LOADERS = {
+    ".dds": load_dds,
+    ".npy": load_npy,
+}
+
+
+def load_image(path):
+    """Map a .dds or .npy frame by extension; use load_raw() for raw dumps."""
+    ext = os.path.splitext(path)[1].lower()
+    loader = LOADERS.get(ext)
+    if loader is None:
+        raise ValueError(f"{path}: unsupported extension '{ext}' "
+                         f"(expected {', '.join(LOADERS)}, or call load_raw)")
+    return loader(path)
+
+
+def rgb_view(pixels):
+    """HxWx3 view of an HxWxC image (drops alpha, expands R/RG to RGB).
+
+    Images with three or more channels stay zero-copy; one- and two-channel
+    formats are expanded the way DDSParser.ts does (R -> RRR, RG -> RG0).
+    """
+    channels = pixels.shape[2]
+    if channels >= 3:
+        return pixels[..., :3]
+    if channels == 1:
+        return np.broadcast_to(pixels, pixels.shape[:2] + (3,))
+    rgb = np.zeros(pixels.shape[:2] + (3,), dtype=pixels.dtype)
+    rgb[..., :2] = pixels
+    return rgb
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Pipeline Checker — one plate through many SettingsBank looks.
+
+Renders a frame through every key of a SettingsBank in a single pass over
+the image. Each band is read and input-converted (stage 4) once per distinct
+inputSpace, and that decoded band is then shared by every look's stages
+5-9 while it is still in cache. Looks that compile to the same plan are
+rendered once and copied.
+
+The result is a (looks, H, W, 3) stack (optionally a .npy memmap, so 200
+looks of a 4K plate never sit in RAM at once) and/or a contact sheet
+of subsampled thumbnails.
+
+Usage:
+    python test/looks.py settings-bank.json plate.dds -o looks.npy
+    python test/looks.py settings-bank.json plate.npy --contact-sheet sheet.npy --step 8 --columns 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from bank import PlanCache, bank_settings, load_bank, settings_digest
+from image_io import load_image, rgb_view
+from pipeline import (
+    DEFAULT_BAND_ROWS,
+    PixelSpan,
+    ScratchBuffers,
+    build_plan,
+    run_plan,
+    working_dtype,
+)
+
+# Stage 4 is shared per inputSpace; the rest is evaluated per look
+INPUT_STAGES = (4,)
+LOOK_STAGES = (5, 6, 7, 8, 9)
+
+
+def render_looks(image, looks, out=None, band_rows=DEFAULT_BAND_ROWS, cache=None):
+    """Render an HxWx3 image through a list of flat pipeline settings.
+
+    Returns a (len(looks), H, W, 3) array; `out` may be a preallocated
+    (C-contiguous) stack, e.g. an np.lib.format.open_memmap().
+    """
+    image = np.asarray(image)
+    if image.ndim != 3 or image.shape[2] != 3:
+        raise ValueError(f"expected an HxWx3 image, got shape {image.shape}")
+    dtype = working_dtype(image.dtype)
+    height, width, _ = image.shape
+    if out is None:
+        out = np.empty((len(looks), height, width, 3), dtype=dtype)
+    if cache is None:
+        cache = PlanCache(stages=LOOK_STAGES)
+
+    heads = {}
+    tails = []
+    first_by_digest = {}
+    for i, settings in enumerate(looks):
+        space = settings["inputSpace"]
+        if space not in heads:
+            heads[space] = build_plan(settings, stages=INPUT_STAGES)
+        digest = settings_digest(settings)
+        same = first_by_digest.setdefault(digest, i)
+        tails.append((space, cache.get(settings, digest), same if same != i else None))
+
+    band_rows = max(1, min(band_rows, height))
+    band_pixels = band_rows * width
+    scratch = ScratchBuffers(band_pixels, dtype)
+    decoded = {space: np.empty((band_pixels, 3), dtype=dtype) for space in heads}
+
+    for r0 in range(0, height, band_rows):
+        r1 = min(r0 + band_rows, height)
+        band_in = image[r0:r1].reshape(-1, 3).astype(dtype, copy=False)
+        n = band_in.shape[0]
+        span = PixelSpan(r0 * width, width, height)
+        for space, plan in heads.items():
+            run_plan(band_in, plan, scratch, out=decoded[space][:n], span=span)
+        for i, (space, plan, same) in enumerate(tails):
+            band_out = out[i, r0:r1].reshape(-1, 3)
+            if same is not None:
+                np.copyto(band_out, out[same, r0:r1].reshape(-1, 3))
+            else:
+                run_plan(decoded[space][:n], plan, scratch, out=band_out, span=span)
+    return out
+
+
+def contact_sheet(stack, columns=None, step=1, gap=2, background=0.0):
+    """Tile a (K, H, W, 3) stack into one image, subsampling each look by `step`."""
+    count = stack.shape[0]
+    if columns is None:
+        columns = int(np.ceil(np.sqrt(count)))
+    rows = -(-count // columns)
+    thumbs = stack[:, ::step, ::step]
+    th, tw = thumbs.shape[1:3]
+    sheet = np.full((rows * th + (rows - 1) * gap, columns * tw + (columns - 1) * gap, 3),
+                    background, dtype=stack.dtype)
+    for i in range(count):
+        y = (i // columns) * (th + gap)
+        x = (i % columns) * (tw + gap)
+        sheet[y:y + th, x:x + tw] = thumbs[i]
+    return sheet
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VL.OCIO Pipeline Checker — render bank looks")
+    parser.add_argument("bank", help="SettingsBank JSON file")
+    parser.add_argument("input", help="Float image (.npy or uncompressed float .dds)")
+    parser.add_argument("-o", "--output", help="Write the (looks, H, W, 3) stack to this .npy")
+    parser.add_argument("--contact-sheet", help="Write a contact sheet to this .npy")
+    parser.add_argument("--columns", type=int, help="Contact sheet columns (default: square)")
+    parser.add_argument("--step", type=int, default=4, help="Contact sheet subsampling step")
+    parser.add_argument("--snapshots", action="store_true", help="Also render named snapshots")
+    parser.add_argument("--band-rows", type=int, default=DEFAULT_BAND_ROWS,
+                        help="Rows per processing band")
+    args = parser.parse_args()
+    if not args.output and not args.contact_sheet:
+        parser.error("nothing to write: give --output and/or --contact-sheet")
+
+    keys, looks = [], []
+    for key, _, settings in bank_settings(load_bank(args.bank), args.snapshots):
+        keys.append(key)
+        looks.append(settings)
+
+    image = rgb_view(load_image(args.input).pixels)
+    height, width, _ = image.shape
+    shape = (len(looks), height, width, 3)
+    dtype = working_dtype(image.dtype)
+    if args.output:
+        out = np.lib.format.open_memmap(args.output, mode="w+", dtype=dtype, shape=shape)
+    else:
+        out = np.empty(shape, dtype=dtype)
+
+    t0 = time.perf_counter()
+    render_looks(image, looks, out=out, band_rows=args.band_rows)
+    seconds = time.perf_counter() - t0
+    print(f"{len(looks)} looks of {width}x{height} in {seconds:.2f} s "
+          f"({seconds / max(len(looks), 1) * 1000:.1f} ms/look)")
+    for i, key in enumerate(keys):
+        print(f"  [{i}] {key}")
+
+    if args.output:
+        out.flush()
+        print(f"Wrote {args.output}")
+    if args.contact_sheet:
+        np.save(args.contact_sheet, contact_sheet(out, args.columns, args.step))
+        print(f"Wrote {args.contact_sheet}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""Pipeline Checker — baked 3D LUTs from the reference pipeline.
+
+Samples stages 4-8 (InputConvert through OutputEncode) of the Python
+reference on an NxNxN lattice and writes .cube / .spi3d files. The lattice
+lives in a 1D shaper space so HDR scene-linear input fits: lattice
+coordinate u in [0, 1] maps to shaper value lo + u * (hi - lo), which is
+decoded to the pipeline input value. The whole lattice is one (N^3, 3)
+batch through the fused plan, so a 65^3 bake takes a fraction of a second.
+
+The 3D LUT expects shaper-encoded input. For OCIO, the shaper is written
+as an .spi1d (normalized code value -> linear) to be used with
+direction: inverse in front of the .spi3d.
+
+apply_lut() evaluates a baked LUT on (N, 3) input with trilinear or
+tetrahedral interpolation, and --report measures each LUT size and
+interpolation against the analytic stage 6 / stage 8 math for every
+matching fixture scenario, using that scenario's tolerance.
+
+Usage:
+    python test/lut.py --settings look.json -o look.cube
+    python test/lut.py --settings look.json --size 65 --shaper acescct -o look.spi3d
+    python test/lut.py --report
+    python test/lut.py --report --samples 1000000 --json report.json
+"""
+import argparse
+import json
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from pipeline import ScratchBuffers, build_plan, resolve_settings, run_plan
+from transfer import acescct_to_linear, linear_to_acescct
+from verify import load_reference_values, stage6_rrt, stage8_output_encode
+
+# Stages baked into the LUT (display remap stays outside)
+LUT_STAGES = (4, 5, 6, 7, 8)
+
+LUT_SIZES = (17, 33, 65)
+DEFAULT_SIZE = 33
+
+# to_shaper / from_shaper map input values <-> shaper values in [lo, hi]
+Shaper = namedtuple("Shaper", ["name", "to_shaper", "from_shaper", "lo", "hi"])
+
+# Largest linear value the ACEScct shaper covers (half-float max)
+ACESCCT_SHAPER_MAX = 65504.0
+
+
+def _identity(x, out=None):
+    x = np.asarray(x)
+    if out is None:
+        return x.copy()
+    np.copyto(out, x)
+    return out
+
+
+SHAPERS = {
+    "none": Shaper("none", _identity, _identity, 0.0, 1.0),
+    "acescct": Shaper(
+        "acescct", linear_to_acescct, acescct_to_linear,
+        float(linear_to_acescct(np.array(0.0))),
+        float(linear_to_acescct(np.array(ACESCCT_SHAPER_MAX))),
+    ),
+}
+
+# table is (N, N, N, 3) indexed [r, g, b] in normalized shaper coordinates
+LUT3D = namedtuple("LUT3D", ["table", "shaper", "title"])
+
+
+def shaper_encode(x, shaper):
+    """Input values -> normalized lattice coordinates in [0, 1]."""
+    s = shaper.to_shaper(x)
+    s -= shaper.lo
+    s /= shaper.hi - shaper.lo
+    return np.clip(s, 0.0, 1.0, out=s)
+
+
+def shaper_decode(u, shaper):
+    """Normalized lattice coordinates -> input values."""
+    s = np.asarray(u) * (shaper.hi - shaper.lo) + shaper.lo
+    return shaper.from_shaper(s, out=s)
+
+
+def lattice(size, dtype=np.float64):
+    """(size^3, 3) lattice coordinates in [0, 1], indexed [r, g, b] (b fastest)."""
+    axis = np.linspace(0.0, 1.0, size, dtype=dtype)
+    r, g, b = np.meshgrid(axis, axis, axis, indexing="ij")
+    return np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1)
+
+
+def bake_lut(settings=None, size=DEFAULT_SIZE, shaper="acescct", dtype=np.float32, title=None,
+             stages=LUT_STAGES):
+    """Bake `stages` (default 4-8) for `settings` into an NxNxN LUT3D."""
+    if isinstance(shaper, str):
+        shaper = SHAPERS[shaper]
+    coords = lattice(size, dtype=np.float64)
+    rgb = shaper_decode(coords, shaper).astype(dtype, copy=False)
+    plan = build_plan(settings, stages=stages)
+    table = run_plan(rgb, plan, ScratchBuffers(rgb.shape[0], rgb.dtype)).copy()
+    return LUT3D(table.reshape(size, size, size, 3), shaper, title or "VL.OCIO reference")
+
+
+# =====================================================
+# Applicators
+# =====================================================
+
+def _cell(rgb, lut):
+    """Lower lattice corner (flat index parts) and fractional offsets."""
+    size = lut.table.shape[0]
+    p = shaper_encode(rgb, lut.shaper) * (size - 1)
+    i0 = np.minimum(np.floor(p).astype(np.intp), size - 2)
+    return i0, p - i0
+
+
+def apply_trilinear(rgb, lut):
+    """Trilinear interpolation of `lut` at (N, 3) input values."""
+    size = lut.table.shape[0]
+    flat = lut.table.reshape(-1, 3)
+    i0, f = _cell(rgb, lut)
+    base = (i0[:, 0] * size + i0[:, 1]) * size + i0[:, 2]
+    out = np.zeros(rgb.shape, dtype=lut.table.dtype)
+    for dr in (0, 1):
+        wr = f[:, 0] if dr else 1.0 - f[:, 0]
+        for dg in (0, 1):
+            wg = f[:, 1] if dg else 1.0 - f[:, 1]
+            for db in (0, 1):
+                wb = f[:, 2] if db else 1.0 - f[:, 2]
+                corner = flat[base + (dr * size + dg) * size + db]
+                out += corner * (wr * wg * wb)[:, None]
+    return out
+
+
+def apply_tetrahedral(rgb, lut):
+    """Tetrahedral interpolation of `lut` at (N, 3) input values.
+
+    The cube cell is split along its main diagonal into six tetrahedra;
+    sorting the fractional offsets picks the tetrahedron per sample, so
+    there is no per-sample branching.
+    """
+    size = lut.table.shape[0]
+    flat = lut.table.reshape(-1, 3)
+    i0, f = _cell(rgb, lut)
+    strides = np.array([size * size, size, 1], dtype=np.intp)
+    base = i0 @ strides
+
+    order = np.argsort(-f, axis=1, kind="stable")
+    fs = np.take_along_axis(f, order, axis=1)
+    step = strides[order]
+    v1 = base + step[:, 0]
+    v2 = v1 + step[:, 1]
+    v3 = base + strides.sum()
+
+    out = flat[base] * (1.0 - fs[:, 0])[:, None]
+    out += flat[v1] * (fs[:, 0] - fs[:, 1])[:, None]
+    out += flat[v2] * (fs[:, 1] - fs[:, 2])[:, None]
+    out += flat[v3] * fs[:, 2][:, None]
+    return out
+
+
+INTERPOLATORS = {
+    "trilinear": apply_trilinear,
+    "tetrahedral": apply_tetrahedral,
+}
+
+
+def apply_lut(rgb, lut, method="tetrahedral"):
+    """Evaluate `lut` at (N, 3) input values with the given interpolation."""
+    return INTERPOLATORS[method](np.asarray(rgb), lut)
+
+
+# =====================================================
+# Accuracy report
+# =====================================================
+
+# Stage scenarios the report covers: prefix -> (stage number, analytic fn)
+REPORT_STAGES = {
+    "stage6": (6, stage6_rrt),
+    "stage8": (8, stage8_output_encode),
+}
+
+
+def report_samples(count, seed=0, test_points=None):
+    """Fixture test points plus `count` log-distributed HDR samples (-10..+6 stops)."""
+    rng = np.random.default_rng(seed)
+    samples = np.exp2(rng.uniform(-10.0, 6.0, size=(count, 3)))
+    if test_points:
+        points = np.array([[p["R"], p["G"], p["B"]] for p in test_points.values()])
+        samples = np.concatenate([points, samples])
+    return samples
+
+
+def accuracy_report(sizes=LUT_SIZES, methods=tuple(INTERPOLATORS), samples=100000,
+                    shaper="acescct", seed=0):
+    """Measure LUT error and throughput against the analytic stage math.
+
+    Returns one row per (scenario, size, method) with max/mean error,
+    the scenario's fixture tolerance and samples per second.
+    """
+    data = load_reference_values()
+    rgb = report_samples(samples, seed, data["testPoints"])
+    rows = []
+    for scenario_name, scenario in data["stageExpected"].items():
+        prefix = scenario_name.split("_")[0]
+        if prefix not in REPORT_STAGES:
+            continue
+        stage, analytic = REPORT_STAGES[prefix]
+        settings = resolve_settings(scenario["settings"])
+        expected = analytic(rgb, settings)
+        for size in sizes:
+            lut = bake_lut(settings, size=size, shaper=shaper, dtype=np.float64,
+                           stages=(stage,))
+            for method in methods:
+                start = time.perf_counter()
+                got = apply_lut(rgb, lut, method)
+                elapsed = time.perf_counter() - start
+                delta = np.abs(got - expected).max(axis=1)
+                rows.append({
+                    "scenario": scenario_name,
+                    "size": size,
+                    "method": method,
+                    "maxError": float(delta.max()),
+                    "meanError": float(delta.mean()),
+                    "tolerance": scenario["tolerance"],
+                    "pass": bool(delta.max() <= scenario["tolerance"]),
+                    "samplesPerSec": rgb.shape[0] / elapsed,
+                })
+    return rows
+
+
+def print_report(rows):
+    print(f"{'scenario':28s} {'size':>4s} {'method':12s} {'max':>9s} {'mean':>9s} "
+          f"{'tol':>7s} {'Msamples/s':>10s}  result")
+    for r in rows:
+        print(f"{r['scenario']:28s} {r['size']:4d} {r['method']:12s} {r['maxError']:9.2e} "
+              f"{r['meanError']:9.2e} {r['tolerance']:7g} {r['samplesPerSec'] / 1e6:10.2f}  "
+              f"{'PASS' if r['pass'] else 'FAIL'}")
+
+
+# =====================================================
+# Writers
+# =====================================================
+
+def _format_rows(rows, prefix=None):
+    text = [" ".join(f"{v:.7f}" for v in row) for row in rows]
+    if prefix is not None:
+        text = [f"{p} {t}" for p, t in zip(prefix, text)]
+    return "\n".join(text) + "\n"
+
+
+def write_cube(path, lut):
+    """Write an Iridas/Resolve .cube (red fastest) in shaper coordinates."""
+    size = lut.table.shape[0]
+    with open(path, "w") as f:
+        f.write(f'TITLE "{lut.title}"\n')
+        f.write(f"# Input shaper: {lut.shaper.name} [{lut.shaper.lo:.7f}, {lut.shaper.hi:.7f}]\n")
+        f.write(f"LUT_3D_SIZE {size}\n")
+        f.write("DOMAIN_MIN 0.0 0.0 0.0\n")
+        f.write("DOMAIN_MAX 1.0 1.0 1.0\n")
+        f.write(_format_rows(lut.table.transpose(2, 1, 0, 3).reshape(-1, 3)))
+
+
+def write_spi3d(path, lut):
+    """Write a Sony Pictures Imageworks .spi3d with explicit lattice indices."""
+    size = lut.table.shape[0]
+    idx = np.stack(np.meshgrid(*[np.arange(size)] * 3, indexing="ij"), axis=-1).reshape(-1, 3)
+    with open(path, "w") as f:
+        f.write("SPILUT 1.0\n3 3\n")
+        f.write(f"{size} {size} {size}\n")
+        f.write(_format_rows(lut.table.reshape(-1, 3), [f"{i} {j} {k}" for i, j, k in idx]))
+
+
+def write_spi1d(path, shaper, length=4096):
+    """Write the shaper as an .spi1d mapping normalized code value -> input value."""
+    values = shaper_decode(np.linspace(0.0, 1.0, length), shaper)
+    with open(path, "w") as f:
+        f.write("Version 1\nFrom 0.0 1.0\n")
+        f.write(f"Length {length}\nComponents 1\n{{\n")
+        f.write("\n".join(f"    {v:.9g}" for v in values))
+        f.write("\n}\n")
+
+
+LUT_WRITERS = {
+    ".cube": write_cube,
+    ".spi3d": write_spi3d,
+}
+
+
+def write_lut(path, lut):
+    """Write `lut` in the format given by the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    writer = LUT_WRITERS.get(ext)
+    if writer is None:
+        raise ValueError(f"unsupported LUT format '{ext}' (expected {', '.join(LUT_WRITERS)})")
+    writer(path, lut)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VL.OCIO Pipeline Checker — bake 3D LUT")
+    parser.add_argument("-o", "--output", help="Output .cube or .spi3d")
+    parser.add_argument("--settings", help="JSON file with pipeline settings")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE,
+                        help=f"Lattice size per axis (typ. {', '.join(map(str, LUT_SIZES))})")
+    parser.add_argument("--shaper", choices=sorted(SHAPERS), default="acescct",
+                        help="1D input shaper for the lattice")
+    parser.add_argument("--shaper-out", help="Also write the shaper as .spi1d")
+    parser.add_argument("--report", action="store_true",
+                        help="Measure LUT accuracy vs. analytic stage 6/8 math")
+    parser.add_argument("--samples", type=int, default=100000, help="Random samples for --report")
+    parser.add_argument("--json", help="Write the --report rows to a JSON file")
+    args = parser.parse_args()
+
+    if args.report:
+        rows = accuracy_report(samples=args.samples, shaper=args.shaper)
+        print_report(rows)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(rows, f, indent=2)
+        return
+    if args.output is None:
+        parser.error("-o/--output is required unless --report is given")
+
+    settings = None
+    if args.settings:
+        with open(args.settings, "r") as f:
+            settings = json.load(f)
+
+    start = time.perf_counter()
+    lut = bake_lut(settings, size=args.size, shaper=args.shaper,
+                   title=os.path.splitext(os.path.basename(args.output))[0])
+    baked = time.perf_counter() - start
+    write_lut(args.output, lut)
+    if args.shaper_out:
+        write_spi1d(args.shaper_out, lut.shaper)
+    print(f"Baked {args.size}^3 LUT ({args.shaper} shaper) in {baked * 1000:.1f} ms -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Gamut matrices for the pipeline reference math.
+
+Row-major / numpy convention: the WGSL sources store these column-major,
+so each one here is the transpose of its WGSL literal (and matches the
+float3x3 literal in shaders/ColorSpaceConversion.sdsl as written).
+"""
+import numpy as np
+
+# =====================================================
+# Display / working gamuts
+# =====================================================
+
+AP1_to_Rec709 = np.array([
+    [ 1.7048586, -0.6217160, -0.0831426],
+    [-0.1300768,  1.1407357, -0.0106589],
+    [-0.0239640, -0.1289755,  1.1529395]
+])
+
+Rec709_to_AP1 = np.array([
+    [0.6131324, 0.3395381, 0.0473296],
+    [0.0701934, 0.9163539, 0.0134527],
+    [0.0206155, 0.1095697, 0.8698148]
+])
+
+Rec2020_to_Rec709 = np.array([
+    [ 1.6604910, -0.5876411, -0.0728499],
+    [-0.1245505,  1.1328999, -0.0083494],
+    [-0.0181508, -0.1005789,  1.1187297]
+])
+
+Rec709_to_Rec2020 = np.array([
+    [0.6274039, 0.3292830, 0.0433131],
+    [0.0690973, 0.9195404, 0.0113623],
+    [0.0163914, 0.0880133, 0.8955953]
+])
+
+Rec2020_to_AP1 = np.array([
+    [0.9792711, 0.0125307, 0.0082013],
+    [0.0083406, 0.9787678, 0.0128916],
+    [0.0058225, 0.0284863, 0.9656912]
+])
+
+AP1_to_Rec2020 = np.array([
+    [ 1.0211818, -0.0130790, -0.0081028],
+    [-0.0087055,  1.0220618, -0.0133563],
+    [-0.0054779, -0.0292020,  1.0346800]
+])
+
+# =====================================================
+# ACES internals (RRT glow/red modifier, dim surround)
+# =====================================================
+
+ACES_AP0_to_AP1 = np.array([
+    [ 1.4514393161, -0.2365107469, -0.2149285693],
+    [-0.0765537734,  1.1762296998, -0.0996759264],
+    [ 0.0083161484, -0.0060324498,  0.9977163014]
+])
+
+ACES_AP1_to_AP0 = np.array([
+    [ 0.6954522414, 0.1406786965, 0.1638690622],
+    [ 0.0447945634, 0.8596711185, 0.0955343182],
+    [-0.0055258826, 0.0040252103, 1.0015006723]
+])
+
+ACES_AP1_to_XYZ = np.array([
+    [ 0.6624541811, 0.1340042065, 0.1561876870],
+    [ 0.2722287168, 0.6740817658, 0.0536895174],
+    [-0.0055746495, 0.0040607335, 1.0103391003]
+])
+
+ACES_XYZ_to_AP1 = np.array([
+    [ 1.6410233797, -0.3248032942, -0.2364246952],
+    [-0.6636628587,  1.6153315917,  0.0167563477],
+    [ 0.0117218943, -0.0082844420,  0.9883948585]
+])
+
+
+def apply_matrix(rgb, m, out=None):
+    """rgb @ m.T for (3,) or (N, 3) input, keeping the input float dtype."""
+    rgb = np.asarray(rgb)
+    return np.matmul(rgb, m.T.astype(rgb.dtype, copy=False), out=out)
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""Pipeline Checker — multi-core tiled reference renders.
+
+Splits each frame into row bands and fans them across a
+ProcessPoolExecutor. Input and output frames live in
+multiprocessing.shared_memory blocks, or in the caller's memory-mapped
+files, that every worker maps itself; a task is a frame spec plus a (row
+start, row end) pair, so no pixel data is pickled. Each worker builds the
+fused plan once and runs run_pipeline() from pipeline.py on its bands with
+its own scratch buffers.
+
+Usage:
+    python test/parallel.py input.npy output.npy --settings look.json
+    python test/parallel.py a.npy b.npy c.npy --out-dir golden/ --workers 64
+    python test/parallel.py plate.npy --scaling --workers 64
+    python test/parallel.py --check
+"""
+import argparse
+import json
+import mmap
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from image_io import load_image, rgb_view
+from pipeline import DEFAULT_BAND_ROWS, ScratchBuffers, build_plan, run_pipeline, working_dtype
+
+# Bands per worker; more than one so uneven bands still balance
+BANDS_PER_WORKER = 4
+
+# Per-worker state, set by _init_worker
+_worker = {}
+
+
+# =====================================================
+# Frames shared with the workers
+# =====================================================
+# A frame is passed to a worker as a spec: (kind, name, byte offset, shape,
+# strides, dtype), where kind is "shm" (a SharedMemory block) or "file" (a
+# file the worker maps itself). Specs are a few dozen bytes to pickle. A
+# file's name is (path, st_dev, st_ino, st_size, st_mtime_ns), so a file
+# replaced or rewritten at the same path is mapped afresh, never reused.
+
+def _shm_spec(shm, frame):
+    return ("shm", shm.name, 0, frame.shape, frame.strides, frame.dtype.str)
+
+
+def file_spec(a, writable=False):
+    """Spec of an np.memmap (or a view of one), or None if `a` is not file-backed."""
+    root = a
+    while isinstance(root, np.memmap) and not isinstance(root.base, mmap.mmap):
+        root = root.base
+    if not isinstance(root, np.memmap) or root.filename is None:
+        return None
+    if root.mode == "c" or (writable and root.mode == "r"):
+        return None  # copy-on-write pages (or a read-only file) the workers cannot share
+    offset = a.ctypes.data - root.ctypes.data + root.offset
+    path = os.path.abspath(root.filename)
+    st = os.stat(path)
+    name = (path, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    return ("file", name, offset, a.shape, a.strides, a.dtype.str)
+
+
+def _worker_frame(spec, writable):
+    kind, name, offset, shape, strides, dtype = spec
+    buffers = _worker["buffers"]
+    buf = buffers.get((kind, name, writable))
+    if buf is None:
+        if kind == "shm":
+            buf = shared_memory.SharedMemory(name=name)
+        else:
+            buf = np.memmap(name[0], dtype=np.uint8, mode="r+" if writable else "r")
+        buffers[(kind, name, writable)] = buf
+    data = buf.buf if kind == "shm" else buf
+    return np.ndarray(shape, dtype=dtype, buffer=data, offset=offset, strides=strides)
+
+
+def _init_worker(shape, dtype, settings, band_rows):
+    _worker["buffers"] = {}
+    _worker["settings"] = settings
+    _worker["plan"] = build_plan(settings)
+    _worker["band_rows"] = band_rows
+    _worker["scratch"] = ScratchBuffers(band_rows * shape[1], np.dtype(dtype))
+
+
+def _render_rows(src, dst, r0, r1):
+    # Keep the shared blocks mapped; drop files of earlier frames
+    buffers = _worker["buffers"]
+    for key in [k for k in buffers if k[0] == "file" and k[1] not in (src[1], dst[1])]:
+        del buffers[key]
+    image = _worker_frame(src, writable=False)
+    run_pipeline(
+        image[r0:r1],
+        _worker["settings"],
+        out=_worker_frame(dst, writable=True)[r0:r1],
+        band_rows=_worker["band_rows"],
+        scratch=_worker["scratch"],
+        plan=_worker["plan"],
+        row_offset=r0,
+        frame_height=image.shape[0],
+    )
+    return r1 - r0
+
+
+def split_rows(height, parts):
+    """Split `height` rows into at most `parts` contiguous (r0, r1) bands."""
+    parts = max(1, min(parts, height))
+    edges = np.linspace(0, height, parts + 1).round().astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def _same_frame(a, b):
+    return (a.ctypes.data == b.ctypes.data and a.shape == b.shape
+            and a.strides == b.strides and a.dtype == b.dtype)
+
+
+class TiledRenderer:
+    """Process pool plus shared input/output frames for one frame shape.
+
+    Reuse one instance across a sequence; frames of another shape or
+    dtype transparently restart the pool (which invalidates earlier
+    input_view() arrays).
+
+    Full-frame copies are avoided where possible: decode into
+    input_view(), or pass an np.memmap, and the workers read it in place;
+    pass a writable np.memmap (e.g. np.lib.format.open_memmap) as `out`
+    and they write their bands straight into the file.
+    """
+
+    def __init__(self, settings=None, workers=None, band_rows=DEFAULT_BAND_ROWS):
+        self.settings = settings
+        self.workers = workers or os.cpu_count() or 1
+        self.band_rows = band_rows
+        self._key = None
+        self._pool = None
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._shm is not None:
+            for shm in self._shm:
+                shm.close()
+                shm.unlink()
+            self._shm = None
+        self._key = None
+
+    def _start(self, shape, dtype):
+        if self._key == (shape, dtype):
+            return
+        self.close()
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        self._shm = tuple(shared_memory.SharedMemory(create=True, size=nbytes) for _ in range(2))
+        self._image = np.ndarray(shape, dtype=dtype, buffer=self._shm[0].buf)
+        self._out = np.ndarray(shape, dtype=dtype, buffer=self._shm[1].buf)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(shape, dtype.str, self.settings, self.band_rows),
+        )
+        self._key = (shape, dtype)
+
+    def input_view(self, shape, dtype=np.float32):
+        """The shared HxWx3 input frame; fill it, then call render() with no image."""
+        shape = tuple(shape)
+        if len(shape) != 3 or shape[2] != 3:
+            raise ValueError(f"expected an HxWx3 shape, got {shape}")
+        self._start(shape, working_dtype(np.dtype(dtype)))
+        return self._image
+
+    def render(self, image=None, out=None):
+        """Render one HxWx3 frame (default: the input_view()); returns `out` or a new array."""
+        if image is None:
+            if self._key is None:
+                raise ValueError("no image given and no input_view() to render")
+            image = self._image
+        elif not isinstance(image, np.ndarray):
+            image = np.asarray(image)
+        if image.ndim != 3 or image.shape[2] != 3:
+            raise ValueError(f"expected an HxWx3 image, got shape {image.shape}")
+        dtype = working_dtype(image.dtype)
+        self._start(image.shape, dtype)
+
+        src = file_spec(image) if image.dtype == dtype else None
+        if src is None:
+            if not _same_frame(image, self._image):
+                np.copyto(self._image, image, casting="unsafe")
+            src = _shm_spec(self._shm[0], self._image)
+        dst = None
+        if out is not None and out.shape == image.shape and out.dtype == dtype:
+            dst = file_spec(out, writable=True)
+        if dst is None:
+            dst = _shm_spec(self._shm[1], self._out)
+
+        bands = split_rows(image.shape[0], self.workers * BANDS_PER_WORKER)
+        for _ in self._pool.map(_render_rows, *zip(*[(src, dst, r0, r1) for r0, r1 in bands])):
+            pass
+
+        if dst[0] == "file":
+            return out
+        if out is None:
+            return self._out.copy()
+        np.copyto(out, self._out)
+        return out
+
+
+def render_parallel(image, settings=None, workers=None, band_rows=DEFAULT_BAND_ROWS):
+    """One-shot multi-core run_pipeline()."""
+    with TiledRenderer(settings, workers, band_rows) as renderer:
+        return renderer.render(image)
+
+
+def measure_scaling(image, settings=None, worker_counts=None, band_rows=DEFAULT_BAND_ROWS,
+                    repeats=3):
+    """[(workers, best Mpix/s)] rendering `image` from the input_view() into a file memmap."""
+    if worker_counts is None:
+        cpus = os.cpu_count() or 1
+        worker_counts = sorted({1 << i for i in range(cpus.bit_length())} | {cpus})
+    pixels = image.shape[0] * image.shape[1]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        out = np.lib.format.open_memmap(os.path.join(tmp, "out.npy"), mode="w+",
+                                        dtype=working_dtype(image.dtype), shape=image.shape)
+        for workers in worker_counts:
+            with TiledRenderer(settings, workers, band_rows) as renderer:
+                np.copyto(renderer.input_view(image.shape, image.dtype), image, casting="unsafe")
+                renderer.render(out=out)  # warm up the pool
+                best = float("inf")
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    renderer.render(out=out)
+                    best = min(best, time.perf_counter() - start)
+            rows.append((workers, pixels / best / 1e6))
+        del out
+    return rows
+
+
+def check_replaced_files(settings=None, workers=2):
+    """Render from and into files that are replaced at the same path between frames.
+
+    Workers keep file mappings from frame to frame; a replaced input (atomic
+    save) or a deleted and recreated output must still be the file rendered.
+    Returns a list of failure messages (empty when the check passes).
+    """
+    failures = []
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp, TiledRenderer(settings, workers) as renderer:
+        src, dst = os.path.join(tmp, "in.npy"), os.path.join(tmp, "out.npy")
+        for frame_index, scale in enumerate((0.5, 2.0)):
+            image = (rng.random((37, 16, 3)) * scale).astype(np.float32)
+            np.save(src + ".tmp.npy", image)
+            os.replace(src + ".tmp.npy", src)  # atomic save: new inode, same path
+            if os.path.exists(dst):
+                os.remove(dst)
+            out = np.lib.format.open_memmap(dst, mode="w+", dtype=np.float32, shape=image.shape)
+            renderer.render(np.load(src, mmap_mode="r"), out=out)
+            out.flush()
+            del out
+            delta = np.abs(np.load(dst) - run_pipeline(image, settings)).max()
+            if not delta <= 1e-6:
+                failures.append(f"frame {frame_index}: max delta {delta:.3g} vs run_pipeline()")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VL.OCIO Pipeline Checker — parallel reference render")
+    parser.add_argument("inputs", nargs="*", help="Float frames (.npy or float .dds); last is the output "
+                                                 "unless --out-dir or --scaling is given")
+    parser.add_argument("--out-dir", help="Write each frame's result here as <name>.npy")
+    parser.add_argument("--settings", help="JSON file with pipeline settings")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--band-rows", type=int, default=DEFAULT_BAND_ROWS,
+                        help="Rows per processing band inside a worker")
+    parser.add_argument("--scaling", action="store_true",
+                        help="Time the first input at 1, 2, 4, ... workers (up to --workers or the "
+                             "CPU count) and write nothing")
+    parser.add_argument("--check", action="store_true",
+                        help="Check renders from and into files replaced at the same path")
+    args = parser.parse_args()
+    if not args.inputs and not args.check:
+        parser.error("no input frames given")
+
+    settings = None
+    if args.settings:
+        with open(args.settings, "r") as f:
+            settings = json.load(f)
+
+    if args.check:
+        failures = check_replaced_files(settings, args.workers or 2)
+        for message in failures:
+            print(f"  {message}")
+        print(f"replaced-file check: {'FAIL' if failures else 'PASS'}")
+        sys.exit(1 if failures else 0)
+
+    if args.scaling:
+        image = rgb_view(load_image(args.inputs[0]).pixels)
+        counts = None
+        if args.workers:
+            counts = sorted({1 << i for i in range(args.workers.bit_length())} | {args.workers})
+        print(f"{'workers':>7s} {'Mpix/s':>8s}")
+        for workers, rate in measure_scaling(image, settings, counts, args.band_rows):
+            print(f"{workers:7d} {rate:8.1f}")
+        return
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+        jobs = [
+            (p, os.path.join(args.out_dir, os.path.splitext(os.path.basename(p))[0] + ".npy"))
+            for p in args.inputs
+        ]
+    elif len(args.inputs) == 2:
+        jobs = [tuple(args.inputs)]
+    else:
+        parser.error("give 'input output' or use --out-dir for sequences")
+
+    with TiledRenderer(settings, args.workers, args.band_rows) as renderer:
+        for src, dst in jobs:
+            # Workers read the mapped input and write their bands into the .npy
+            image = rgb_view(load_image(src).pixels)
+            out = np.lib.format.open_memmap(dst, mode="w+", dtype=working_dtype(image.dtype),
+                                            shape=image.shape)
+            start = time.perf_counter()
+            renderer.render(image, out=out)
+            elapsed = time.perf_counter() - start
+            out.flush()
+            del out
+            pixels = image.shape[0] * image.shape[1]
+            print(f"{src} -> {dst}  {pixels / elapsed / 1e6:.1f} Mpix/s "
+                  f"({renderer.workers} workers)")
+
+
+if __name__ == "__main__":
+    main()
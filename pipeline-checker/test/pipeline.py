@@ -0,0 +1,612 @@
+#!/usr/bin/env python3
+"""Pipeline Checker — whole-image CPU reference pipeline.
+
+Chains the batched stage functions from verify.py over a full HxWx3 frame:
+4 InputConvert -> 5 ColorGrade -> 6 RRT -> 7 ODT -> 8 OutputEncode -> 9 DisplayRemap.
+The result is a golden image to diff against the WebGPU pipeline
+(src/pipeline/PipelineRenderer.ts).
+
+Before touching pixels the stages are lowered to a plan of steps. Stages
+whose math is affine for the given settings (gamut matrices, exposure,
+display remap, the ACES Fit and AgX inset/outset matrices) contribute 3x4 matrix
+steps, and adjacent matrix steps are folded into one, so a frame costs one
+pass per non-linear segment rather than one per stage. Stages that cannot
+be lowered run as a whole.
+
+The frame is processed in row bands through two band-sized ping-pong scratch
+buffers that are reused by every step and every band, so the only
+frame-sized allocation is the output (pass out=image to run in place).
+
+Usage:
+    python test/pipeline.py input.npy output.npy
+    python test/pipeline.py input.npy output.npy --settings look.json
+    python test/pipeline.py --show-plan --settings look.json
+    python test/pipeline.py input.npy output.npy --settings look.json --cache
+"""
+import argparse
+import json
+from collections import namedtuple
+
+import numpy as np
+
+from aces13 import aces13_odt_rec709_100nits, aces13_odt_rec2020_1000nits, aces13_rrt
+from aces20 import aces20_rrt
+from image_io import load_image, rgb_view
+from matrices import AP1_to_Rec709, AP1_to_Rec2020, Rec709_to_AP1
+from tonemap import (
+    AGX_INSET,
+    AGX_OUTSET,
+    agx_linearize,
+    agx_log_sigmoid,
+    gran_turismo_tonemap,
+    hejl_burgess_tonemap,
+    khronos_pbr_neutral_tonemap,
+    lottes_tonemap,
+    reinhard_extended_tonemap,
+    uncharted2_tonemap,
+)
+from colorspace import CONVERSIONS, LINEAR_REC709
+from stage_cache import DEFAULT_MAX_BYTES, StageCache, array_digest
+from grade import (
+    GRADING_LOG,
+    build_grade_plan,
+    format_grade_plan,
+    grade_params,
+    linear_grade_affine,
+    run_grade_plan,
+    texcoords,
+    vignette_enabled,
+    vignette_scale,
+)
+from verify import (
+    HDR_COLOR_SPACES,
+    REC2020_OUTPUT_SPACES,
+    ACESInputMat,
+    ACESOutputMat,
+    aces_fit_rrt_odt,
+    output_encode_conversion,
+    quantize_half,
+    reinhard_tonemap,
+    stage4_input_convert,
+    stage5_color_grade,
+    stage6_rrt,
+    stage7_odt,
+    stage8_output_encode,
+    stage9_display_remap,
+)
+
+# (stage number, name, batched stage function, enable toggle or None)
+PIPELINE_STAGES = [
+    (4, "InputConvert", stage4_input_convert, None),
+    (5, "ColorGrade", stage5_color_grade, None),
+    (6, "RRT", stage6_rrt, "rrtEnabled"),
+    (7, "ODT", stage7_odt, "odtEnabled"),
+    (8, "OutputEncode", stage8_output_encode, None),
+    (9, "DisplayRemap", stage9_display_remap, None),
+]
+
+# Neutral settings (matches DEFAULT_SETTINGS in PipelineUniforms.ts)
+DEFAULT_SETTINGS = {
+    "inputSpace": 0,
+    "gradingSpace": 0,
+    "exposure": 0.0,
+    "contrast": 1.0,
+    "saturation": 1.0,
+    "temperature": 0.0,
+    "tint": 0.0,
+    "highlights": 0.0,
+    "shadows": 0.0,
+    "vibrance": 0.0,
+    "lift": [0.0, 0.0, 0.0],
+    "gamma": [1.0, 1.0, 1.0],
+    "gain": [1.0, 1.0, 1.0],
+    "offset": [0.0, 0.0, 0.0],
+    "shadowColor": [0.0, 0.0, 0.0],
+    "midtoneColor": [0.0, 0.0, 0.0],
+    "highlightColor": [0.0, 0.0, 0.0],
+    "highlightSoftClip": 0.0,
+    "shadowSoftClip": 0.0,
+    "highlightKnee": 0.5,
+    "shadowKnee": 0.5,
+    # Vignette is SDSL only (ColorGradeStage_TextureFX); off in the WebGPU pipeline
+    "vignetteStrength": 0.0,
+    "vignetteRadius": 0.7,
+    "vignetteSoftness": 0.3,
+    "tonemapOp": 0,
+    "tonemapExposure": 0.0,
+    "whitePoint": 1.0,
+    "paperWhite": 100.0,
+    "peakBrightness": 100.0,
+    "outputSpace": 0,
+    "blackLevel": 0.0,
+    "whiteLevel": 1.0,
+    "rrtEnabled": True,
+    "odtEnabled": True,
+}
+
+DEFAULT_BAND_ROWS = 64
+
+
+def resolve_settings(settings):
+    """Overlay user settings on DEFAULT_SETTINGS."""
+    merged = dict(DEFAULT_SETTINGS)
+    if settings:
+        merged.update(settings)
+    return merged
+
+
+def enabled_stages(settings, stages=None):
+    """Stages that run for these settings; disabled stages pass through.
+
+    `stages` optionally restricts the chain to a subset of stage numbers.
+    """
+    return [
+        (num, name, fn)
+        for num, name, fn, toggle in PIPELINE_STAGES
+        if (toggle is None or settings.get(toggle, True))
+        and (stages is None or num in stages)
+    ]
+
+
+def working_dtype(dtype):
+    """Compute dtype for an input dtype: float32/float64 as-is, anything else float32.
+
+    Half-float (and integer) frames are widened per band so the math never
+    runs in float16.
+    """
+    dtype = np.dtype(dtype)
+    if dtype in (np.float32, np.float64):
+        return dtype
+    return np.dtype(np.float32)
+
+
+class ScratchBuffers:
+    """Two (pixels, 3) ping-pong buffers reused across stages and bands."""
+
+    def __init__(self, pixels, dtype):
+        self.buffers = [np.empty((pixels, 3), dtype=dtype) for _ in range(2)]
+
+    @property
+    def nbytes(self):
+        return sum(b.nbytes for b in self.buffers)
+
+    def fits(self, pixels, dtype):
+        return self.buffers[0].shape[0] >= pixels and self.buffers[0].dtype == dtype
+
+    def views(self, pixels):
+        return [b[:pixels] for b in self.buffers]
+
+
+# =====================================================
+# Execution plan
+# =====================================================
+
+# kind is "affine" (matrix is 3x4: rgb @ M[:, :3].T + M[:, 3]), "fn"
+# (fn(rgb, out) -> out) or "pixel" (fn(rgb, span, out) -> out, for math that
+# depends on where the pixels are in the frame). stages lists the stage
+# numbers folded into the step.
+PlanStep = namedtuple("PlanStep", ["kind", "label", "stages", "matrix", "fn"])
+
+# Where a batch sits in the frame: flat index of its first pixel plus the
+# frame size, so "pixel" steps can rebuild TexCoords for any band or chunk.
+PixelSpan = namedtuple("PixelSpan", ["start", "width", "height"])
+
+
+def affine(m3=None, offset=None):
+    """3x4 affine matrix from a 3x3 linear part and an offset vector."""
+    m = np.zeros((3, 4))
+    m[:, :3] = np.eye(3) if m3 is None else m3
+    if offset is not None:
+        m[:, 3] = offset
+    return m
+
+
+def scale(s):
+    return affine(np.eye(3) * s)
+
+
+def compose(first, then):
+    """Affine matrix for applying `first` and then `then`."""
+    m = np.zeros((3, 4))
+    m[:, :3] = then[:, :3] @ first[:, :3]
+    m[:, 3] = then[:, :3] @ first[:, 3] + then[:, 3]
+    return m
+
+
+def is_identity(m, atol=1e-12):
+    return np.allclose(m, affine(), rtol=0.0, atol=atol)
+
+
+def _affine_step(label, stage, m):
+    return PlanStep("affine", label, (stage,), m, None)
+
+
+def _fn_step(label, stage, fn):
+    return PlanStep("fn", label, (stage,), None, fn)
+
+
+def _pixel_step(label, stage, fn):
+    return PlanStep("pixel", label, (stage,), None, fn)
+
+
+def _span_texcoords(rgb, span):
+    return texcoords(span.start, rgb.shape[0], span.width, span.height, rgb.dtype)
+
+
+def _clip01(rgb, out=None):
+    return np.clip(rgb, 0.0, 1.0, out=out)
+
+
+def _clamp0(rgb, out=None):
+    return np.maximum(rgb, 0.0, out=out)
+
+
+def _inplace_fn(fn):
+    """Adapt an in-place fn(rgb) -> rgb so it never writes to its input."""
+    def run(rgb, out=None):
+        if out is None:
+            out = rgb.copy()
+        else:
+            np.copyto(out, rgb)
+        return fn(out)
+    return run
+
+
+def _store_fn(fn):
+    def run(rgb, out=None):
+        result = fn(rgb)
+        if out is None:
+            return result
+        np.copyto(out, result)
+        return out
+    return run
+
+
+def _conversion_steps(label, stage, conversion):
+    """Steps for a colorspace.Conversion: decode, matrix, clamp, encode."""
+    steps = []
+    if conversion.decode is not None:
+        steps.append(_fn_step(conversion.decode.__name__, stage, conversion.decode))
+    if conversion.matrix is not None:
+        steps.append(_affine_step(label, stage, affine(conversion.matrix)))
+    if conversion.clip:
+        steps.append(_fn_step("clip01", stage, _clip01))
+    if conversion.encode is not None:
+        steps.append(_fn_step(conversion.encode.__name__, stage, conversion.encode))
+    return steps
+
+
+def _lower_stage4(settings):
+    space = settings["inputSpace"]
+    return _conversion_steps(f"{HDR_COLOR_SPACES[space]}_to_Linear_Rec709", 4,
+                             CONVERSIONS[space, LINEAR_REC709])
+
+
+def _lower_stage5(settings):
+    p = grade_params(settings)
+    steps = [_affine_step("Rec709_to_AP1", 5, affine(Rec709_to_AP1))]
+    if p.grading_space != GRADING_LOG:
+        m, offset = linear_grade_affine(p)
+        steps.append(_affine_step("grade_exposure_wb_gain_offset", 5, affine(m, offset)))
+    grade = build_grade_plan(p, affine_head=False)
+    if grade.ops:
+        label = f"grade_{'log' if p.grading_space == GRADING_LOG else 'linear'}"
+        label += "[" + ",".join(op.name for op in grade.ops) + "]"
+        steps.append(_fn_step(label, 5, _inplace_fn(lambda rgb: run_grade_plan(rgb, grade))))
+    if vignette_enabled(p):
+        def vignette(rgb, span, out=None):
+            s = vignette_scale(_span_texcoords(rgb, span), p)
+            return np.multiply(rgb, s[:, None], out=out)
+        steps.append(_pixel_step("vignette", 5, vignette))
+    steps.append(_affine_step("AP1_to_Rec709", 5, affine(AP1_to_Rec709)))
+    return steps
+
+
+# Tonemap operators lowered to a single curve step after tonemapExposure
+PER_PIXEL_TONEMAPS = {
+    5: ("gran_turismo", gran_turismo_tonemap),
+    6: ("uncharted2", uncharted2_tonemap),
+    7: ("khronos_pbr_neutral", khronos_pbr_neutral_tonemap),
+    8: ("lottes", lottes_tonemap),
+    9: ("reinhard", reinhard_tonemap),
+    11: ("hejl_burgess", hejl_burgess_tonemap),
+}
+
+
+def _lower_stage6(settings):
+    op = settings["tonemapOp"]
+    exposure = _affine_step("tonemapExposure", 6, scale(2.0 ** settings.get("tonemapExposure", 0.0)))
+    if op == 0:
+        return [exposure]
+    if op == 1:
+        return [
+            exposure,
+            _affine_step("ACESInputMat", 6, affine(ACESInputMat)),
+            _fn_step("aces_fit_rrt_odt", 6, _store_fn(aces_fit_rrt_odt)),
+            _affine_step("ACESOutputMat", 6, affine(ACESOutputMat)),
+            _fn_step("clip01", 6, _clip01),
+        ]
+    if op == 2:
+        return [
+            exposure,
+            _affine_step("Rec709_to_AP1", 6, affine(Rec709_to_AP1)),
+            _fn_step("aces13_rrt", 6, _store_fn(aces13_rrt)),
+        ]
+    if op == 3:
+        peak = settings.get("peakBrightness", 100.0)
+        return [
+            exposure,
+            _affine_step("Rec709_to_AP1", 6, affine(Rec709_to_AP1)),
+            _fn_step("aces20_rrt", 6, _store_fn(lambda rgb: aces20_rrt(rgb, peak))),
+        ]
+    if op == 4:
+        return [
+            exposure,
+            _affine_step("AGX_INSET", 6, affine(AGX_INSET)),
+            _fn_step("agx_log_sigmoid", 6, _store_fn(agx_log_sigmoid)),
+            _affine_step("AGX_OUTSET", 6, affine(AGX_OUTSET)),
+            _fn_step("agx_linearize", 6, _store_fn(agx_linearize)),
+        ]
+    if op == 10:
+        white_point = settings.get("whitePoint", 1.0)
+        return [exposure, _fn_step("reinhard_extended", 6, _store_fn(
+            lambda rgb: reinhard_extended_tonemap(rgb, white_point)))]
+    if op in PER_PIXEL_TONEMAPS:
+        label, fn = PER_PIXEL_TONEMAPS[op]
+        return [exposure, _fn_step(label, 6, _store_fn(fn))]
+    return None
+
+
+def _lower_stage7(settings):
+    op = settings["tonemapOp"]
+    if op not in (2, 3):
+        return []
+    if op == 2:
+        if settings["outputSpace"] in REC2020_OUTPUT_SPACES:
+            return [_fn_step("aces13_odt_rec2020_1000nits", 7, _store_fn(aces13_odt_rec2020_1000nits))]
+        return [_fn_step("aces13_odt_rec709_100nits", 7, _store_fn(aces13_odt_rec709_100nits))]
+    if settings["outputSpace"] in REC2020_OUTPUT_SPACES:
+        return [
+            _affine_step("AP1_to_Rec2020", 7, affine(AP1_to_Rec2020)),
+            _fn_step("clamp0", 7, _clamp0),
+        ]
+    return [
+        _affine_step("AP1_to_Rec709", 7, affine(AP1_to_Rec709)),
+        _fn_step("clip01", 7, _clip01),
+    ]
+
+
+def _lower_stage8(settings):
+    space = settings["outputSpace"]
+    return _conversion_steps(f"to_{HDR_COLOR_SPACES[space]}", 8, output_encode_conversion(settings))
+
+
+def _lower_stage9(settings):
+    black = settings["blackLevel"]
+    white = settings["whiteLevel"]
+    return [_affine_step("displayRemap", 9, affine(np.eye(3) * (white - black), np.full(3, black)))]
+
+
+STAGE_LOWERING = {
+    4: _lower_stage4,
+    5: _lower_stage5,
+    6: _lower_stage6,
+    7: _lower_stage7,
+    8: _lower_stage8,
+    9: _lower_stage9,
+}
+
+
+def _whole_stage_step(num, name, fn, settings):
+    if num == 5 and vignette_enabled(grade_params(settings)):
+        def run_pixels(rgb, span, out=None):
+            return fn(rgb, settings, out=out, uv=_span_texcoords(rgb, span))
+        return PlanStep("pixel", name, (num,), None, run_pixels)
+
+    def run(rgb, out=None):
+        return fn(rgb, settings, out=out)
+    return PlanStep("fn", name, (num,), None, run)
+
+
+# Steps where f(f(x)) == f(x); a repeat right after itself is dropped
+IDEMPOTENT_FNS = (_clip01, _clamp0, quantize_half)
+
+
+def fuse_steps(steps):
+    """Fold runs of adjacent affine steps into one and drop identities."""
+    fused = []
+    for step in steps:
+        if step.kind == "affine" and is_identity(step.matrix):
+            continue
+        prev = fused[-1] if fused else None
+        if (step.kind == "fn" and prev is not None and prev.kind == "fn"
+                and step.fn is prev.fn and step.fn in IDEMPOTENT_FNS):
+            fused[-1] = prev._replace(stages=prev.stages + step.stages)
+        elif step.kind == "affine" and prev is not None and prev.kind == "affine":
+            stages = prev.stages + tuple(s for s in step.stages if s not in prev.stages)
+            fused[-1] = PlanStep("affine", f"{prev.label} * {step.label}", stages,
+                                 compose(prev.matrix, step.matrix), None)
+        else:
+            fused.append(step)
+    return [s for s in fused if not (s.kind == "affine" and is_identity(s.matrix))]
+
+
+def build_plan(settings=None, fuse=True, stages=None, half_boundaries=False):
+    """Lower the enabled stages for `settings` to a list of PlanSteps.
+
+    half_boundaries rounds the input and every stage output to float16, like
+    the rgba16float textures between WebGPU passes; fusion then stays inside
+    each stage.
+    """
+    settings = resolve_settings(settings)
+    steps = [_fn_step("quantize_half", 4, quantize_half)] if half_boundaries else []
+    for num, name, fn in enabled_stages(settings, stages):
+        lowered = STAGE_LOWERING[num](settings) if fuse else None
+        if lowered is None:
+            steps.append(_whole_stage_step(num, name, fn, settings))
+        else:
+            steps.extend(lowered)
+        if half_boundaries:
+            steps.append(_fn_step("quantize_half", num, quantize_half))
+    return fuse_steps(steps) if fuse else steps
+
+
+def format_plan(plan):
+    """Human-readable plan listing, one step per line."""
+    lines = []
+    for i, step in enumerate(plan):
+        stages = ",".join(str(s) for s in step.stages)
+        lines.append(f"  [{i}] {step.kind:6s} stages {stages:8s} {step.label}")
+        if step.kind == "affine":
+            for row in step.matrix:
+                lines.append("             " + "  ".join(f"{v: .7f}" for v in row))
+    return "\n".join(lines)
+
+
+def apply_affine(rgb, m, out=None):
+    """Apply a 3x4 affine matrix to an (N, 3) batch, keeping the input dtype."""
+    out = np.matmul(rgb, m[:, :3].T.astype(rgb.dtype, copy=False), out=out)
+    if np.any(m[:, 3]):
+        out += m[:, 3].astype(rgb.dtype, copy=False)
+    return out
+
+
+def run_plan(rgb, plan, scratch, out=None, span=None):
+    """Run an (N, 3) batch through `plan` using the scratch ping-pong buffers.
+
+    The last step writes into `out` when given, otherwise into scratch
+    (the returned array is then only valid until the next call). `span`
+    is the batch's PixelSpan; plans with "pixel" steps require it.
+    """
+    n = rgb.shape[0]
+    ping = scratch.views(n)
+    if not plan:
+        dst = ping[0] if out is None else out
+        np.copyto(dst, rgb)
+        return dst
+    src = rgb
+    for i, step in enumerate(plan):
+        last = i == len(plan) - 1
+        dst = out if (last and out is not None) else ping[i % 2]
+        if step.kind == "affine":
+            src = apply_affine(src, step.matrix, out=dst)
+        elif step.kind == "pixel":
+            if span is None:
+                raise ValueError(f"plan step '{step.label}' needs pixel coordinates (span)")
+            src = step.fn(src, span, out=dst)
+        else:
+            src = step.fn(src, out=dst)
+    return src
+
+
+def run_pipeline(image, settings=None, out=None, band_rows=DEFAULT_BAND_ROWS, scratch=None,
+                 plan=None, row_offset=0, frame_height=None):
+    """Run stages 4-9 over an HxWx3 float image and return the HxWx3 result.
+
+    `out` may be a preallocated HxWx3 array (or `image` itself for in-place);
+    `scratch` may be a ScratchBuffers reused between frames; `plan` may be a
+    prebuilt build_plan(settings) result. When `image` is a horizontal strip
+    of a taller frame, `row_offset` and `frame_height` place it in that frame
+    for screen-space steps such as the vignette.
+    """
+    image = np.asarray(image)
+    if image.ndim != 3 or image.shape[2] != 3:
+        raise ValueError(f"expected an HxWx3 image, got shape {image.shape}")
+    dtype = working_dtype(image.dtype)
+
+    if plan is None:
+        plan = build_plan(settings)
+
+    height, width, _ = image.shape
+    if frame_height is None:
+        frame_height = height
+    if out is None:
+        out = np.empty((height, width, 3), dtype=dtype)
+    band_rows = max(1, min(band_rows, height))
+    band_pixels = band_rows * width
+    if scratch is None or not scratch.fits(band_pixels, dtype):
+        scratch = ScratchBuffers(band_pixels, dtype)
+
+    for r0 in range(0, height, band_rows):
+        r1 = min(r0 + band_rows, height)
+        band_in = image[r0:r1].reshape(-1, 3).astype(dtype, copy=False)
+        band_out = out[r0:r1].reshape(-1, 3)
+        span = PixelSpan((row_offset + r0) * width, width, frame_height)
+        if np.shares_memory(band_out, out):
+            run_plan(band_in, plan, scratch, out=band_out, span=span)
+        else:
+            out[r0:r1] = run_plan(band_in, plan, scratch, span=span).reshape(r1 - r0, width, 3)
+    return out
+
+
+# Code that plans and runs a stage besides the stage itself; part of every
+# stage cache key, so a change to the executor misses too
+EXECUTOR_FNS = (run_pipeline, build_plan, run_plan, apply_affine, fuse_steps)
+
+
+def run_pipeline_cached(image, settings, cache, band_rows=DEFAULT_BAND_ROWS):
+    """run_pipeline() one stage at a time, reusing stage outputs from a StageCache.
+
+    Each stage's cache key chains on the previous stage's key, so after a
+    change to a stage's settings or code only that stage and the ones after
+    it are recomputed. Stages are fused internally but not with each other.
+    The result may be a read-only memmap into the cache.
+    """
+    image = np.asarray(image)
+    settings = resolve_settings(settings)
+    digest = array_digest(image)
+    result = image
+    for num, _, fn in enabled_stages(settings):
+        key = cache.key(digest, num, settings, (fn, STAGE_LOWERING[num]) + EXECUTOR_FNS)
+        plan = build_plan(settings, stages=(num,))
+        result = cache.run(key, lambda: run_pipeline(result, band_rows=band_rows, plan=plan))
+        digest = key
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VL.OCIO Pipeline Checker — reference render")
+    parser.add_argument("input", nargs="?", help="Float image (.npy or uncompressed float .dds)")
+    parser.add_argument("output", nargs="?", help="Golden output image (.npy)")
+    parser.add_argument("--settings", help="JSON file with pipeline settings")
+    parser.add_argument("--band-rows", type=int, default=DEFAULT_BAND_ROWS,
+                        help="Rows per processing band")
+    parser.add_argument("--show-plan", action="store_true", help="Print the fused execution plan")
+    parser.add_argument("--no-fuse", action="store_true", help="Run stage by stage without fusion")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse cached stage outputs; only stages after a change are rerun")
+    parser.add_argument("--cache-dir", help="Stage cache directory (implies --cache)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES >> 20,
+                        help="Stage cache size cap in MiB (least recently used evicted first)")
+    args = parser.parse_args()
+
+    settings = None
+    if args.settings:
+        with open(args.settings, "r") as f:
+            settings = json.load(f)
+
+    plan = build_plan(settings, fuse=not args.no_fuse)
+    if args.show_plan:
+        print(f"Plan ({len(plan)} steps):")
+        print(format_plan(plan))
+        resolved = resolve_settings(settings)
+        if any(num == 5 for num, _, _ in enabled_stages(resolved)):
+            print("Grade plan: " + format_grade_plan(build_grade_plan(grade_params(resolved))))
+    if args.input is None:
+        return
+    if args.output is None:
+        parser.error("output path is required when an input is given")
+
+    image = rgb_view(load_image(args.input).pixels)
+    if args.cache or args.cache_dir:
+        cache = StageCache(args.cache_dir, args.cache_size << 20)
+        result = run_pipeline_cached(image, settings, cache, band_rows=args.band_rows)
+        print(cache.summary())
+    else:
+        result = run_pipeline(image, settings, band_rows=args.band_rows, plan=plan)
+    np.save(args.output, result)
+    print(f"Wrote {args.output} ({result.shape[1]}x{result.shape[0]}, {result.dtype})")
+
+
+if __name__ == "__main__":
+    main()
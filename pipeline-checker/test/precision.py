@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Pipeline Checker — how much of a delta is floating-point precision.
+
+The WebGPU stages compute in f32 and hand rgba16float textures from pass to
+pass, while the reference math runs in float64. This runs the same work in
+the three PRECISIONS of verify.py (float64, float32, and float16 = float32
+math with half-float stage boundaries) and reports each against float64:
+
+- per fixture scenario (and dense sweep, when present), next to the
+  scenario's tolerance, so a failing GPU comparison can be checked against
+  the precision floor of that stage;
+- for a whole frame through run_pipeline(), optionally with a measured GPU
+  readback of that frame: the measured delta is split into the part the
+  float16 emulation reproduces (precision) and the rest (math).
+
+Usage:
+    python test/precision.py
+    python test/precision.py --json precision.json
+    python test/precision.py --input plate.npy --settings look.json --measured gpu.npy
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from fixture_io import load_reference_fixture
+from image_io import load_image, rgb_view
+from pipeline import build_plan, run_pipeline
+from verify import (
+    PRECISIONS,
+    STAGE_FUNCTIONS,
+    SWEEP_FIXTURE,
+    load_reference,
+    point_deltas,
+    run_stage,
+)
+
+EMULATED = PRECISIONS[1:]
+
+
+def delta_stats(deltas):
+    """max / mean / p99 of the finite per-point deltas (none -> zeros)."""
+    deltas = deltas[np.isfinite(deltas)]
+    if deltas.size == 0:
+        return {"maxDelta": 0.0, "meanDelta": 0.0, "p99Delta": 0.0}
+    return {
+        "maxDelta": float(deltas.max()),
+        "meanDelta": float(deltas.mean()),
+        "p99Delta": float(np.percentile(deltas, 99)),
+    }
+
+
+def _max_deltas(a, b):
+    d = np.abs(np.asarray(a, dtype=np.float64) - b).reshape(-1, 3).max(axis=1)
+    return np.where(np.isnan(d), np.inf, d)
+
+
+# =====================================================
+# Fixture scenarios
+# =====================================================
+
+def scenario_precision(fixture, label=""):
+    """One record per scenario: each emulated precision against float64."""
+    rows = []
+    for scenario in fixture.scenarios:
+        stage_fn = STAGE_FUNCTIONS.get(scenario.name.split("_")[0])
+        if stage_fn is None:
+            continue
+        reference = run_stage(stage_fn, fixture.points, scenario.settings)
+        checked, _, _ = point_deltas(reference, scenario.expected, scenario.tolerance)
+        row = {"scenario": scenario.name + label, "points": int(np.count_nonzero(checked)),
+               "tolerance": scenario.tolerance}
+        for precision in EMULATED:
+            computed = run_stage(stage_fn, fixture.points, scenario.settings, precision=precision)
+            _, _, ok = point_deltas(computed, scenario.expected, scenario.tolerance)
+            stats = delta_stats(_max_deltas(computed, reference)[checked])
+            stats["toleranceUsed"] = stats["maxDelta"] / scenario.tolerance
+            stats["failed"] = int(np.count_nonzero(checked & ~ok))
+            row[precision] = stats
+        rows.append(row)
+    return rows
+
+
+def print_scenarios(rows):
+    print(f"{'scenario':58s} {'tol':>7s} "
+          + " ".join(f"{p + ' max':>13s} {'%tol':>7s} {'fail':>6s}" for p in EMULATED))
+    for r in rows:
+        cells = " ".join(f"{r[p]['maxDelta']:13.2e} {r[p]['toleranceUsed']:7.1%} "
+                         f"{r[p]['failed']:6d}" for p in EMULATED)
+        print(f"{r['scenario']:58s} {r['tolerance']:7g} {cells}")
+
+
+# =====================================================
+# Whole frames
+# =====================================================
+
+def frame_precision(image, settings=None, measured=None):
+    """Frame deltas of float32 / float16-boundary runs (and a measured readback) vs float64."""
+    image = np.asarray(image)
+    reference = run_pipeline(image.astype(np.float64), settings)
+    emulated = {
+        "float32": run_pipeline(image.astype(np.float32), settings),
+        "float16": run_pipeline(image.astype(np.float32), settings,
+                                plan=build_plan(settings, half_boundaries=True)),
+    }
+    result = {p: delta_stats(_max_deltas(emulated[p], reference)) for p in EMULATED}
+    if measured is not None:
+        measured = np.asarray(measured)[..., :3]
+        if measured.shape != reference.shape:
+            raise ValueError(f"measured frame is {measured.shape}, expected {reference.shape}")
+        total = delta_stats(_max_deltas(measured, reference))
+        residual = delta_stats(_max_deltas(measured, emulated["float16"]))
+        floor = result["float16"]["meanDelta"]
+        result["measured"] = {
+            "total": total,
+            "notPrecision": residual,
+            # Share of the mean measured delta the float16 emulation accounts for
+            "precisionShare": min(1.0, floor / total["meanDelta"]) if total["meanDelta"] else 1.0,
+        }
+    return result
+
+
+def print_frame(result):
+    print(f"{'run':28s} {'max':>10s} {'mean':>10s} {'p99':>10s}")
+    for p in EMULATED:
+        r = result[p]
+        print(f"{p + ' vs float64':28s} {r['maxDelta']:10.2e} {r['meanDelta']:10.2e} "
+              f"{r['p99Delta']:10.2e}")
+    if "measured" in result:
+        m = result["measured"]
+        for name, r in (("measured vs float64", m["total"]),
+                        ("measured vs float16 emu", m["notPrecision"])):
+            print(f"{name:28s} {r['maxDelta']:10.2e} {r['meanDelta']:10.2e} {r['p99Delta']:10.2e}")
+        print(f"precision accounts for ~{m['precisionShare']:.0%} of the mean measured delta")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VL.OCIO Pipeline Checker — precision report")
+    parser.add_argument("--input", help="Float image to run through the whole pipeline")
+    parser.add_argument("--settings", help="JSON file with pipeline settings for --input")
+    parser.add_argument("--measured", help="GPU readback of --input (.npy or float .dds)")
+    parser.add_argument("--no-sweeps", action="store_true", help="Skip the dense sweep fixture")
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    args = parser.parse_args()
+    if args.measured and not args.input:
+        parser.error("--measured needs --input")
+
+    report = {}
+    if args.input:
+        settings = None
+        if args.settings:
+            with open(args.settings, "r") as f:
+                settings = json.load(f)
+        image = rgb_view(load_image(args.input).pixels)
+        measured = rgb_view(load_image(args.measured).pixels) if args.measured else None
+        report["frame"] = frame_precision(image, settings, measured)
+        print_frame(report["frame"])
+    else:
+        reference = load_reference()
+        rows = scenario_precision(reference)
+        if not args.no_sweeps and os.path.exists(SWEEP_FIXTURE):
+            sweep = load_reference_fixture(SWEEP_FIXTURE)
+            if sweep.source_sha1 == reference.source_sha1:
+                rows += scenario_precision(sweep, f" (sweep, {len(sweep.points)} points)")
+        report["scenarios"] = rows
+        print_scenarios(rows)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
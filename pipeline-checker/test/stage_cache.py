@@ -0,0 +1,247 @@
+"""Content-addressed on-disk cache of stage outputs.
+
+A stage output is stored as <key>.npy, where the key is the sha1 of
+(input digest, stage number, the settings that stage reads, a fingerprint
+of the stage code, and any extra context such as the precision). When
+stages are chained, each stage's key becomes the next stage's input digest,
+so changing a setting or the code of stage N only misses stages N and later;
+everything upstream is read back from disk.
+
+The code fingerprint covers the stage function, the same-module functions
+and constants it references (recursively), and the source files of the
+checker modules it pulls in from elsewhere. Third-party code is not hashed.
+
+Eviction is least-recently-used by file mtime (a hit touches the file) once
+the directory grows past max_bytes. Writes are atomic, so several
+processes may share one cache directory.
+"""
+import hashlib
+import inspect
+import json
+import os
+import sys
+import types
+
+import numpy as np
+
+CACHE_VERSION = 1
+STAGE_CACHE_DIR = os.environ.get(
+    "PIPELINE_STAGE_CACHE", os.path.join(os.path.dirname(__file__), ".cache", "stage_outputs"))
+DEFAULT_MAX_BYTES = 2 << 30
+
+_CHECKER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Pipeline settings each stage reads; other keys do not affect its output
+STAGE_SETTINGS = {
+    4: ("inputSpace",),
+    5: ("gradingSpace", "exposure", "contrast", "saturation", "temperature", "tint",
+        "highlights", "shadows", "vibrance", "lift", "gamma", "gain", "offset",
+        "shadowColor", "midtoneColor", "highlightColor", "highlightSoftClip",
+        "shadowSoftClip", "highlightKnee", "shadowKnee", "vignetteStrength",
+        "vignetteRadius", "vignetteSoftness"),
+    6: ("tonemapOp", "tonemapExposure", "whitePoint", "peakBrightness"),
+    7: ("tonemapOp", "outputSpace"),
+    8: ("tonemapOp", "outputSpace", "paperWhite", "peakBrightness"),
+    9: ("blackLevel", "whiteLevel"),
+}
+
+
+# =====================================================
+# Key parts
+# =====================================================
+
+def array_digest(a):
+    """sha1 of an array's dtype, shape and contents."""
+    a = np.ascontiguousarray(a)
+    h = hashlib.sha1(f"{a.dtype.str}{a.shape}".encode())
+    h.update(memoryview(a.reshape(-1)).cast("B"))
+    return h.hexdigest()
+
+
+def _canonical(value):
+    if isinstance(value, (bool, int, float, np.number)):
+        return float(value)
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items()}
+    return value
+
+
+def stage_settings(settings, stage):
+    """The STAGE_SETTINGS subset of `settings` for a stage, with numbers as floats.
+
+    Keys missing from `settings` are left out (the stage uses its default).
+    """
+    keys = STAGE_SETTINGS.get(stage)
+    if keys is None:
+        return _canonical(settings)
+    return {k: _canonical(settings[k]) for k in keys if k in settings}
+
+
+_module_hashes = {}
+
+
+def _module_files(name, seen):
+    """Source files of checker module `name` and the checker modules it imports."""
+    module = sys.modules.get(name)
+    path = getattr(module, "__file__", None)
+    if path is None or os.path.dirname(os.path.abspath(path)) != _CHECKER_DIR:
+        return
+    if ("module", name) in seen:
+        return
+    seen.add(("module", name))
+    yield path
+    for obj in vars(module).values():
+        other = obj.__name__ if isinstance(obj, types.ModuleType) else getattr(obj, "__module__", None)
+        if isinstance(other, str) and other != name:
+            yield from _module_files(other, seen)
+
+
+def _module_sha1(path):
+    digest = _module_hashes.get(path)
+    if digest is None:
+        with open(path, "rb") as f:
+            digest = _module_hashes[path] = hashlib.sha1(f.read()).hexdigest()
+    return digest
+
+
+def _hash_code(code, fn_globals, module, h, seen):
+    for name in code.co_names:
+        if name in fn_globals and name not in seen:
+            seen.add(name)
+            _hash_global(fn_globals[name], module, h, seen)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _hash_code(const, fn_globals, module, h, seen)
+
+
+def _hash_global(obj, module, h, seen):
+    other = obj.__name__ if isinstance(obj, types.ModuleType) else getattr(obj, "__module__", None)
+    if isinstance(obj, types.FunctionType) and other == module:
+        h.update(inspect.getsource(obj).encode())
+        _hash_code(obj.__code__, obj.__globals__, module, h, seen)
+    elif isinstance(other, str) and other != module:
+        for path in _module_files(other, seen):
+            h.update(_module_sha1(path).encode())
+    elif isinstance(obj, np.ndarray):
+        h.update(obj.tobytes())
+    elif isinstance(obj, dict):
+        for k, v in obj.items():
+            h.update(repr(k).encode())
+            _hash_global(v, module, h, seen)
+    elif isinstance(obj, (list, tuple)) and not hasattr(obj, "_fields"):
+        for v in obj:
+            _hash_global(v, module, h, seen)
+    elif not callable(obj):
+        h.update(repr(obj).encode())
+
+
+def code_fingerprint(*fns):
+    """sha1 over the code the given functions run (see module docstring)."""
+    h = hashlib.sha1()
+    for fn in fns:
+        h.update(inspect.getsource(fn).encode())
+        _hash_code(fn.__code__, fn.__globals__, fn.__module__, h, set())
+    return h.hexdigest()
+
+
+# =====================================================
+# Cache
+# =====================================================
+
+class StageCache:
+    """Stage outputs on disk under cache_dir, capped at max_bytes (LRU)."""
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or STAGE_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._fingerprints = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.evict()
+
+    def key(self, input_digest, stage, settings, fns, extra=None):
+        """Cache key of one stage run; `fns` is the stage code (function or tuple)."""
+        fns = fns if isinstance(fns, tuple) else (fns,)
+        code = self._fingerprints.get(fns)
+        if code is None:
+            code = self._fingerprints[fns] = code_fingerprint(*fns)
+        blob = json.dumps([CACHE_VERSION, input_digest, stage, stage_settings(settings, stage),
+                           code, extra], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha1(blob.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".npy")
+
+    def get(self, key):
+        """The cached output (a read-only memmap) or None."""
+        path = self._path(key)
+        try:
+            out = np.load(path, mmap_mode="r")
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return out
+
+    def put(self, key, array):
+        """Store an output; outputs larger than the whole cache are not stored."""
+        array = np.ascontiguousarray(array)
+        if array.nbytes > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(tmp, array)
+        os.replace(tmp, path)
+        self.evict(keep=path)
+
+    def run(self, key, compute):
+        """get(key), or compute() and put() it."""
+        out = self.get(key)
+        if out is None:
+            out = compute()
+            self.put(key, out)
+        return out
+
+    def entries(self):
+        """(mtime, size, path) of every cached output, oldest first."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".npy") and ".tmp." not in entry.name:
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        return sorted(entries)
+
+    def evict(self, max_bytes=None, keep=None):
+        """Remove least recently used outputs until the cache fits max_bytes.
+
+        `keep` (a path just written) is never removed, even when coarse
+        mtimes make it tie with older outputs.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue  # still mapped by a reader (Windows); try again next time
+            total -= size
+
+    def summary(self):
+        entries = self.entries()
+        size = sum(s for _, s, _ in entries)
+        return (f"stage cache: {self.hits} hits, {self.misses} misses, "
+                f"{len(entries)} outputs, {size / (1 << 20):.1f} MiB in {self.cache_dir}")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Pipeline Checker — chunked streaming reference renders.
+
+Streams frames through the fused stage plan in fixed-size pixel chunks:
+each chunk is read from the source, run through two reused chunk-sized
+scratch buffers and written straight to the output file, so peak memory
+is a few chunks no matter how large the frame is. Memory-mapped sources
+from image_io are read chunk by chunk from their file rather than through
+the mapping, so already-processed pages do not pile up in the resident
+set. Every chunk reports its own throughput.
+
+Output is .npy (HxWx3, header written up front) or headerless .raw.
+
+Usage:
+    python test/stream.py plate.dds out.npy --settings look.json
+    python test/stream.py a.dds b.dds --out-dir golden/ --chunk-pixels 4194304 --verbose
+"""
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from image_io import load_image
+from pipeline import PixelSpan, ScratchBuffers, build_plan, run_plan, working_dtype
+
+DEFAULT_CHUNK_PIXELS = 1 << 20
+
+# rgb is a scratch view, valid only until the generator advances
+Chunk = namedtuple("Chunk", ["index", "start", "rgb", "seconds"])
+
+# min_rate / max_rate are per-chunk pixels/sec, None for an empty frame (no chunks)
+StreamStats = namedtuple("StreamStats", ["pixels", "chunks", "seconds", "min_rate", "max_rate"])
+
+
+def chunk_rate(chunk):
+    """Pixels/sec of a chunk (inf when it took less than the timer resolution)."""
+    return chunk.rgb.shape[0] / chunk.seconds if chunk.seconds > 0 else float("inf")
+
+
+def _is_file_mapping(pixels):
+    """True for an unsliced np.memmap whose filename/offset describe it exactly."""
+    return (isinstance(pixels, np.memmap) and isinstance(pixels.base, mmap.mmap)
+            and pixels.filename is not None and pixels.flags.c_contiguous)
+
+
+def _chunk_reader(pixels, chunk_pixels):
+    """Return read(start, stop) -> (n, C) source pixels for a flat pixel range."""
+    channels = pixels.shape[2]
+    if not _is_file_mapping(pixels):
+        flat = pixels.reshape(-1, channels)
+        return lambda start, stop: flat[start:stop]
+
+    raw = np.empty((chunk_pixels, channels), dtype=pixels.dtype)
+    pixel_bytes = channels * pixels.dtype.itemsize
+    f = open(pixels.filename, "rb")
+
+    def read(start, stop):
+        dst = raw[:stop - start]
+        f.seek(pixels.offset + start * pixel_bytes)
+        if f.readinto(memoryview(dst).cast("B")) != dst.nbytes:
+            raise ValueError(f"{pixels.filename}: unexpected end of file")
+        return dst
+    read.close = f.close
+    return read
+
+
+def stream_pipeline(pixels, settings=None, chunk_pixels=DEFAULT_CHUNK_PIXELS, plan=None):
+    """Yield processed Chunks of an HxWxC (C >= 3) frame in pixel order."""
+    if pixels.ndim != 3 or pixels.shape[2] < 3:
+        raise ValueError(f"expected an HxWxC image with C >= 3, got shape {pixels.shape}")
+    if plan is None:
+        plan = build_plan(settings)
+    dtype = working_dtype(pixels.dtype)
+    total = pixels.shape[0] * pixels.shape[1]
+    chunk_pixels = max(1, min(chunk_pixels, total))
+    scratch = ScratchBuffers(chunk_pixels, dtype)
+    staging = np.empty((chunk_pixels, 3), dtype=dtype)
+    read = _chunk_reader(pixels, chunk_pixels)
+
+    try:
+        for index, start in enumerate(range(0, total, chunk_pixels)):
+            stop = min(start + chunk_pixels, total)
+            t0 = time.perf_counter()
+            src = staging[:stop - start]
+            np.copyto(src, read(start, stop)[:, :3], casting="unsafe")
+            rgb = run_plan(src, plan, scratch, span=PixelSpan(start, pixels.shape[1], pixels.shape[0]))
+            yield Chunk(index, start, rgb, time.perf_counter() - t0)
+    finally:
+        if hasattr(read, "close"):
+            read.close()
+
+
+def _write_npy_header(f, shape, dtype):
+    header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": shape}
+    np.lib.format.write_array_header_1_0(f, header)
+
+
+def stream_to_file(pixels, out_path, settings=None, chunk_pixels=DEFAULT_CHUNK_PIXELS,
+                   on_chunk=None):
+    """Stream a frame to `out_path` (.npy or .raw); returns StreamStats.
+
+    `on_chunk(chunk)` is called after each chunk has been written.
+    """
+    dtype = working_dtype(pixels.dtype)
+    height, width = pixels.shape[:2]
+    rates = []
+    total_seconds = 0.0
+    with open(out_path, "wb") as f:
+        if out_path.lower().endswith(".npy"):
+            _write_npy_header(f, (height, width, 3), dtype)
+        for chunk in stream_pipeline(pixels, settings, chunk_pixels):
+            t0 = time.perf_counter()
+            chunk.rgb.tofile(f)
+            seconds = chunk.seconds + time.perf_counter() - t0
+            chunk = chunk._replace(seconds=seconds)
+            total_seconds += seconds
+            rates.append(chunk_rate(chunk))
+            if on_chunk is not None:
+                on_chunk(chunk)
+    return StreamStats(height * width, len(rates), total_seconds,
+                       min(rates, default=None), max(rates, default=None))
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VL.OCIO Pipeline Checker — streaming reference render")
+    parser.add_argument("inputs", nargs="+", help="Float frames (.npy or float .dds); last is the output "
+                                                 "unless --out-dir is given")
+    parser.add_argument("--out-dir", help="Write each frame's result here as <name>.npy")
+    parser.add_argument("--settings", help="JSON file with pipeline settings")
+    parser.add_argument("--chunk-pixels", type=int, default=DEFAULT_CHUNK_PIXELS,
+                        help="Pixels per chunk")
+    parser.add_argument("--verbose", action="store_true", help="Print throughput for every chunk")
+    args = parser.parse_args()
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+        jobs = [
+            (p, os.path.join(args.out_dir, os.path.splitext(os.path.basename(p))[0] + ".npy"))
+            for p in args.inputs
+        ]
+    elif len(args.inputs) == 2:
+        jobs = [tuple(args.inputs)]
+    else:
+        parser.error("give 'input output' or use --out-dir for sequences")
+
+    settings = None
+    if args.settings:
+        with open(args.settings, "r") as f:
+            settings = json.load(f)
+
+    def report_chunk(chunk):
+        print(f"  chunk {chunk.index:5d}  {chunk.rgb.shape[0]:9d} px  "
+              f"{chunk_rate(chunk) / 1e6:8.1f} Mpix/s")
+
+    for src, dst in jobs:
+        pixels = load_image(src).pixels
+        stats = stream_to_file(pixels, dst, settings, args.chunk_pixels,
+                               on_chunk=report_chunk if args.verbose else None)
+        rss = peak_rss_mb()
+        rate = ""
+        if stats.chunks:
+            mean_rate = stats.pixels / stats.seconds if stats.seconds > 0 else float("inf")
+            rate = (f", {mean_rate / 1e6:.1f} Mpix/s "
+                    f"(chunk min {stats.min_rate / 1e6:.1f}, max {stats.max_rate / 1e6:.1f})")
+        print(f"{src} -> {dst}  {stats.chunks} chunks{rate}"
+              + (f", peak RSS {rss:.0f} MB" if rss is not None else ""))
+
+
+if __name__ == "__main__":
+    main()
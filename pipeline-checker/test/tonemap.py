@@ -0,0 +1,215 @@
+"""Tonemap operators for the pipeline reference math.
+
+NumPy ports of the display curves in shaders/TonemapOperators.sdsl, as
+transpiled for the RRT stage (src/shaders/transpiled/rrt.wgsl): AgX,
+Gran Turismo, Uncharted 2, Khronos PBR Neutral, Lottes, Reinhard Extended
+and Hejl-Burgess. ACES Fit and simple Reinhard live in verify.py.
+
+Every function takes an array of shape (..., 3) in Linear Rec.709 and
+returns a new array of the same shape and float dtype. Branches in the
+shader code become per-element masks, so a whole frame is evaluated in a
+fixed number of ufunc passes.
+"""
+import numpy as np
+
+# =====================================================
+# AgX (Troy Sobotka, exact analytical sigmoid)
+# =====================================================
+
+# Inset matrix: BT.709 to AgX primaries
+AGX_INSET = np.array([
+    [0.842479062253094,  0.0784335999999992, 0.0792237451477643],
+    [0.0423282422610123, 0.878468636469772,  0.0791661274605434],
+    [0.0423756549057051, 0.0784336,          0.879142973793104],
+])
+
+# Outset matrix: AgX primaries to BT.709
+AGX_OUTSET = np.array([
+    [ 1.19687900512017,   -0.0528968517574562, -0.0529716355144438],
+    [-0.0980208811401368,  1.15190312990417,   -0.0980434501171241],
+    [-0.0990297440797205, -0.0989611768448433,  1.15107367264116],
+])
+
+AGX_MIN_EV = -12.47393
+AGX_MAX_EV = 4.026069
+AGX_THRESHOLD = 0.6060606060606061  # 20/33
+
+# (a, b, c) above and at/below the threshold
+AGX_SIGMOID_UP = (69.86278913545539, 3.25, -0.30769230769230771)
+AGX_SIGMOID_DOWN = (59.507875, 3.0, -0.33333333333333333)
+
+
+def agx_sigmoid(v):
+    """Exact AgX sigmoid (matches AgX_Default_Contrast.spi1d)."""
+    down = v <= AGX_THRESHOLD
+    a, b, c = (np.where(down, lo, hi).astype(v.dtype, copy=False)
+               for hi, lo in zip(AGX_SIGMOID_UP, AGX_SIGMOID_DOWN))
+    t = np.abs(v - AGX_THRESHOLD)
+    np.power(t, b, out=t)
+    t *= a
+    t += 1.0
+    np.power(t, c, out=t)
+    t *= 2.0 * v - 2.0 * AGX_THRESHOLD
+    t += 0.5
+    return t
+
+
+def agx_log_sigmoid(color):
+    """Log2 encode over 16.5 stops, normalize to [0, 1] and apply the sigmoid.
+
+    This is the per-channel curve between AGX_INSET and AGX_OUTSET.
+    """
+    v = np.maximum(color, 1e-10)
+    np.log2(v, out=v)
+    np.clip(v, AGX_MIN_EV, AGX_MAX_EV, out=v)
+    v -= AGX_MIN_EV
+    v /= AGX_MAX_EV - AGX_MIN_EV
+    return agx_sigmoid(v)
+
+
+def agx_linearize(color):
+    """Decode the sigmoid's gamma 2.2 display encoding (pure power, as in the shader)."""
+    v = np.maximum(color, 0.0)
+    return np.power(v, 2.2, out=v)
+
+
+def agx_tonemap(color):
+    """AgX: inset matrix, log sigmoid, outset matrix, linearize."""
+    v = np.matmul(color, AGX_INSET.T.astype(color.dtype, copy=False))
+    v = agx_log_sigmoid(v)
+    v = np.matmul(v, AGX_OUTSET.T.astype(v.dtype, copy=False))
+    return agx_linearize(v)
+
+
+# =====================================================
+# Gran Turismo / Uchimura
+# =====================================================
+
+GT_P = 1.0   # Max display brightness
+GT_a = 1.0   # Contrast
+GT_m = 0.22  # Linear section start
+GT_l = 0.4   # Linear section length
+GT_c = 1.33  # Black tightness
+GT_b = 0.0   # Pedestal
+
+
+def gran_turismo_tonemap(color):
+    """Gran Turismo (Uchimura): toe, linear section and exponential shoulder."""
+    P, a, m, l, c, b = GT_P, GT_a, GT_m, GT_l, GT_c, GT_b
+    l0 = ((P - m) * l) / a
+    S0 = m + l0
+    S1 = m + a * l0
+    CP = -((a * P) / (P - S1)) / P
+
+    # Toe/linear blend; the shoulder weight is a hard step at S0, so the
+    # shoulder replaces the blend there instead of being multiplied in
+    t = np.clip(color / m, 0.0, 1.0)
+    w0 = 1.0 - t * t * (3.0 - 2.0 * t)
+
+    T = m * np.power(np.maximum(color / m, 0.0), c) + b
+    L = m + a * (color - m)
+    result = T * w0
+    result += L * (1.0 - w0)
+
+    shoulder = color >= S0
+    result[shoulder] = P - (P - S1) * np.exp(CP * (color[shoulder] - S0))
+    return result
+
+
+# =====================================================
+# Uncharted 2 / Hable
+# =====================================================
+
+U2_A = 0.15  # Shoulder strength
+U2_B = 0.50  # Linear strength
+U2_C = 0.10  # Linear angle
+U2_D = 0.20  # Toe strength
+U2_E = 0.02  # Toe numerator
+U2_F = 0.30  # Toe denominator
+U2_W = 11.2  # Linear white point
+
+
+def _hable(x):
+    A, B, C, D, E, F = U2_A, U2_B, U2_C, U2_D, U2_E, U2_F
+    return ((x * (A * x + C * B) + D * E) / (x * (A * x + B) + D * F)) - E / F
+
+
+U2_WHITE_SCALE = 1.0 / _hable(U2_W)
+
+
+def uncharted2_tonemap(color):
+    """Uncharted 2 filmic curve, normalized so U2_W maps to 1."""
+    result = _hable(color)
+    result *= U2_WHITE_SCALE
+    return result
+
+
+# =====================================================
+# Khronos PBR Neutral
+# =====================================================
+
+PBR_START_COMPRESSION = 0.8 - 0.04
+PBR_DESATURATION = 0.15
+
+
+def khronos_pbr_neutral_tonemap(color):
+    """Khronos PBR Neutral: toe offset, then peak compression and desaturation."""
+    color = np.maximum(color, 0.0)
+    x = color.min(axis=-1, keepdims=True)
+    offset = np.where(x < 0.08, x - 6.25 * x * x, 0.04)
+    color -= offset.astype(color.dtype, copy=False)
+
+    peak = color.max(axis=-1)
+    high = peak >= PBR_START_COMPRESSION
+    if not high.any():
+        return color
+
+    # Only pixels above the knee are compressed
+    c = color[high]
+    p = peak[high][:, None]
+    d = 1.0 - PBR_START_COMPRESSION
+    new_peak = 1.0 - d * d / (p + d - PBR_START_COMPRESSION)
+    c *= new_peak / p
+    g = 1.0 - 1.0 / (PBR_DESATURATION * (p - new_peak) + 1.0)
+    c += (new_peak - c) * g
+    color[high] = c
+    return color
+
+
+# =====================================================
+# Lottes
+# =====================================================
+
+LOTTES_D = 0.977
+LOTTES_HDR_MAX = 8.0
+LUMA_REC709 = np.array([0.2126, 0.7152, 0.0722])
+
+
+def lottes_tonemap(color):
+    """Lottes: Reinhard-style curve on Rec.709 luma, applied as a per-pixel scale."""
+    luma = np.matmul(color, LUMA_REC709.astype(color.dtype, copy=False))[..., None]
+    mapped = luma * (1.0 + luma / (LOTTES_HDR_MAX * LOTTES_HDR_MAX)) / (1.0 + luma)
+    np.power(mapped, LOTTES_D, out=mapped)
+    mapped /= np.maximum(luma, 1e-5)
+    return color * mapped
+
+
+# =====================================================
+# Reinhard Extended / Hejl-Burgess
+# =====================================================
+
+def reinhard_extended_tonemap(color, white_point):
+    """Reinhard with an adjustable white point (maps white_point to 1)."""
+    result = color / (white_point * white_point)
+    result += 1.0
+    result *= color
+    result /= 1.0 + color
+    return result
+
+
+def hejl_burgess_tonemap(color):
+    """Hejl-Burgess-Dawson, decoded from its baked-in gamma with pow(2.2)."""
+    c = np.maximum(color - 0.004, 0.0)
+    display = c * (6.2 * c + 0.5)
+    display /= c * (6.2 * c + 1.7) + 0.06
+    return np.power(display, 2.2, out=display)
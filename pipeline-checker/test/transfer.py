@@ -0,0 +1,189 @@
+"""Transfer functions for the pipeline reference math.
+
+NumPy ports of the encode/decode pairs in shaders/ColorSpaceConversion.sdsl:
+sRGB, ACEScc, ACEScct, PQ (ST.2084) and HLG (BT.2100).
+
+Every function works on arrays of any shape. Segments are selected per
+element with a mask instead of Python branching, so a 4K frame is a handful
+of ufunc passes rather than millions of Python calls. Each function takes an
+optional ``out`` array of the same shape; pass ``out=x`` to convert in place.
+"""
+import numpy as np
+
+# =====================================================
+# Constants (match ColorSpaceConversion.sdsl)
+# =====================================================
+
+SRGB_LINEAR_CUT = 0.0031308
+SRGB_ENCODED_CUT = 0.04045
+
+ACEScct_A = 10.5402377416545
+ACEScct_B = 0.0729055341958355
+ACEScct_CUT_LINEAR = 0.0078125
+ACEScct_CUT_LOG = 0.155251141552511
+
+ACES_LOG_MIN = 1e-10
+HALF_MAX = 65504.0
+
+PQ_m1 = 0.1593017578125
+PQ_m2 = 78.84375
+PQ_c1 = 0.8359375
+PQ_c2 = 18.8515625
+PQ_c3 = 18.6875
+PQ_MAX_NITS = 10000.0
+
+HLG_a = 0.17883277
+HLG_b = 0.28466892
+HLG_c = 0.55991073
+
+
+def _prepare(x, out):
+    """Return (x as float array, output buffer)."""
+    x = np.asarray(x)
+    if not np.issubdtype(x.dtype, np.floating):
+        x = x.astype(np.float64)
+    if out is None:
+        out = np.empty_like(x)
+    return x, out
+
+
+# =====================================================
+# sRGB (IEC 61966-2-1)
+# =====================================================
+
+def linear_to_srgb(x, out=None):
+    """Linear to sRGB encode."""
+    x, out = _prepare(x, out)
+    low = x <= SRGB_LINEAR_CUT
+    low_vals = x[low] * 12.92
+    np.maximum(x, SRGB_LINEAR_CUT, out=out)
+    np.power(out, 1.0 / 2.4, out=out)
+    out *= 1.055
+    out -= 0.055
+    out[low] = low_vals
+    return out
+
+
+def srgb_to_linear(x, out=None):
+    """sRGB decode to linear."""
+    x, out = _prepare(x, out)
+    low = x <= SRGB_ENCODED_CUT
+    low_vals = x[low] / 12.92
+    np.maximum(x, SRGB_ENCODED_CUT, out=out)
+    out += 0.055
+    out /= 1.055
+    np.power(out, 2.4, out=out)
+    out[low] = low_vals
+    return out
+
+
+# =====================================================
+# ACEScc (S-2014-003)
+# =====================================================
+
+def linear_to_acescc(x, out=None):
+    """Linear AP1 to ACEScc."""
+    x, out = _prepare(x, out)
+    np.maximum(x, ACES_LOG_MIN, out=out)
+    np.log2(out, out=out)
+    out += 9.72
+    out /= 17.52
+    return out
+
+
+def acescc_to_linear(x, out=None):
+    """ACEScc to linear AP1, clamped to [0, half max]."""
+    x, out = _prepare(x, out)
+    np.multiply(x, 17.52, out=out)
+    out -= 9.72
+    np.exp2(out, out=out)
+    np.clip(out, 0.0, HALF_MAX, out=out)
+    return out
+
+
+# =====================================================
+# ACEScct (S-2016-001)
+# =====================================================
+
+def linear_to_acescct(x, out=None):
+    """Linear AP1 to ACEScct."""
+    x, out = _prepare(x, out)
+    low = x < ACEScct_CUT_LINEAR
+    low_vals = ACEScct_A * np.maximum(x[low], ACES_LOG_MIN) + ACEScct_B
+    linear_to_acescc(x, out=out)
+    out[low] = low_vals
+    return out
+
+
+def acescct_to_linear(x, out=None):
+    """ACEScct to linear AP1, clamped to [0, half max]."""
+    x, out = _prepare(x, out)
+    low = x < ACEScct_CUT_LOG
+    low_vals = (x[low] - ACEScct_B) / ACEScct_A
+    acescc_to_linear(x, out=out)
+    out[low] = np.clip(low_vals, 0.0, HALF_MAX)
+    return out
+
+
+# =====================================================
+# PQ (SMPTE ST 2084), normalized so 1.0 = 10000 nits
+# =====================================================
+
+def linear_to_pq(x, out=None):
+    """Normalized linear to PQ."""
+    x, out = _prepare(x, out)
+    np.maximum(x, 0.0, out=out)
+    np.power(out, PQ_m1, out=out)
+    num = PQ_c2 * out
+    num += PQ_c1
+    out *= PQ_c3
+    out += 1.0
+    np.divide(num, out, out=out)
+    np.power(out, PQ_m2, out=out)
+    return out
+
+
+def pq_to_linear(x, out=None):
+    """PQ to normalized linear."""
+    x, out = _prepare(x, out)
+    np.maximum(x, 0.0, out=out)
+    np.power(out, 1.0 / PQ_m2, out=out)
+    num = np.maximum(out - PQ_c1, 0.0)
+    out *= -PQ_c3
+    out += PQ_c2
+    np.divide(num, out, out=out)
+    np.power(out, 1.0 / PQ_m1, out=out)
+    return out
+
+
+# =====================================================
+# HLG (ARIB STD-B67 / BT.2100)
+# =====================================================
+
+def linear_to_hlg(x, out=None):
+    """Normalized linear to HLG."""
+    x, out = _prepare(x, out)
+    low = x < 1.0 / 12.0
+    low_vals = np.sqrt(3.0 * np.maximum(x[low], 0.0))
+    np.multiply(x, 12.0, out=out)
+    out -= HLG_b
+    np.maximum(out, ACES_LOG_MIN, out=out)
+    np.log(out, out=out)
+    out *= HLG_a
+    out += HLG_c
+    out[low] = low_vals
+    return out
+
+
+def hlg_to_linear(x, out=None):
+    """HLG to normalized linear."""
+    x, out = _prepare(x, out)
+    low = x < 0.5
+    low_vals = x[low] * x[low] / 3.0
+    np.subtract(x, HLG_c, out=out)
+    out /= HLG_a
+    np.exp(out, out=out)
+    out += HLG_b
+    out /= 12.0
+    out[low] = low_vals
+    return out
@@ -5,6 +5,8 @@ Usage:
     python test/verify.py              # Verify all stages
     python test/verify.py --stage 4    # Verify specific stage
     python test/verify.py --verbose    # Show deltas for each test point
+    python test/verify.py --cache      # Reuse stage outputs whose code and settings are unchanged
+    python test/verify.py --jobs 8     # Verify scenarios in 8 worker processes
 
 Exit codes: 0 = all pass, 1 = failures.
 """
@@ -12,36 +14,82 @@ import argparse
 import json
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
+from aces13 import aces13_odt_rec709_100nits, aces13_odt_rec2020_1000nits, aces13_rrt
+from aces20 import aces20_odt_rec709, aces20_odt_rec2020, aces20_rrt
+from colorspace import (
+    CONVERSIONS,
+    HLG_REC2020,
+    IDENTITY_CONVERSION,
+    LINEAR_REC709,
+    PQ_REC2020,
+    SCRGB,
+    SCRGB_NITS,
+    SRGB,
+    apply_conversion,
+    make_conversion,
+    to_linear_rec709,
+)
+from fixture_io import (
+    json_sha1,
+    load_json,
+    load_reference_fixture,
+    point_label,
+    reference_from_json,
+)
+from grade import color_grade, grade_params
+from matrices import Rec709_to_AP1, Rec709_to_Rec2020, apply_matrix
+from stage_cache import DEFAULT_MAX_BYTES, StageCache, array_digest
+from tonemap import (
+    agx_tonemap,
+    gran_turismo_tonemap,
+    hejl_burgess_tonemap,
+    khronos_pbr_neutral_tonemap,
+    lottes_tonemap,
+    reinhard_extended_tonemap,
+    uncharted2_tonemap,
+)
+from transfer import PQ_MAX_NITS, linear_to_hlg, linear_to_pq, linear_to_srgb
+
 # =====================================================
-# Matrices (row-major / numpy convention)
-# Extracted from WGSL column-major by transposing
+# Enums (src/HDR/ColorSpaceEnums.cs)
 # =====================================================
 
-AP1_to_Rec709 = np.array([
-    [ 1.7048586, -0.6217160, -0.0831426],
-    [-0.1300768,  1.1407357, -0.0106589],
-    [-0.0239640, -0.1289755,  1.1529395]
-])
+HDR_COLOR_SPACES = {
+    0: "Linear_Rec709",
+    1: "Linear_Rec2020",
+    2: "ACEScg",
+    3: "ACEScc",
+    4: "ACEScct",
+    5: "sRGB",
+    6: "PQ_Rec2020",
+    7: "HLG_Rec2020",
+    8: "scRGB",
+}
 
-Rec709_to_AP1 = np.array([
-    [0.6131324, 0.3395381, 0.0473296],
-    [0.0701934, 0.9163539, 0.0134527],
-    [0.0206155, 0.1095697, 0.8698148]
-])
+TONEMAP_OPERATORS = {
+    0: "None",
+    1: "ACES",
+    2: "ACES13",
+    3: "ACES20",
+    4: "AgX",
+    5: "GranTurismo",
+    6: "Uncharted2",
+    7: "KhronosPBRNeutral",
+    8: "Lottes",
+    9: "Reinhard",
+    10: "ReinhardExtended",
+    11: "HejlBurgess",
+}
 
-Rec2020_to_Rec709 = np.array([
-    [ 1.6604910, -0.5876411, -0.0728499],
-    [-0.1245505,  1.1328999, -0.0083494],
-    [-0.0181508, -0.1005789,  1.1187297]
-])
 
-Rec709_to_Rec2020 = np.array([
-    [0.6274039, 0.3292830, 0.0433131],
-    [0.0690973, 0.9195404, 0.0113623],
-    [0.0163914, 0.0880133, 0.8955953]
-])
+# =====================================================
+# Matrices (row-major / numpy convention)
+# Gamut matrices live in matrices.py
+# =====================================================
 
 # ACES Fit combined matrices (BT.709 path)
 ACESInputMat = np.array([
@@ -57,30 +105,20 @@ ACESOutputMat = np.array([
 ])
 
 
-# =====================================================
-# Transfer functions
-# =====================================================
-
-def linear_to_srgb_ch(l):
-    if l <= 0.0031308:
-        return l * 12.92
-    return 1.055 * (l ** (1.0 / 2.4)) - 0.055
-
-def linear_to_srgb(rgb):
-    return np.array([linear_to_srgb_ch(c) for c in rgb])
-
-
 # =====================================================
 # Tonemap operators
 # =====================================================
 
-def aces_fit_tonemap_bt709(color):
-    """ACES Fit (Stephen Hill / BakingLab), BT.709 path."""
-    v = ACESInputMat @ color
+def aces_fit_rrt_odt(v):
+    """ACES Fit per-channel RRT+ODT curve (between ACESInputMat and ACESOutputMat)."""
     a = v * (v + 0.0245786) - 0.000090537
     b = v * (0.983729 * v + 0.4329510) + 0.238081
-    v = a / b
-    return np.clip(ACESOutputMat @ v, 0.0, 1.0)
+    return a / b
+
+def aces_fit_tonemap_bt709(color):
+    """ACES Fit (Stephen Hill / BakingLab), BT.709 path. Accepts (3,) or (N, 3)."""
+    v = aces_fit_rrt_odt(apply_matrix(color, ACESInputMat))
+    return np.clip(apply_matrix(v, ACESOutputMat), 0.0, 1.0)
 
 def reinhard_tonemap(color):
     """Reinhard: color / (color + 1)."""
@@ -96,85 +134,184 @@ def display_remap(color, black, white):
     return black + color * (white - black)
 
 
+# =====================================================
+# Batched stage functions
+# Each takes an (N, 3) array and returns an (N, 3) array
+# of the same float dtype. When `out` is given the result
+# is written there (it must not alias `rgb`).
+# =====================================================
+
+def _store(result, out):
+    if out is None:
+        return result
+    np.copyto(out, result)
+    return out
+
+
+def _passthrough(rgb, out):
+    return _store(rgb.copy() if out is None else rgb, out)
+
+
+def stage4_input_convert(rgb, settings, out=None):
+    """Stage 4: Input Convert — any HDRColorSpace to Linear Rec.709 (ToLinearRec709)."""
+    return to_linear_rec709(rgb, settings["inputSpace"], out=out)
+
+
+def stage5_color_grade(rgb, settings, out=None, uv=None):
+    """Stage 5: Color Grade — ColorCorrectionGpuParams in the Log or Linear grading space.
+
+    uv holds the (N, 2) pixel TexCoords and is only needed for the vignette.
+    """
+    return _store(color_grade(rgb, grade_params(settings), uv), out)
+
+
+def stage6_rrt(rgb, settings, out=None):
+    """Stage 6: RRT / Tonemap."""
+    op = settings["tonemapOp"]
+    exposure = settings.get("tonemapExposure", 0.0)
+    c = np.multiply(rgb, 2.0 ** exposure, out=out)
+    if op == 1:  # ACES Fit (BT.709 path)
+        return _store(aces_fit_tonemap_bt709(c), out)
+    elif op == 2:  # ACES 1.3 RRT (Linear Rec.709 -> AP1)
+        return _store(aces13_rrt(apply_matrix(c, Rec709_to_AP1)), out)
+    elif op == 3:  # ACES 2.0 Daniele tonescale (Linear Rec.709 -> AP1 / peak)
+        peak = settings.get("peakBrightness", 100.0)
+        return _store(aces20_rrt(apply_matrix(c, Rec709_to_AP1), peak), out)
+    elif op == 4:  # AgX
+        return _store(agx_tonemap(c), out)
+    elif op == 5:  # Gran Turismo
+        return _store(gran_turismo_tonemap(c), out)
+    elif op == 6:  # Uncharted 2
+        return _store(uncharted2_tonemap(c), out)
+    elif op == 7:  # Khronos PBR Neutral
+        return _store(khronos_pbr_neutral_tonemap(c), out)
+    elif op == 8:  # Lottes
+        return _store(lottes_tonemap(c), out)
+    elif op == 9:  # Reinhard
+        return _store(reinhard_tonemap(c), out)
+    elif op == 10:  # Reinhard Extended
+        return _store(reinhard_extended_tonemap(c, settings.get("whitePoint", 1.0)), out)
+    elif op == 11:  # Hejl-Burgess
+        return _store(hejl_burgess_tonemap(c), out)
+    # 0 = None
+    return c
+
+
+# Output spaces whose ODT targets Rec.2020 (isRec2020Target in odt.wgsl)
+REC2020_OUTPUT_SPACES = (1, 6, 7)
+
+
+def stage7_odt(rgb, settings, out=None):
+    """Stage 7: ODT — non-ACES operators bake the ODT into stage 6."""
+    op = settings["tonemapOp"]
+    if op == 2:  # ACES 1.3 (AP1 -> display linear)
+        if settings["outputSpace"] in REC2020_OUTPUT_SPACES:
+            return _store(aces13_odt_rec2020_1000nits(rgb), out)
+        return _store(aces13_odt_rec709_100nits(rgb), out)
+    elif op == 3:  # ACES 2.0 (AP1 -> display linear, gamut matrix only)
+        if settings["outputSpace"] in REC2020_OUTPUT_SPACES:
+            return _store(aces20_odt_rec2020(rgb), out)
+        return _store(aces20_odt_rec709(rgb), out)
+    return _passthrough(rgb, out)
+
+
+def aces_peak_nits(settings):
+    """getACESPeakNits: ACES 1.3 has a fixed peak per ODT, ACES 2.0 uses peakBrightness."""
+    if settings.get("tonemapOp", 0) == 2:
+        return 1000.0 if settings["outputSpace"] in REC2020_OUTPUT_SPACES else 100.0
+    return settings.get("peakBrightness", 100.0)
+
+
+def output_encode_conversion(settings):
+    """The Conversion stage 8 applies (output-encode.wgsl)."""
+    space = settings["outputSpace"]
+    eye = np.eye(3)
+    if settings.get("tonemapOp", 0) in (2, 3):
+        # ACES: the ODT already produced display linear in the target gamut
+        peak = aces_peak_nits(settings)
+        if space == SRGB:
+            return make_conversion(None, None, True, linear_to_srgb)
+        if space == PQ_REC2020:
+            return make_conversion(None, eye * (peak / PQ_MAX_NITS), True, linear_to_pq)
+        if space == HLG_REC2020:
+            return make_conversion(None, None, True, linear_to_hlg)
+        if space == SCRGB:
+            return make_conversion(None, eye * (peak / SCRGB_NITS), False, None)
+        return IDENTITY_CONVERSION
+
+    # Standard path: HDR outputs are scaled by paper white
+    paper_white = settings.get("paperWhite", 100.0)
+    if space == PQ_REC2020:
+        return make_conversion(None, Rec709_to_Rec2020 * (paper_white / PQ_MAX_NITS), False, linear_to_pq)
+    if space == HLG_REC2020:
+        peak = max(settings.get("peakBrightness", 100.0), 1.0)
+        return make_conversion(None, Rec709_to_Rec2020 * (paper_white / peak), True, linear_to_hlg)
+    if space == SCRGB:
+        return make_conversion(None, eye * (paper_white / SCRGB_NITS), False, None)
+    return CONVERSIONS[LINEAR_REC709, space]
+
+
+def stage8_output_encode(rgb, settings, out=None):
+    """Stage 8: Output Encoding."""
+    return apply_conversion(rgb, output_encode_conversion(settings), out=out)
+
+
+def stage9_display_remap(rgb, settings, out=None):
+    """Stage 9: Display Remap."""
+    black = settings["blackLevel"]
+    white = settings["whiteLevel"]
+    out = np.multiply(rgb, white - black, out=out)
+    out += black
+    return out
+
+
 # =====================================================
 # Stage verification functions
-# Each returns (computed_results_dict, stage_name)
+# Thin wrappers over the batched stage functions.
+# Each maps {name: rgb} -> {name: rgb}
 # =====================================================
 
+def points_to_array(test_points):
+    """Stack a {name: rgb} dict into (names, (N, 3) array)."""
+    names = list(test_points.keys())
+    if not names:
+        return names, np.empty((0, 3))
+    return names, np.stack([np.asarray(test_points[n]) for n in names])
+
+
+def array_to_points(names, rgb):
+    """Split an (N, 3) array back into a {name: rgb} dict."""
+    return {name: rgb[i] for i, name in enumerate(names)}
+
+
+def _verify_batched(stage_fn, test_points, settings):
+    names, rgb = points_to_array(test_points)
+    return array_to_points(names, stage_fn(rgb, settings))
+
+
 def verify_stage4(test_points, settings):
     """Stage 4: Input Convert — color space to Linear Rec.709."""
-    input_space = settings["inputSpace"]
-    results = {}
-    for name, pt in test_points.items():
-        if input_space == 2:  # ACEScg
-            results[name] = AP1_to_Rec709 @ pt
-        elif input_space == 1:  # Linear Rec.2020
-            results[name] = Rec2020_to_Rec709 @ pt
-        elif input_space == 0:  # Linear Rec.709 (passthrough)
-            results[name] = pt.copy()
-        elif input_space == 5:  # sRGB
-            results[name] = np.array([
-                (c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4)
-                for c in pt
-            ])
-        else:
-            results[name] = pt.copy()
-    return results
+    return _verify_batched(stage4_input_convert, test_points, settings)
 
 
 def verify_stage5(test_points, settings):
-    """Stage 5: Color Grade — with default settings, passthrough."""
-    exposure = settings.get("exposure", 0.0)
-    results = {}
-    for name, pt in test_points.items():
-        result = pt * (2.0 ** exposure)
-        results[name] = result
-    return results
+    """Stage 5: Color Grade — with default settings, near passthrough."""
+    return _verify_batched(stage5_color_grade, test_points, settings)
 
 
 def verify_stage6(test_points, settings):
     """Stage 6: RRT / Tonemap."""
-    op = settings["tonemapOp"]
-    exposure = settings.get("tonemapExposure", 0.0)
-    wp = settings.get("whitePoint", 4.0)
-    results = {}
-    for name, pt in test_points.items():
-        c = pt * (2.0 ** exposure)
-        if op == 1:  # ACES Fit (BT.709 path)
-            results[name] = aces_fit_tonemap_bt709(c)
-        elif op == 9:  # Reinhard
-            results[name] = reinhard_tonemap(c)
-        elif op == 0:  # None
-            results[name] = c
-        else:
-            results[name] = c
-    return results
+    return _verify_batched(stage6_rrt, test_points, settings)
 
 
 def verify_stage8(test_points, settings):
     """Stage 8: Output Encoding."""
-    output_space = settings["outputSpace"]
-    tonemap_op = settings.get("tonemapOp", 0)
-    results = {}
-    for name, pt in test_points.items():
-        if output_space == 5:  # sRGB (standard path, non-ACES)
-            clamped = np.clip(pt, 0.0, 1.0)
-            results[name] = linear_to_srgb(clamped)
-        elif output_space == 0:  # Linear Rec.709 passthrough
-            results[name] = pt.copy()
-        else:
-            results[name] = pt.copy()
-    return results
+    return _verify_batched(stage8_output_encode, test_points, settings)
 
 
 def verify_stage9(test_points, settings):
     """Stage 9: Display Remap."""
-    black = settings["blackLevel"]
-    white = settings["whiteLevel"]
-    results = {}
-    for name, pt in test_points.items():
-        results[name] = display_remap(pt, black, white)
-    return results
+    return _verify_batched(stage9_display_remap, test_points, settings)
 
 
 # Map scenario prefix to verification function
@@ -186,6 +323,15 @@ STAGE_VERIFIERS = {
     "stage9": verify_stage9,
 }
 
+# Map scenario prefix to batched stage function
+STAGE_FUNCTIONS = {
+    "stage4": stage4_input_convert,
+    "stage5": stage5_color_grade,
+    "stage6": stage6_rrt,
+    "stage8": stage8_output_encode,
+    "stage9": stage9_display_remap,
+}
+
 # Map --stage N to prefix
 STAGE_NUM_TO_PREFIX = {
     4: "stage4",
@@ -194,69 +340,208 @@ STAGE_NUM_TO_PREFIX = {
     8: "stage8",
     9: "stage9",
 }
+STAGE_PREFIX_TO_NUM = {prefix: num for num, prefix in STAGE_NUM_TO_PREFIX.items()}
 
 
-def load_reference_values():
-    """Load reference-values.json from fixtures directory."""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    ref_path = os.path.join(script_dir, "fixtures", "reference-values.json")
-    with open(ref_path, "r") as f:
-        return json.load(f)
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+REFERENCE_JSON = os.path.join(FIXTURES_DIR, "reference-values.json")
+REFERENCE_FIXTURE = os.path.join(FIXTURES_DIR, "reference-values.npz")
+SWEEP_FIXTURE = os.path.join(FIXTURES_DIR, "reference-sweeps.npz")
 
+# Points per stage call, and point messages listed per sweep scenario
+VERIFY_BLOCK_POINTS = 1 << 20
+SWEEP_MAX_MESSAGES = 10
 
-def compare_results(computed, expected, tolerance, verbose=False):
-    """Compare computed vs expected results. Returns (pass_count, fail_count, messages)."""
-    passes = 0
-    fails = 0
-    messages = []
+# Stage precisions for run_stage(); float16 = float32 math, half at stage boundaries
+PRECISIONS = ("float64", "float32", "float16")
 
-    for point_name, expected_rgb in expected.items():
-        if point_name not in computed:
-            fails += 1
-            messages.append(f"  MISSING: {point_name}")
-            continue
+# --report: worst points kept per scenario and ulp histogram bucket edges
+DEFAULT_TOP_K = 10
+ULP_HISTOGRAM_EDGES = [0, 1, 2, 4, 16, 256, 4096, 1 << 16, 1 << 20]
+ULP_CAP = float(np.iinfo(np.int32).max)
+
+
+def load_reference_values():
+    """Load reference-values.json from fixtures directory."""
+    return load_json(REFERENCE_JSON)
 
-        comp = computed[point_name]
-        exp = np.array([expected_rgb["R"], expected_rgb["G"], expected_rgb["B"]])
 
-        deltas = np.abs(comp - exp)
-        max_delta = np.max(deltas)
+def load_reference():
+    """ReferenceFixture for verification.
 
-        if max_delta <= tolerance:
-            passes += 1
-            if verbose:
-                messages.append(
-                    f"  PASS: {point_name:12s}  "
-                    f"computed=({comp[0]:.6f}, {comp[1]:.6f}, {comp[2]:.6f})  "
-                    f"max_delta={max_delta:.2e}"
-                )
+    Memory-maps the compiled reference-values.npz when it was built from the
+    current JSON; otherwise parses reference-values.json.
+    """
+    data = load_reference_values()
+    source_sha1 = json_sha1(data)
+    if os.path.exists(REFERENCE_FIXTURE):
+        fixture = load_reference_fixture(REFERENCE_FIXTURE)
+        if fixture.source_sha1 == source_sha1:
+            return fixture
+        print(f"NOTE: {os.path.basename(REFERENCE_FIXTURE)} is stale, "
+              f"rerun compute_reference.py; using JSON")
+    return reference_from_json(data, source_sha1)
+
+
+def point_deltas(computed, expected, tolerance):
+    """(checked, max |delta| per point, within tolerance) for (N, 3) rows.
+
+    Rows with NaN expected values are not checked; NaN results count as an
+    infinite delta. float32 expected values get half an ulp on top of the
+    tolerance.
+    """
+    expected = np.asarray(expected)
+    allowed = np.full(expected.shape, tolerance)
+    if expected.dtype == np.float32:
+        allowed += np.abs(expected) * (np.finfo(np.float32).eps / 2)
+    checked = ~np.isnan(expected).all(axis=1)
+    deltas = np.abs(computed - expected)
+    deltas[np.isnan(deltas) & checked[:, None]] = np.inf
+    ok = (deltas <= allowed).all(axis=1)
+    return checked, deltas.max(axis=1), ok
+
+
+def ulp_error(computed, expected, tolerance):
+    """|computed - expected| in float32 ulps of max(|expected|, tolerance), rounded.
+
+    Measuring against the ulp at the tolerance near zero keeps sign changes
+    and tiny expected values (billions of ulps apart bit-wise) from
+    swamping the count. NaN results count as ULP_CAP.
+    """
+    expected = np.asarray(expected, dtype=np.float64)
+    scale = np.spacing(np.maximum(np.abs(expected), tolerance).astype(np.float32))
+    ulps = np.abs(computed - expected) / scale
+    ulps[np.isnan(ulps) & ~np.isnan(expected)] = np.inf
+    return np.minimum(np.rint(ulps), ULP_CAP)
+
+
+def error_stats(label, points, computed, expected, tolerance, top_k=DEFAULT_TOP_K):
+    """Aggregate error statistics of one scenario as a JSON-able dict.
+
+    max/mean/p99 of the per-point max |delta|, a histogram of the per-point
+    max ulp_error() (ULP_HISTOGRAM_EDGES: bucket i counts
+    edges[i] <= ulp < edges[i + 1], the last bucket is open) and the top_k
+    worst points with their input colors.
+    """
+    checked, max_deltas, ok = point_deltas(computed, expected, tolerance)
+    rows = np.flatnonzero(checked)
+    deltas = max_deltas[rows]
+    expected = np.asarray(expected)[rows]
+    ulps = (np.fmax.reduce(ulp_error(computed[rows], expected, tolerance), axis=1)
+            if len(rows) else np.empty(0))
+    counts = np.histogram(np.minimum(ulps, ULP_HISTOGRAM_EDGES[-1]),
+                          bins=ULP_HISTOGRAM_EDGES + [np.inf])[0]
+
+    worst = []
+    if len(rows):
+        order = np.argsort(-deltas, kind="stable")[:top_k]
+        for j in order:
+            i = rows[j]
+            worst.append({
+                "point": label(i),
+                "input": [float(v) for v in points[i]],
+                "computed": [float(v) for v in computed[i]],
+                "expected": [float(v) for v in expected[j]],
+                "delta": float(deltas[j]),
+                "ulp": int(ulps[j]),
+            })
+
+    return {
+        "points": int(len(rows)),
+        "passed": int(np.count_nonzero(ok[rows])),
+        "failed": int(len(rows) - np.count_nonzero(ok[rows])),
+        "tolerance": tolerance,
+        "maxDelta": float(deltas.max()) if len(rows) else 0.0,
+        "meanDelta": float(deltas.mean()) if len(rows) else 0.0,
+        "p99Delta": float(np.percentile(deltas, 99)) if len(rows) else 0.0,
+        "maxUlp": int(ulps.max()) if len(rows) else 0,
+        "ulpHistogram": {"edges": ULP_HISTOGRAM_EDGES, "counts": [int(c) for c in counts]},
+        "worst": worst,
+    }
+
+
+def compare_results(label, computed, expected, tolerance, verbose=False, max_messages=None):
+    """Compare (N, 3) computed vs expected rows; NaN expected rows are not checked.
+
+    label(i) names point i. float32 expected values get half an ulp on top
+    of the tolerance. At most max_messages point messages are listed.
+    Returns (pass_count, fail_count, messages).
+    """
+    checked, max_deltas, ok = point_deltas(computed, expected, tolerance)
+    expected = np.asarray(expected)
+
+    passes = int(np.count_nonzero(checked & ok))
+    failed = np.flatnonzero(checked & ~ok)
+    fails = len(failed)
+    messages = []
+
+    listed = np.flatnonzero(checked) if verbose else failed
+    if max_messages is not None and len(listed) > max_messages:
+        # Worst points first when the list is cut short
+        listed = listed[np.argsort(-max_deltas[listed], kind="stable")[:max_messages]]
+    for i in listed:
+        comp, exp, max_delta = computed[i], expected[i], max_deltas[i]
+        if ok[i]:
+            messages.append(
+                f"  PASS: {label(i):12s}  "
+                f"computed=({comp[0]:.6f}, {comp[1]:.6f}, {comp[2]:.6f})  "
+                f"max_delta={max_delta:.2e}"
+            )
         else:
-            fails += 1
             messages.append(
-                f"  FAIL: {point_name:12s}  "
+                f"  FAIL: {label(i):12s}  "
                 f"computed=({comp[0]:.6f}, {comp[1]:.6f}, {comp[2]:.6f})  "
                 f"expected=({exp[0]:.6f}, {exp[1]:.6f}, {exp[2]:.6f})  "
                 f"max_delta={max_delta:.2e} > tolerance={tolerance}"
             )
+    if max_messages is not None and fails > max_messages:
+        messages.append(f"  ... {fails - max_messages} more failures")
 
     return passes, fails, messages
 
 
-def run_verification(stage_filter=None, verbose=False):
-    """Run verification for all or filtered stages. Returns (total_pass, total_fail)."""
-    data = load_reference_values()
-
-    # Parse test points into numpy arrays
-    test_points = {}
-    for name, rgba in data["testPoints"].items():
-        test_points[name] = np.array([rgba["R"], rgba["G"], rgba["B"]])
-
-    total_pass = 0
-    total_fail = 0
-
-    for scenario_name, scenario in data["stageExpected"].items():
-        # Determine stage prefix
-        stage_prefix = scenario_name.split("_")[0]
+def quantize_half(rgb, out=None):
+    """Round to the nearest float16 (beyond half max -> inf), keeping the dtype."""
+    with np.errstate(over="ignore"):
+        if out is None:
+            return rgb.astype(np.float16).astype(rgb.dtype)
+        out[...] = rgb.astype(np.float16)
+    return out
+
+
+def run_stage(stage_fn, points, settings, block=VERIFY_BLOCK_POINTS, precision="float64"):
+    """Run a batched stage over (N, 3) points in blocks; returns (N, 3).
+
+    precision is one of PRECISIONS: float64 (reference), float32, or float16
+    (float32 math with input and output rounded to half, like the
+    rgba16float textures between WebGPU passes).
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"unknown precision '{precision}', expected one of {PRECISIONS}")
+    dtype = np.float64 if precision == "float64" else np.float32
+    out = np.empty((len(points), 3), dtype=dtype)
+    for start in range(0, len(points), block):
+        stop = min(start + block, len(points))
+        rgb = np.asarray(points[start:stop], dtype=dtype)
+        if precision == "float16":
+            rgb = quantize_half(rgb)
+        # Fixtures include points outside a stage's input range (left unchecked)
+        with np.errstate(over="ignore", invalid="ignore"):
+            stage_fn(rgb, settings, out=out[start:stop])
+        if precision == "float16":
+            quantize_half(out[start:stop], out=out[start:stop])
+    return out
+
+
+def scenario_stage_fns(fixture, stage_filter=None):
+    """(index, stage function) of each fixture scenario to verify.
+
+    Scenarios of other stages than stage_filter are left out; the stage
+    function is None for scenarios without a verifier.
+    """
+    selected = []
+    for index, scenario in enumerate(fixture.scenarios):
+        stage_prefix = scenario.name.split("_")[0]
 
         # Filter by stage number if specified
         if stage_filter is not None:
@@ -264,55 +549,283 @@ def run_verification(stage_filter=None, verbose=False):
             if target_prefix and stage_prefix != target_prefix:
                 continue
 
-        # Find verifier
-        verifier = STAGE_VERIFIERS.get(stage_prefix)
-        if verifier is None:
-            print(f"WARNING: No verifier for {scenario_name}")
-            continue
+        selected.append((index, STAGE_FUNCTIONS.get(stage_prefix)))
+    return selected
 
-        # Compute results
-        settings = scenario["settings"]
-        tolerance = scenario["tolerance"]
-        expected = scenario["results"]
 
-        computed = verifier(test_points, settings)
+def verify_scenario(fixture, index, stage_fn, verbose=False, label_suffix="", max_messages=None,
+                    report=False, top_k=DEFAULT_TOP_K, precision="float64", cache=None,
+                    points_digest=None):
+    """Verify one fixture scenario. Returns (passes, fails, lines, record).
 
-        # Compare
-        passes, fails, messages = compare_results(
-            computed, expected, tolerance, verbose
-        )
+    lines is the text report of the scenario; in report mode there are no
+    lines and record is its error_stats() record instead. A StageCache
+    `cache` reuses stage outputs computed earlier for the same points
+    (points_digest), settings, stage and run_stage() code and precision.
+    """
+    scenario = fixture.scenarios[index]
+    stage_prefix = scenario.name.split("_")[0]
+
+    # Compute results for the whole point batch at once
+    tolerance = scenario.tolerance
+    compute = lambda: run_stage(stage_fn, fixture.points, scenario.settings, precision=precision)
+    if cache is None:
+        computed = compute()
+    else:
+        if points_digest is None:
+            points_digest = array_digest(fixture.points)
+        key = cache.key(points_digest, STAGE_PREFIX_TO_NUM[stage_prefix], scenario.settings,
+                        (stage_fn, run_stage, quantize_half), precision)
+        computed = cache.run(key, compute)
+
+    label = lambda i: point_label(fixture, i)
+    if report:
+        record = error_stats(label, fixture.points, computed, scenario.expected, tolerance, top_k)
+        record = dict(scenario=scenario.name + label_suffix, **record)
+        return record["passed"], record["failed"], [], record
+
+    # Compare
+    passes, fails, messages = compare_results(
+        label, computed, scenario.expected, tolerance, verbose, max_messages
+    )
+
+    # Report
+    status = "PASS" if fails == 0 else "FAIL"
+    lines = [
+        f"[{status}] {scenario.name}{label_suffix}: {scenario.description}",
+        f"       {passes} passed, {fails} failed (tolerance={tolerance})",
+    ]
+    return passes, fails, lines + messages, None
+
+
+def verify_fixture(fixture, stage_filter=None, verbose=False, label_suffix="",
+                   max_messages=None, stats=None, top_k=DEFAULT_TOP_K, precision="float64",
+                   cache=None):
+    """Verify every scenario of a ReferenceFixture. Returns (total_pass, total_fail).
+
+    When `stats` is a list, one error_stats() record per scenario is appended
+    to it instead of printing per-scenario results. See verify_scenario()
+    for `cache`.
+    """
+    total_pass = 0
+    total_fail = 0
+    points_digest = array_digest(fixture.points) if cache is not None else None
+
+    for index, stage_fn in scenario_stage_fns(fixture, stage_filter):
+        if stage_fn is None:
+            print(f"WARNING: No verifier for {fixture.scenarios[index].name}")
+            continue
+        passes, fails, lines, record = verify_scenario(
+            fixture, index, stage_fn, verbose, label_suffix, max_messages, stats is not None,
+            top_k, precision, cache, points_digest)
         total_pass += passes
         total_fail += fails
+        if record is not None:
+            stats.append(record)
+        for line in lines:
+            print(line)
+
+    return total_pass, total_fail
+
+
+# =====================================================
+# Parallel verification (--jobs)
+# =====================================================
 
-        # Report
-        status = "PASS" if fails == 0 else "FAIL"
-        print(f"[{status}] {scenario_name}: {scenario['description']}")
-        print(f"       {passes} passed, {fails} failed (tolerance={tolerance})")
-        for msg in messages:
-            print(msg)
+# Per worker process: fixtures loaded by path and their points digests, and
+# the StageCache of the run
+_job_fixtures = {}
+_job_caches = {}
 
+
+def _fixture_source(fixture):
+    """What a worker needs to get `fixture`: its .npz path when memory-mapped, else itself."""
+    if isinstance(fixture.points, np.memmap):
+        return fixture.points.filename
+    return fixture
+
+
+def _verify_scenario_job(source, index, stage_prefix, options, cache_config):
+    """verify_scenario() in a worker; also returns the stage cache hits and misses."""
+    if isinstance(source, str):
+        if source not in _job_fixtures:
+            fixture = load_reference_fixture(source)
+            _job_fixtures[source] = (fixture, None)
+        fixture, points_digest = _job_fixtures[source]
+    else:
+        fixture, points_digest = source, None
+
+    cache = None
+    if cache_config is not None:
+        if cache_config not in _job_caches:
+            _job_caches[cache_config] = StageCache(*cache_config)
+        cache = _job_caches[cache_config]
+        if points_digest is None:
+            points_digest = array_digest(fixture.points)
+            if isinstance(source, str):
+                _job_fixtures[source] = (fixture, points_digest)
+        hits, misses = cache.hits, cache.misses
+
+    result = verify_scenario(fixture, index, STAGE_FUNCTIONS[stage_prefix], cache=cache,
+                             points_digest=points_digest, **options)
+    if cache is None:
+        return result + (0, 0)
+    return result + (cache.hits - hits, cache.misses - misses)
+
+
+def verify_fixtures_parallel(fixtures, jobs, stage_filter=None, stats=None, cache=None,
+                             **options):
+    """Verify (fixture, label_suffix, max_messages) fixtures over a process pool.
+
+    Scenarios are scheduled largest fixture first, but printed (and appended
+    to `stats`) in the same order as verify_fixture() would. `options` are
+    passed on to verify_scenario(). Returns (total_pass, total_fail).
+    """
+    tasks = []
+    for fixture, label_suffix, max_messages in fixtures:
+        source = _fixture_source(fixture)
+        scenario_options = dict(options, label_suffix=label_suffix, max_messages=max_messages,
+                                report=stats is not None)
+        for index, stage_fn in scenario_stage_fns(fixture, stage_filter):
+            name = fixture.scenarios[index].name
+            if stage_fn is None:
+                tasks.append((None, f"WARNING: No verifier for {name}"))
+            else:
+                tasks.append((len(fixture.points), (source, index, name.split("_")[0],
+                                                    scenario_options)))
+
+    cache_config = None if cache is None else (cache.cache_dir, cache.max_bytes)
+    total_pass = 0
+    total_fail = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [None] * len(tasks)
+        runnable = [t for t, (size, _) in enumerate(tasks) if size is not None]
+        for t in sorted(runnable, key=lambda t: -tasks[t][0]):
+            futures[t] = pool.submit(_verify_scenario_job, *tasks[t][1], cache_config)
+
+        for (_, task), future in zip(tasks, futures):
+            if future is None:
+                print(task)
+                continue
+            passes, fails, lines, record, hits, misses = future.result()
+            total_pass += passes
+            total_fail += fails
+            if record is not None:
+                stats.append(record)
+            for line in lines:
+                print(line)
+            if cache is not None:
+                cache.hits += hits
+                cache.misses += misses
+
+    return total_pass, total_fail
+
+
+def run_verification(stage_filter=None, verbose=False, sweeps=True, stats=None,
+                     top_k=DEFAULT_TOP_K, precision="float64", cache=None, jobs=1):
+    """Run verification for all or filtered stages. Returns (total_pass, total_fail).
+
+    The dense sweep fixture is verified too when it exists and matches the
+    current reference values. Pass a list as `stats` for report mode and a
+    StageCache as `cache` to reuse stage outputs (see verify_fixture).
+    `precision` runs the stages as in run_stage(). With jobs > 1 the
+    scenarios run in that many worker processes; the output is the same.
+    """
+    reference = load_reference()
+    fixtures = [(reference, "", None)]
+
+    if sweeps and os.path.exists(SWEEP_FIXTURE):
+        sweep = load_reference_fixture(SWEEP_FIXTURE)
+        if sweep.source_sha1 != reference.source_sha1:
+            print(f"NOTE: {os.path.basename(SWEEP_FIXTURE)} is stale, "
+                  f"rerun compute_reference.py; skipping sweeps")
+        else:
+            fixtures.append((sweep, f" (sweep, {len(sweep.points)} points)", SWEEP_MAX_MESSAGES))
+
+    if jobs > 1:
+        return verify_fixtures_parallel(fixtures, jobs, stage_filter, stats, cache,
+                                        verbose=verbose, top_k=top_k, precision=precision)
+
+    total_pass = 0
+    total_fail = 0
+    for fixture, label_suffix, max_messages in fixtures:
+        passes, fails = verify_fixture(fixture, stage_filter, verbose, label_suffix,
+                                       max_messages, stats, top_k, precision, cache)
+        total_pass += passes
+        total_fail += fails
     return total_pass, total_fail
 
 
+def format_stats_table(stats):
+    """Compact text table of error_stats() records, one line per scenario."""
+    lines = [f"{'scenario':58s} {'points':>8s} {'fail':>6s} {'max':>9s} {'mean':>9s} "
+             f"{'p99':>9s} {'>1ulp':>7s} {'max ulp':>9s}  worst"]
+    for r in stats:
+        # Points more than 1 ulp off (a share would round to 100% with a few outliers)
+        above = sum(r["ulpHistogram"]["counts"][2:])
+        worst = r["worst"][0]["point"] if r["worst"] else "-"
+        lines.append(f"{r['scenario']:58s} {r['points']:8d} {r['failed']:6d} "
+                     f"{r['maxDelta']:9.2e} {r['meanDelta']:9.2e} {r['p99Delta']:9.2e} "
+                     f"{above:7d} {r['maxUlp']:9d}  {worst}")
+    return "\n".join(lines)
+
+
 def main():
     parser = argparse.ArgumentParser(description="VL.OCIO Pipeline Checker — verification")
     parser.add_argument("--stage", type=int, help="Verify specific stage (4, 5, 6, 8, 9)")
     parser.add_argument("--verbose", action="store_true", help="Show deltas for passing tests")
+    parser.add_argument("--no-sweeps", action="store_true",
+                        help="Skip the dense sweep fixture even if it exists")
+    parser.add_argument("--report", action="store_true",
+                        help="Print aggregated error statistics instead of per-point results")
+    parser.add_argument("--json", help="Write the --report statistics to this JSON file")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K,
+                        help="Worst points kept per scenario in the report")
+    parser.add_argument("--precision", choices=PRECISIONS, default="float64",
+                        help="Run the stages in float32, or float32 with half-float stage "
+                             "boundaries (float16), instead of float64")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse cached stage outputs (keyed by points, stage code and settings)")
+    parser.add_argument("--cache-dir", help="Stage cache directory (implies --cache)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES >> 20,
+                        help="Stage cache size cap in MiB (least recently used evicted first)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="Verify scenarios in this many worker processes")
     args = parser.parse_args()
+    report = args.report or args.json is not None
+    cache = None
+    if args.cache or args.cache_dir:
+        cache = StageCache(args.cache_dir, args.cache_size << 20)
 
     print("=" * 60)
     print("VL.OCIO Pipeline Checker — Math Verification")
     print("=" * 60)
     print()
 
+    stats = [] if report else None
     total_pass, total_fail = run_verification(
         stage_filter=args.stage,
         verbose=args.verbose,
+        sweeps=not args.no_sweeps,
+        stats=stats,
+        top_k=args.top_k,
+        precision=args.precision,
+        cache=cache,
+        jobs=args.jobs,
     )
 
+    if report:
+        print(format_stats_table(stats))
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"scenarios": stats}, f, indent=2)
+            print(f"Wrote {args.json}")
+
     print()
     print("-" * 60)
     print(f"TOTAL: {total_pass} passed, {total_fail} failed")
+    if cache is not None:
+        print(cache.summary())
 
     if total_fail > 0:
         print("RESULT: FAIL")